@@ -1,5 +1,6 @@
 import os
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -7,8 +8,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # 라우트 임포트
-from app.routes import llm_routes, vision_routes, hancut_routes
-from app.services.vision_service import vision_service
+from app.routes import llm_routes, vision_routes, hancut_routes, job_routes
+from app.services.vision_service import vision_service, VISION_NOT_READY_RETRY_AFTER
+from app.services.image_fetcher import image_fetcher
+from app.services.job_service import job_service
+from app.services.llm_service import llm_service
+from app.services.metrics import MetricsMiddleware, registry
+from app.services.admission import AdmissionMiddleware
+
+# 허용할 출처 (쉼표로 구분, 기본값은 모든 출처)
+CORS_ALLOW_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",") if origin.strip()]
 
 # FastAPI 앱 초기화
 app = FastAPI(
@@ -17,41 +26,81 @@ app = FastAPI(
     version="0.1.0"
 )
 
+# 클라이언트별 요청 한도와 모델 엔드포인트 동시 처리 상한 (초과 시 429 + Retry-After)
+# 나중에 추가한 미들웨어가 바깥쪽이므로 429 응답에도 CORS 헤더가 붙고 지표에도 기록된다
+app.add_middleware(AdmissionMiddleware)
+
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # 모든 도메인 허용
+    allow_origins=CORS_ALLOW_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 브라우저 클라이언트가 429 응답의 재시도 시각을 읽을 수 있도록 노출
+    expose_headers=["Retry-After"],
+)
+
+# 라우터별 경로 접두사와 문서 태그
+ROUTERS = (
+    (llm_routes.router, "/api/llm", "LLM"),
+    (vision_routes.router, "/api/vision", "Vision"),
+    (hancut_routes.router, "/api/hancut", "Hancut"),
+    (job_routes.router, "/api/jobs", "Jobs"),
+)
+
+# 요청 수/처리 시간 지표 수집 (주기적인 프로브 요청은 제외)
+# 라우터에 닿기 전에 거절된 요청(429 등)은 경로 템플릿 대신 라우터 접두사로 기록
+app.add_middleware(
+    MetricsMiddleware,
+    exclude_paths=("/metrics", "/healthz", "/readyz"),
+    route_prefixes=[prefix for _, prefix, _ in ROUTERS],
 )
 
 # 라우트 등록
-app.include_router(llm_routes.router, prefix="/api/llm", tags=["LLM"])
-app.include_router(vision_routes.router, prefix="/api/vision", tags=["Vision"])
-app.include_router(hancut_routes.router, prefix="/api/hancut", tags=["Hancut"])
+for router, prefix, tag in ROUTERS:
+    app.include_router(router, prefix=prefix, tags=[tag])
 
 # 루트 라우트
 @app.get("/")
 async def root():
     return {"message": "인테리어 프롬프트 생성 API에 오신 것을 환영합니다!"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 텍스트 형식 지표"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """프로세스 생존 확인 (모델 준비 여부와 무관)"""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """모델 로드와 워밍업이 끝났는지 확인 (준비 전에는 503)"""
+    readiness = vision_service.readiness()
+    if not readiness["ready"]:
+        return JSONResponse(readiness, status_code=503, headers={"Retry-After": str(VISION_NOT_READY_RETRY_AFTER)})
+    return readiness
+
 @app.on_event("startup")
 async def startup_event():
-    """서버 시작 시 모델 초기화"""
+    """서버 시작 시 모델 로드와 워밍업을 백그라운드에서 시작 (완료 전까지 /readyz는 503)
+
+    작업 워커도 함께 시작해 재시작 전에 끝나지 않은 작업을 첫 요청을 기다리지 않고 바로 이어서 처리한다.
+    """
     print("서버 시작: 모델 초기화 중...")
-    try:
-        # SIGLIP 모델 초기화
-        vision_service._load_siglip_model()
-        print("SIGLIP 모델 초기화 완료")
-        
-        # Faster R-CNN 모델 초기화
-        vision_service._load_rcnn_model()
-        print("Faster R-CNN 모델 초기화 완료")
-
-    except Exception as e:
-        print(f"모델 초기화 중 오류 발생: {str(e)}")
-        raise e
+    vision_service.start_background_load()
+    await job_service.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서버 종료 시 공유 커넥션, 작업 워커 및 추론 스레드 정리"""
+    await job_service.aclose()
+    await llm_service.aclose()
+    await image_fetcher.aclose()
+    await vision_service.aclose()
 
 # 서버 실행 코드 (직접 실행 시)
 if __name__ == "__main__":
@@ -1,107 +1,232 @@
-# 1. 라이브러리 설치
-# !pip install datasets transformers evaluate accelerate scikit-learn torchvision timm --quiet
-from google.colab import drive
-drive._mount('/content/drive')
-from datasets import load_dataset
-from transformers import SiglipForImageClassification,AutoModelForImageClassification, AutoImageProcessor, TrainingArguments, Trainer
-import torch
-print(torch.cuda.is_available())
-from torchvision import transforms
-from PIL import Image
-from transformers import default_data_collator
-from torch.utils.data import default_collate
-from torchvision.transforms import Compose, Resize, ToTensor, Normalize, RandomRotation, RandomAdjustSharpness
-import evaluate
-
-# Colab에서 진행 !
-dataset = load_dataset("imagefolder", data_dir="/content/drive/MyDrive/dataset/dataset_train")
-
-# 데이터셋 로드
-split = dataset['train'].train_test_split(test_size=0.2, stratify_by_column="label")
-train_data = split['train']
-eval_data = split['test']
-
-# 라벨 정의
-labels_list = train_data.features["label"].names
-id2label = {i: l for i, l in enumerate(labels_list)}
-label2id = {l: i for i, l in enumerate(labels_list)}
-
-
-# SIGLIP 로드, 이미지 전처리 모델
-model_name = "google/siglip-base-patch16-224"
-processor = AutoImageProcessor.from_pretrained(model_name)
-model = AutoModelForImageClassification.from_pretrained(
-    model_name,
-    num_labels=19,  # 분류 클래스 수(데이터셋 라벨 수)
-    ignore_mismatched_sizes=True
-)
-
-# Train, Test 데이터에 적용하는 이미지 전처리
-_train_transforms = transforms.Compose([
-    transforms.Resize((224, 224)),
-    transforms.ToTensor(),
-    transforms.Normalize(mean=processor.image_mean, std=processor.image_std)
-])
-
-_val_transforms = transforms.Compose([
-    transforms.Resize((224, 224)),
-    transforms.ToTensor(),
-    transforms.Normalize(mean=processor.image_mean, std=processor.image_std)
-])
-
-
-# 이미지를 픽셀 값으로 바꿈
-def train_transforms(example):
-    image = example["image"].convert("RGB")
-    example["pixel_values"] = _train_transforms(image)
-    return example
-
-def val_transforms(example):
-    image = example["image"].convert("RGB")
-    example["pixel_values"] = _val_transforms(image)
-    return example
-
-train_data = train_data.map(train_transforms)
-eval_data = eval_data.map(val_transforms)
-
-
-# pixel_values, label로 설정
-train_data.set_format(type="torch", columns=["pixel_values", "label"])
-eval_data.set_format(type="torch", columns=["pixel_values", "label"])
-
-# TrainingArguments
-training_args = TrainingArguments(
-    output_dir="./outputs",
-    report_to="none",
-    logging_dir="./logs",
-    metric_for_best_model="accuracy",
-    greater_is_better=True,
-    per_device_train_batch_size=64,
-    per_device_eval_batch_size=16,
-    num_train_epochs=5,
-    logging_steps=10,
-    save_total_limit=2,
-)
-
-# 정확도 평가
-import evaluate
-accuracy_metric = evaluate.load("accuracy")
-
-def compute_metrics(eval_pred):
-    logits, labels = eval_pred
-    predictions = torch.argmax(torch.tensor(logits), dim=-1)
-    return accuracy_metric.compute(predictions=predictions, references=labels)
-
-trainer = Trainer(
-    model=model,
-    args=training_args,
-    train_dataset=train_data,
-    eval_dataset=eval_data,
-    compute_metrics=compute_metrics,
-)
-
-trainer.train()
-trainer.evaluate()
-# 모델 저장
-trainer.save_model("/content/drive/MyDrive/siglip_model")
-processor.save_pretrained("/content/drive/MyDrive/siglip_model")
\ No newline at end of file
+"""SIGLIP 인테리어 스타일 분류 모델 파인튜닝
+
+클래스별 하위 폴더로 나뉜 이미지 폴더(또는 Hugging Face 데이터셋)로 SIGLIP 이미지 분류 모델을 학습한다.
+
+    dataset_train/
+        Asian/0001.jpg
+        Coastal/0002.jpg
+        ...
+
+- 이미지를 미리 float 텐서로 변환해 두지 않고, 학습 중 DataLoader 워커가 필요한 배치만 디코딩한다 (set_transform).
+  디코딩은 서비스와 같은 decode_image(JPEG draft 디코딩) + siglip_resize 경로라 학습과 추론의 전처리가 같다.
+- --cache-dir을 주면 입력 크기로 줄인 uint8 이미지를 처음 한 번만 만들어 Arrow 파일로 저장하고,
+  이후 에폭과 다음 실행은 JPEG 디코딩 없이 메모리 매핑으로 읽는다 (224x224 기준 이미지당 약 150KB).
+- 정규화는 collator에서 배치 단위로 한 번에 수행한다.
+- GPU가 없으면 CPU에서 학습하며, --freeze-backbone으로 분류 헤드만 학습하면 CPU 한 대로도 재학습할 수 있다.
+  로그마다 학습 처리량(images/sec)을 출력한다.
+
+    pip install datasets
+    python -m app.models.finetune_siglip --data-dir ./dataset/dataset_train --output-dir ./outputs/siglip
+    python -m app.models.finetune_siglip --data-dir ./dataset/dataset_train --cache-dir ~/.cache/hancut/siglip_train \\
+        --batch-size 16 --grad-accum 4 --precision bf16 --num-workers 4 --freeze-backbone
+
+Colab에서는 드라이브를 마운트한 뒤 --data-dir /content/drive/MyDrive/dataset/dataset_train 으로 실행한다.
+학습이 끝나면 --output-dir의 모델을 SIGLIP_MODEL_PATH로 지정해 서비스에서 사용한다.
+"""
+import os
+import time
+import argparse
+from functools import partial
+
+import numpy as np
+import torch
+from transformers import AutoImageProcessor, AutoModelForImageClassification, Trainer, TrainerCallback, TrainingArguments
+
+from app.services.image_preprocess import decode_image, normalize_siglip_pixels, siglip_resize
+
+PRECISIONS = ["fp32", "fp16", "bf16"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data-dir", help="클래스별 하위 폴더로 나뉜 학습 이미지 폴더")
+    source.add_argument("--dataset", help="Hugging Face 데이터셋 이름 (image, label 컬럼)")
+    parser.add_argument("--model", default="google/siglip-base-patch16-224", help="시작 가중치")
+    parser.add_argument("--output-dir", default="./outputs/siglip")
+    parser.add_argument("--cache-dir", help="리사이즈한 uint8 이미지 캐시 위치 (없으면 매 에폭 디코딩)")
+    parser.add_argument("--eval-size", type=float, default=0.2, help="검증 분할이 없을 때 떼어 낼 검증 비율")
+    parser.add_argument("--epochs", type=float, default=5)
+    parser.add_argument("--batch-size", type=int, default=64, help="장치당 학습 배치 크기")
+    parser.add_argument("--eval-batch-size", type=int, default=16)
+    parser.add_argument("--grad-accum", type=int, default=1, help="그래디언트 누적 단계 수 (유효 배치 = batch-size x grad-accum)")
+    parser.add_argument("--learning-rate", type=float, default=5e-5)
+    parser.add_argument("--precision", default="fp32", choices=PRECISIONS, help="혼합 정밀도 (CPU는 bf16만 지원)")
+    parser.add_argument("--num-workers", type=int, default=min(4, os.cpu_count() or 1), help="DataLoader 디코딩 워커 수")
+    parser.add_argument("--freeze-backbone", action="store_true", help="이미지 인코더를 고정하고 분류 헤드만 학습")
+    parser.add_argument("--cpu", action="store_true", help="GPU가 있어도 CPU에서 학습")
+    parser.add_argument("--threads", type=int, help="torch.set_num_threads 값")
+    parser.add_argument("--logging-steps", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def load_splits(args):
+    """(학습, 검증) 데이터셋 (검증 분할이 없으면 라벨 비율을 유지해 학습 데이터에서 떼어 냄)"""
+    from datasets import load_dataset
+
+    if args.data_dir:
+        dataset = load_dataset("imagefolder", data_dir=args.data_dir, cache_dir=args.cache_dir)
+    else:
+        dataset = load_dataset(args.dataset, cache_dir=args.cache_dir)
+
+    eval_split = next((name for name in ("validation", "test") if name in dataset), None)
+    if eval_split is not None:
+        return dataset["train"], dataset[eval_split]
+    split = dataset["train"].train_test_split(test_size=args.eval_size, stratify_by_column="label", seed=args.seed)
+    return split["train"], split["test"]
+
+
+def decode_batch(images: list, processor) -> np.ndarray:
+    """디코딩하지 않은 이미지 항목({"bytes", "path"})을 SIGLIP 입력 크기의 uint8 배치로 변환"""
+    decoded = []
+    for item in images:
+        if item["bytes"] is not None:
+            decoded.append(decode_image(item["bytes"]))
+        else:
+            with open(item["path"], "rb") as f:
+                decoded.append(decode_image(f))
+    return siglip_resize(decoded, processor)
+
+
+def to_pixels(batch: dict, processor) -> dict:
+    return {"pixels": list(decode_batch(batch["image"], processor)), "label": batch["label"]}
+
+
+def prepare(dataset, processor, args, name: str):
+    """이미지를 학습 중 디코딩하도록 설정하거나 (캐시 없음), uint8 캐시를 만들어 사용"""
+    from datasets import Array3D, Features, Image as ImageFeature
+
+    # PIL 디코딩 대신 원본 바이트를 받아 decode_image로 디코딩
+    dataset = dataset.cast_column("image", ImageFeature(decode=False))
+    if not args.cache_dir:
+        dataset.set_transform(partial(to_pixels, processor=processor))
+        return dataset
+
+    height, width = processor.size["height"], processor.size["width"]
+    features = Features({"pixels": Array3D((height, width, 3), "uint8"), "label": dataset.features["label"]})
+    start = time.perf_counter()
+    cached = dataset.map(
+        partial(to_pixels, processor=processor),
+        batched=True,
+        batch_size=64,
+        features=features,
+        remove_columns=dataset.column_names,
+        num_proc=args.num_workers if args.num_workers > 1 else None,
+        desc=f"{name} 이미지 캐시",
+    )
+    print(f"{name}: {len(cached)}장 uint8 캐시 준비 ({time.perf_counter() - start:.1f}s)")
+    return cached.with_format("numpy")
+
+
+def collate(examples: list, processor) -> dict:
+    """uint8 이미지 배치를 한 번에 정규화"""
+    pixels = np.stack([example["pixels"] for example in examples])
+    return {
+        "pixel_values": normalize_siglip_pixels(pixels, processor),
+        "labels": torch.tensor([int(example["label"]) for example in examples]),
+    }
+
+
+def compute_metrics(eval_pred) -> dict:
+    logits, labels = eval_pred
+    return {"accuracy": float((np.argmax(logits, axis=-1) == labels).mean())}
+
+
+class ThroughputCallback(TrainerCallback):
+    """로그 구간마다 학습 처리량(images/sec) 출력"""
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self._start = time.perf_counter()
+        self._step = state.global_step
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        if not logs or "loss" not in logs or state.global_step == self._step:
+            return
+        now = time.perf_counter()
+        images = (state.global_step - self._step) * args.train_batch_size * args.gradient_accumulation_steps * args.world_size
+        print(f"step {state.global_step}: loss={logs['loss']:.4f} {images / (now - self._start):.1f} images/sec")
+        self._start, self._step = now, state.global_step
+
+
+def main():
+    args = parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    train_data, eval_data = load_splits(args)
+    labels_list = train_data.features["label"].names
+    print(f"라벨 {len(labels_list)}개: {labels_list}")
+    print(f"학습 {len(train_data)}장, 검증 {len(eval_data)}장")
+
+    processor = AutoImageProcessor.from_pretrained(args.model)
+    model = AutoModelForImageClassification.from_pretrained(
+        args.model,
+        num_labels=len(labels_list),
+        id2label=dict(enumerate(labels_list)),
+        label2id={label: i for i, label in enumerate(labels_list)},
+        ignore_mismatched_sizes=True,
+    )
+    if args.freeze_backbone:
+        for param_name, param in model.named_parameters():
+            param.requires_grad = param_name.startswith("classifier")
+    trainable = sum(param.numel() for param in model.parameters() if param.requires_grad)
+    print(f"학습 파라미터: {trainable:,}개")
+
+    train_data = prepare(train_data, processor, args, "train")
+    eval_data = prepare(eval_data, processor, args, "eval")
+
+    training_args = TrainingArguments(
+        output_dir=args.output_dir,
+        report_to="none",
+        metric_for_best_model="accuracy",
+        greater_is_better=True,
+        eval_strategy="epoch",
+        save_strategy="epoch",
+        load_best_model_at_end=True,
+        save_total_limit=2,
+        per_device_train_batch_size=args.batch_size,
+        per_device_eval_batch_size=args.eval_batch_size,
+        gradient_accumulation_steps=args.grad_accum,
+        num_train_epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        logging_steps=args.logging_steps,
+        fp16=args.precision == "fp16",
+        bf16=args.precision == "bf16",
+        use_cpu=args.cpu,
+        dataloader_num_workers=args.num_workers,
+        dataloader_persistent_workers=args.num_workers > 0,
+        dataloader_pin_memory=torch.cuda.is_available() and not args.cpu,
+        # collator가 pixels 컬럼을 pixel_values로 바꾸므로 모델 인자에 없는 컬럼도 남겨 둠
+        remove_unused_columns=False,
+        seed=args.seed,
+    )
+
+    trainer = Trainer(
+        model=model,
+        args=training_args,
+        train_dataset=train_data,
+        eval_dataset=eval_data,
+        data_collator=partial(collate, processor=processor),
+        compute_metrics=compute_metrics,
+        callbacks=[ThroughputCallback()],
+    )
+
+    train_metrics = trainer.train().metrics
+    eval_metrics = trainer.evaluate()
+    trainer.save_metrics("train", train_metrics)
+    trainer.save_metrics("eval", eval_metrics)
+    print(
+        f"학습 {train_metrics['train_samples_per_second']:.1f} images/sec, "
+        f"검증 {eval_metrics['eval_samples_per_second']:.1f} images/sec, "
+        f"정확도 {eval_metrics['eval_accuracy']:.2%}"
+    )
+
+    # 모델 저장
+    trainer.save_model(args.output_dir)
+    processor.save_pretrained(args.output_dir)
+    print(f"모델 저장: {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 # 텍스트 프롬프트 요청 모델
 class TextPromptRequest(BaseModel):
     text: str = Field(..., description="인테리어 관련 사용자 입력 텍스트")
+    use_cache: bool = Field(True, description="False면 캐시된 프롬프트를 쓰지 않고 새로 생성")
     
 # 이미지 스타일 분석 요청 모델
 class ImageStyleRequest(BaseModel):
@@ -12,7 +13,35 @@ class ImageStyleRequest(BaseModel):
 # 객체 탐지 요청 모델
 class ObjectDetectionRequest(BaseModel):
     image_url: Optional[str] = Field(None, description="객체 탐지를 위한 이미지 URL")
+    score_threshold: Optional[float] = Field(None, ge=0, le=1, description="최소 탐지 신뢰도 (기본값: DETECTION_SCORE_THRESHOLD)")
+    max_per_class: Optional[int] = Field(None, ge=1, description="라벨별 최대 객체 수 (기본값: DETECTION_MAX_PER_CLASS)")
+    tiling: Optional[Literal["off", "on", "auto"]] = Field(None, description="고해상도 타일 탐지 모드 (기본값: DETECTION_TILING)")
+
+# 배치 객체 탐지 요청 모델
+class BatchObjectDetectionRequest(BaseModel):
+    image_urls: List[str] = Field(..., min_length=1, description="객체 탐지를 위한 이미지 URL 목록")
+    score_threshold: Optional[float] = Field(None, ge=0, le=1, description="최소 탐지 신뢰도 (기본값: DETECTION_SCORE_THRESHOLD)")
+    max_per_class: Optional[int] = Field(None, ge=1, description="라벨별 최대 객체 수 (기본값: DETECTION_MAX_PER_CLASS)")
+    tiling: Optional[Literal["off", "on", "auto"]] = Field(None, description="고해상도 타일 탐지 모드 (기본값: DETECTION_TILING)")
+
+# 단일 이미지 통합 분석 요청 모델
+class AnalyzeRequest(BaseModel):
+    image_url: str = Field(..., description="분석할 이미지 URL")
+    fields: List[Literal["styles", "objects", "embedding"]] = Field(
+        default_factory=lambda: ["styles", "objects"], min_length=1, description="실행할 분석 (요청하지 않은 모델은 실행하지 않음)"
+    )
+    score_threshold: Optional[float] = Field(None, ge=0, le=1, description="최소 탐지 신뢰도 (기본값: DETECTION_SCORE_THRESHOLD)")
+    max_per_class: Optional[int] = Field(None, ge=1, description="라벨별 최대 객체 수 (기본값: DETECTION_MAX_PER_CLASS)")
+    tiling: Optional[Literal["off", "on", "auto"]] = Field(None, description="고해상도 타일 탐지 모드 (기본값: DETECTION_TILING)")
+
+# 유사 인테리어 검색 요청 모델
+class SimilarImageRequest(BaseModel):
+    image_url: str = Field(..., description="비슷한 인테리어를 찾을 이미지 URL")
+    k: int = Field(10, ge=1, le=100, description="반환할 이미지 수")
 
 # 이미지 생성 요청 모델
 class ImageGenerationRequest(BaseModel):
-    prompt: str = Field(..., description="이미지 생성을 위한 프롬프트")
\ No newline at end of file
+    prompt: str = Field(..., description="이미지 생성을 위한 프롬프트")
+# 이미지 생성 비동기 작업 요청 모델
+class ImageGenerationJobRequest(ImageGenerationRequest):
+    webhook_url: Optional[str] = Field(None, description="작업이 끝나면 결과를 POST로 받을 URL")
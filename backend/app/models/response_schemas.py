@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 # 프롬프트 응답 모델
 class PromptResponse(BaseModel):
@@ -13,11 +13,65 @@ class StyleAnalysisResponse(BaseModel):
 class DetectedObject(BaseModel):
     label: str = Field(..., description="탐지된 객체 라벨")
     confidence: float = Field(..., description="탐지 신뢰도")
+    box: Optional[List[float]] = Field(None, description="이미지 크기로 정규화한 경계 상자 [x1, y1, x2, y2] (0~1)")
     
 class ObjectDetectionResponse(BaseModel):
     objects: List[DetectedObject] = Field(..., description="탐지된 객체 목록")
 
+# 배치 객체 탐지 응답 모델
+class BatchDetectionItem(BaseModel):
+    image_url: str = Field(..., description="요청한 이미지 URL")
+    objects: List[DetectedObject] = Field(default_factory=list, description="탐지된 객체 목록")
+    error: Optional[str] = Field(None, description="이 항목의 처리 실패 사유")
+
+class BatchObjectDetectionResponse(BaseModel):
+    results: List[BatchDetectionItem] = Field(..., description="요청 순서대로 정렬된 URL별 결과")
+
+# 업로드 배치 객체 탐지 응답 모델
+class BatchUploadDetectionItem(BaseModel):
+    filename: str = Field(..., description="업로드한 파일 이름")
+    objects: List[DetectedObject] = Field(default_factory=list, description="탐지된 객체 목록")
+    error: Optional[str] = Field(None, description="이 항목의 처리 실패 사유")
+
+class BatchUploadDetectionResponse(BaseModel):
+    results: List[BatchUploadDetectionItem] = Field(..., description="업로드 순서대로 정렬된 파일별 결과")
+
+# 유사 인테리어 검색 응답 모델
+class SimilarImage(BaseModel):
+    source: str = Field(..., description="이전에 요청된 이미지 URL (업로드는 upload://파일 이름)")
+    styles: List[str] = Field(default_factory=list, description="그 이미지에서 추출된 스타일 키워드")
+    score: float = Field(..., description="임베딩 코사인 유사도 (-1~1)")
+
+class SimilarImageResponse(BaseModel):
+    results: List[SimilarImage] = Field(..., description="유사도 내림차순으로 정렬된 이미지 목록")
+
+# 단일 이미지 통합 분석 응답 모델 (요청하지 않은 분석의 필드는 null)
+class AnalyzeResponse(BaseModel):
+    styles: Optional[List[str]] = Field(None, description="추출된 스타일 키워드 목록 (상위 3개)")
+    probabilities: Optional[List[float]] = Field(None, description="스타일별 확률")
+    objects: Optional[List[DetectedObject]] = Field(None, description="탐지된 객체 목록")
+    object_counts: Optional[Dict[str, int]] = Field(None, description="라벨별 탐지된 객체 수")
+    embedding: Optional[List[float]] = Field(None, description="L2 정규화한 SIGLIP 이미지 임베딩")
+    timings: Dict[str, float] = Field(default_factory=dict, description="단계/분석별 소요 시간 (ms)")
+
 # 이미지 생성 응답 모델
 class ImageGenerationResponse(BaseModel):
     image_url: str = Field(..., description="생성된 이미지 URL")
-    prompt: str = Field(..., description="사용된 프롬프트")
\ No newline at end of file
+    prompt: str = Field(..., description="사용된 프롬프트")
+
+# 한컷 생성 응답 모델
+class HancutGenerationResponse(ImageGenerationResponse):
+    styles: List[str] = Field(default_factory=list, description="추출된 스타일 키워드 목록")
+    objects: List[str] = Field(default_factory=list, description="탐지된 객체 라벨 목록 (중복 제거)")
+    object_counts: Dict[str, int] = Field(default_factory=dict, description="라벨별 탐지된 객체 수")
+    timings: Dict[str, float] = Field(default_factory=dict, description="단계별 소요 시간 (ms)")
+
+# 비동기 작업 응답 모델
+class JobResponse(BaseModel):
+    job_id: str = Field(..., description="작업 ID")
+    status: str = Field(..., description="작업 상태 (queued, running, succeeded, failed)")
+    result: Optional[ImageGenerationResponse] = Field(None, description="작업이 성공한 경우의 결과")
+    error: Optional[str] = Field(None, description="마지막 실패 사유")
+    attempts: int = Field(0, description="지금까지의 시도 횟수")
+    created_at: float = Field(..., description="작업 생성 시각 (Unix time)")
+    updated_at: float = Field(..., description="마지막 상태 변경 시각 (Unix time)")
@@ -1,45 +1,246 @@
-from fastapi import APIRouter, HTTPException
+import os
+import json
+import time
+import asyncio
+import logging
+from contextlib import aclosing
+from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from app.models.request_schemas import ImageStyleRequest, ObjectDetectionRequest, TextPromptRequest
-from app.models.response_schemas import ImageGenerationResponse
+from app.models.response_schemas import HancutGenerationResponse
 from app.routes import llm_routes, vision_routes
 from app.services.llm_service import llm_service
-from app.services.vision_service import vision_service
+from app.services.vision_service import vision_service, InferenceQueueFullError, ModelNotReadyError
+from app.services.openai_client import CircuitOpenError
+from app.services.image_upload import upload_openapi
+
+logger = logging.getLogger(__name__)
+
+# 스트리밍 응답에서 DALL-E 생성을 기다리는 동안 보내는 keep-alive 주석 간격 (초)
+HANCUT_STREAM_KEEPALIVE_SECONDS = float(os.getenv("HANCUT_STREAM_KEEPALIVE_SECONDS", "10"))
 
 router = APIRouter()
 
-@router.post("/", response_model=ImageGenerationResponse)
+@router.post("/", response_model=HancutGenerationResponse)
 async def generate_hancut_image(text_request: TextPromptRequest, style_img_request: ImageStyleRequest, object_img_request: ObjectDetectionRequest):
     """
     이미지 URL에서 인테리어 스타일을 추출합니다.
     이미지 URL에서 인테리어 객체를 탐지합니다.
     추출된 스타일과 객체를 사용자가 입력한 텍스트와 조합하여 인테리어 프롬프트를 생성합니다.
     프롬프트를 기반으로 DALL-E 3를 사용하여 이미지를 생성합니다.
+    두 이미지는 동시에 받고(같은 URL은 한 번만), 스타일 추출과 객체 탐지는 병렬로 실행됩니다.
     """
-    
-    styles = None
-    objects = None
-    prompt = None
 
     try:
-        # 스타일 추출
-        styles = await vision_service.extract_style(style_img_request.image_url)
-
-        # 인테리어 객체 추출
-        objects_data = await vision_service.detect_objects(object_img_request.image_url)
-        objects = [obj["label"] for obj in objects_data]
+        # 스타일 추출 + 인테리어 객체 추출 (병렬)
+        styles, objects_data, timings = await vision_service.extract_style_and_objects(
+            style_img_request.image_url,
+            object_img_request.image_url,
+            score_threshold=object_img_request.score_threshold,
+            max_per_class=object_img_request.max_per_class,
+            tiling=object_img_request.tiling,
+        )
+        object_counts = vision_service.label_counts(objects_data)
+    except (InferenceQueueFullError, ModelNotReadyError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"vision model 오류: {str(e)}")
-  
+
+    return await _generate_from_vision(text_request.text, text_request.use_cache, styles, object_counts, timings)
+
+
+@router.post("/upload", response_model=HancutGenerationResponse, openapi_extra=upload_openapi({"style_image": False, "object_image": False}, ("text", "use_cache", *vision_routes.DETECTION_FIELDS)))
+async def generate_hancut_image_upload(request: Request):
+    """
+    POST /api/hancut/ 과 같은 처리를 이미지 URL 대신 업로드한 파일(multipart/form-data)로 수행합니다.
+    필드: text(필수), use_cache(true/false), style_image(필수), object_image(없으면 style_image를 함께 사용),
+    score_threshold / max_per_class / tiling(객체 탐지 옵션)
+    같은 파일이면 디코딩은 한 번만 수행됩니다.
+    """
+    form = await vision_routes.read_upload(request, max_files=2)
+    try:
+        text = form.fields.get("text")
+        style_upload = form.file("style_image")
+        if not text or style_upload is None:
+            raise HTTPException(status_code=400, detail="text 필드와 style_image 파일이 필요합니다")
+        object_upload = form.file("object_image")
+        use_cache = form.fields.get("use_cache", "true").lower() not in ("0", "false", "no")
+        try:
+            options = vision_routes.detection_options(form)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        style_image = style_upload.to_fetched()
+        object_image = object_upload.to_fetched() if object_upload is not None else style_image
+        try:
+            styles, objects_data, timings = await vision_service.extract_style_and_objects_from_fetched(
+                style_image, object_image, **options
+            )
+            timings["upload"] = round(max(upload.elapsed_ms for upload in form.files), 2)
+            object_counts = vision_service.label_counts(objects_data)
+        except (InferenceQueueFullError, ModelNotReadyError) as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"vision model 오류: {str(e)}")
+    finally:
+        form.close()
+
+    return await _generate_from_vision(text, use_cache, styles, object_counts, timings)
+
+
+def _object_keywords(object_counts: Dict[str, int]) -> List[str]:
+    """LLM에 넘길 객체 키워드 (같은 라벨은 한 번만, 여러 개면 "book (4)"처럼 개수를 붙임)"""
+    return [label if count == 1 else f"{label} ({count})" for label, count in object_counts.items()]
+
+
+async def _generate_from_vision(text: str, use_cache: bool, styles: list, object_counts: Dict[str, int], timings: dict) -> HancutGenerationResponse:
+    """추출된 스타일/객체와 텍스트로 프롬프트를 만들고 DALL-E 이미지를 생성"""
     try:
         # 스타일, 객체, 텍스트 기반 프롬프트 생성
-        prompt = await llm_service.generate_hancut_prompt(text_request.text, styles, objects)
+        start = time.perf_counter()
+        prompt = await llm_service.generate_hancut_prompt(text, styles, _object_keywords(object_counts), use_cache=use_cache)
+        timings["llm"] = round((time.perf_counter() - start) * 1000, 2)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"프롬프트 생성 오류: {str(e)}")
     
     try:
         # 프롬프트 기반 이미지 생성
+        start = time.perf_counter()
         result = await llm_service.generate_image_with_dalle(prompt)
-        return ImageGenerationResponse(image_url=result["image_url"], prompt=result["prompt"])
+        timings["image_generation"] = round((time.perf_counter() - start) * 1000, 2)
+        return HancutGenerationResponse(
+            image_url=result["image_url"],
+            prompt=result["prompt"],
+            styles=styles,
+            objects=list(object_counts),
+            object_counts=object_counts,
+            timings=timings,
+        )
     
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"이미지 생성 오류: {str(e)}")
+
+
+def _sse(event: str, data: dict) -> str:
+    """Server-Sent Events 형식의 이벤트 한 개"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_error(stage: str, status_code: int, detail: str, **extra) -> str:
+    return _sse("error", {"stage": stage, "status_code": status_code, "detail": detail, **extra})
+
+
+async def _hancut_events(request: Request, text: str, style_url: str, object_url: str, use_cache: bool = True, detection_options: Optional[dict] = None):
+    """한컷 생성 단계를 끝나는 대로 SSE 이벤트로 내보내는 생성기
+
+    클라이언트 연결이 끊기면 생성기가 취소되거나 단계 사이에서 중단되어, 이후의 GPT/DALL-E 호출은 실행되지 않는다.
+    """
+    timings = {}
+    styles = None
+    objects = None
+    object_counts = {}
+    yield _sse("start", {"stages": ["styles", "objects", "prompt", "image"]})
+
+    try:
+        # 스타일 추출 + 인테리어 객체 추출 (병렬, 끝나는 순서대로 전송)
+        try:
+            async for stage, value in vision_service.iter_style_and_objects(style_url, object_url, timings, **(detection_options or {})):
+                if stage == "styles":
+                    styles = value
+                    yield _sse("styles", {"styles": styles, "elapsed_ms": timings.get("style")})
+                else:
+                    object_counts = vision_service.label_counts(value)
+                    objects = list(object_counts)
+                    yield _sse("objects", {"objects": objects, "object_counts": object_counts, "elapsed_ms": timings.get("detect")})
+        except (InferenceQueueFullError, ModelNotReadyError) as e:
+            yield _sse_error("vision", 503, str(e), retry_after=e.retry_after)
+            return
+        except Exception as e:
+            yield _sse_error("vision", 500, f"vision model 오류: {str(e)}")
+            return
+
+        if await request.is_disconnected():
+            logger.info("클라이언트 연결 종료: 프롬프트 생성 전 중단")
+            return
+
+        # 스타일, 객체, 텍스트 기반 프롬프트 생성 (토큰 단위 전송)
+        try:
+            start = time.perf_counter()
+            tokens = []
+            async with aclosing(llm_service.stream_hancut_prompt(text, styles, _object_keywords(object_counts), use_cache=use_cache)) as stream:
+                async for token in stream:
+                    tokens.append(token)
+                    yield _sse("prompt_token", {"token": token})
+            prompt = llm_service.parse_prompt_result("".join(tokens))
+            timings["llm"] = round((time.perf_counter() - start) * 1000, 2)
+        except CircuitOpenError as e:
+            yield _sse_error("prompt", 503, str(e), retry_after=e.retry_after)
+            return
+        except Exception as e:
+            yield _sse_error("prompt", 500, f"프롬프트 생성 오류: {str(e)}")
+            return
+        yield _sse("prompt", {"prompt": prompt, "elapsed_ms": timings["llm"]})
+
+        if await request.is_disconnected():
+            logger.info("클라이언트 연결 종료: 이미지 생성 전 중단")
+            return
+
+        # 프롬프트 기반 이미지 생성 (기다리는 동안 프록시가 연결을 끊지 않도록 keep-alive 전송)
+        start = time.perf_counter()
+        image_task = asyncio.ensure_future(llm_service.generate_image_with_dalle(prompt))
+        try:
+            while True:
+                done, _ = await asyncio.wait({image_task}, timeout=HANCUT_STREAM_KEEPALIVE_SECONDS)
+                if done:
+                    break
+                if await request.is_disconnected():
+                    logger.info("클라이언트 연결 종료: 이미지 생성 취소")
+                    return
+                yield ": keep-alive\n\n"
+            result = image_task.result()
+            timings["image_generation"] = round((time.perf_counter() - start) * 1000, 2)
+        except CircuitOpenError as e:
+            yield _sse_error("image", 503, str(e), retry_after=e.retry_after)
+            return
+        except Exception as e:
+            yield _sse_error("image", 500, f"이미지 생성 오류: {str(e)}")
+            return
+        finally:
+            image_task.cancel()
+
+        yield _sse("image", {"image_url": result["image_url"], "prompt": result["prompt"], "elapsed_ms": timings["image_generation"]})
+        yield _sse("done", {"styles": styles, "objects": objects, "object_counts": object_counts, "timings": timings})
+    except asyncio.CancelledError:
+        logger.info("클라이언트 연결 종료: 한컷 스트리밍 취소")
+        raise
+
+
+@router.post("/stream")
+async def stream_hancut_image(request: Request, text_request: TextPromptRequest, style_img_request: ImageStyleRequest, object_img_request: ObjectDetectionRequest):
+    """
+    POST /api/hancut/ 과 같은 파이프라인을 Server-Sent Events로 스트리밍합니다.
+    이벤트 순서: start -> styles / objects (끝나는 순서) -> prompt_token (여러 개) -> prompt -> image -> done
+    단계가 실패하면 error 이벤트(stage, status_code, detail)를 보내고 스트림을 끝냅니다.
+    클라이언트가 연결을 끊으면 남은 단계(GPT, DALL-E)는 실행하지 않습니다.
+    """
+    return StreamingResponse(
+        _hancut_events(
+            request,
+            text_request.text,
+            style_img_request.image_url,
+            object_img_request.image_url,
+            use_cache=text_request.use_cache,
+            detection_options={
+                "score_threshold": object_img_request.score_threshold,
+                "max_per_class": object_img_request.max_per_class,
+                "tiling": object_img_request.tiling,
+            },
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
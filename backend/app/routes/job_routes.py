@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException, Response
+from app.models.request_schemas import ImageGenerationJobRequest
+from app.models.response_schemas import JobResponse
+from app.services.job_service import job_service, Job, JobQueueFullError
+
+router = APIRouter()
+
+
+def _job_response(job: Job) -> JobResponse:
+    return JobResponse(
+        job_id=job.id,
+        status=job.status,
+        result=job.result,
+        error=job.error,
+        attempts=job.attempts,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+@router.post("/generate-image", response_model=JobResponse, status_code=202)
+async def submit_image_job(request: ImageGenerationJobRequest, response: Response):
+    """
+    DALL-E 3 이미지 생성 작업을 대기열에 넣고 작업 ID를 바로 반환합니다.
+    결과는 GET /api/jobs/{job_id}로 조회하거나 webhook_url로 받을 수 있습니다.
+    """
+    try:
+        job = await job_service.submit("image", {"prompt": request.prompt}, webhook_url=request.webhook_url)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return _job_response(job)
+
+
+@router.get("/stats")
+def job_stats():
+    """
+    작업 대기열 길이와 상태별 작업 수를 반환합니다.
+    (SQLite 저장소 조회가 이벤트 루프를 막지 않도록 동기 함수로 두어 스레드 풀에서 실행)
+    """
+    return job_service.stats()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    작업 상태와 결과를 조회합니다.
+    """
+    job = await job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return _job_response(job)
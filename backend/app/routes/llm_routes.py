@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from app.models.request_schemas import TextPromptRequest, ImageGenerationRequest
 from app.models.response_schemas import PromptResponse, ImageGenerationResponse
 from app.services.llm_service import llm_service
+from app.services.openai_client import CircuitOpenError
 
 router = APIRouter()
 
@@ -11,8 +12,10 @@ async def generate_prompt(request: TextPromptRequest):
     텍스트 입력으로부터 인테리어 프롬프트를 생성합니다.
     """
     try:
-        prompt = await llm_service.generate_interior_prompt(request.text)
+        prompt = await llm_service.generate_interior_prompt(request.text, use_cache=request.use_cache)
         return PromptResponse(prompt=prompt)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"프롬프트 생성 오류: {str(e)}")
 
@@ -24,5 +27,21 @@ async def generate_image(request: ImageGenerationRequest):
     try:
         result = await llm_service.generate_image_with_dalle(request.prompt)
         return ImageGenerationResponse(image_url=result["image_url"], prompt=result["prompt"])
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"이미지 생성 오류: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"이미지 생성 오류: {str(e)}")
+
+@router.get("/cache-stats")
+async def cache_stats():
+    """
+    프롬프트 캐시 적중률과 캐시/요청 병합으로 절약한 GPT 호출 수를 반환합니다.
+    """
+    return llm_service.cache_stats()
+
+@router.get("/upstream-stats")
+async def upstream_stats():
+    """
+    OpenAI 호출/재시도/실패 수와 서킷 브레이커 상태를 반환합니다.
+    """
+    return llm_service.upstream_stats()
\ No newline at end of file
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
 from fastapi.responses import JSONResponse
-from app.models.request_schemas import ImageStyleRequest, ObjectDetectionRequest
-from app.models.response_schemas import StyleAnalysisResponse, ObjectDetectionResponse, DetectedObject
-from app.services.vision_service import vision_service
+from app.models.request_schemas import ImageStyleRequest, ObjectDetectionRequest, BatchObjectDetectionRequest, SimilarImageRequest, AnalyzeRequest
+from app.models.response_schemas import StyleAnalysisResponse, ObjectDetectionResponse, DetectedObject, BatchObjectDetectionResponse, BatchDetectionItem, BatchUploadDetectionResponse, BatchUploadDetectionItem, SimilarImageResponse, SimilarImage, AnalyzeResponse
+from app.services.vision_service import vision_service, InferenceQueueFullError, ModelNotReadyError, EmbeddingIndexDisabledError, DETECT_BATCH_MAX_URLS
+from app.services.image_upload import read_image_upload, upload_openapi, UploadError, UploadForm
+from app.services.tiled_detection import resolve_tiling
 from typing import List
 
 router = APIRouter()
 
+# 업로드 엔드포인트에서 받는 객체 탐지 옵션 폼 필드
+DETECTION_FIELDS = ("score_threshold", "max_per_class", "tiling")
+
 @router.post("/extract-style", response_model=StyleAnalysisResponse)
 async def extract_style(request: ImageStyleRequest):
     """
@@ -18,6 +23,8 @@ async def extract_style(request: ImageStyleRequest):
             
         keywords = await vision_service.extract_style(request.image_url)
         return StyleAnalysisResponse(keywords=keywords)
+    except (InferenceQueueFullError, ModelNotReadyError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"스타일 추출 오류: {str(e)}")
 
@@ -27,8 +34,217 @@ async def detect_objects(request: ObjectDetectionRequest):
     이미지 URL에서 인테리어 객체를 탐지합니다.
     """
     try:
-        objects_data = await vision_service.detect_objects(request.image_url)
-        objects = [DetectedObject(label=obj["label"], confidence=obj["confidence"]) for obj in objects_data]
+        objects_data = await vision_service.detect_objects(
+            request.image_url,
+            score_threshold=request.score_threshold,
+            max_per_class=request.max_per_class,
+            tiling=request.tiling,
+        )
+        objects = [DetectedObject(**obj) for obj in objects_data]
+        return ObjectDetectionResponse(objects=objects)
+    except (InferenceQueueFullError, ModelNotReadyError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"객체 탐지 오류: {str(e)}")
+
+@router.post("/detect-objects/batch", response_model=BatchObjectDetectionResponse)
+async def detect_objects_batch(request: BatchObjectDetectionRequest):
+    """
+    여러 이미지 URL에서 인테리어 객체를 한 번에 탐지합니다.
+    실패한 URL은 해당 항목의 error 필드로 보고됩니다.
+    """
+    if len(request.image_urls) > DETECT_BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {DETECT_BATCH_MAX_URLS}개의 URL만 처리할 수 있습니다")
+
+    try:
+        results = await vision_service.detect_objects_batch(
+            request.image_urls,
+            score_threshold=request.score_threshold,
+            max_per_class=request.max_per_class,
+            tiling=request.tiling,
+        )
+        items = [
+            BatchDetectionItem(
+                image_url=result["image_url"],
+                objects=[DetectedObject(**obj) for obj in result["objects"]],
+                error=result["error"],
+            )
+            for result in results
+        ]
+        return BatchObjectDetectionResponse(results=items)
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"객체 탐지 오류: {str(e)}")
+
+async def read_upload(request: Request, max_files: int = 1) -> UploadForm:
+    """multipart 본문을 스트리밍으로 받음 (형식/크기 오류는 해당 상태 코드로 응답)"""
+    try:
+        return await read_image_upload(request, max_files=max_files)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+def detection_options(form: UploadForm) -> dict:
+    """업로드 폼의 score_threshold / max_per_class / tiling 필드 (ObjectDetectionRequest와 같은 범위 검사, 잘못되면 ValueError)"""
+    message = "score_threshold는 0~1, max_per_class는 1 이상의 정수여야 합니다"
+    options = {}
+    try:
+        if form.fields.get("score_threshold"):
+            options["score_threshold"] = float(form.fields["score_threshold"])
+        if form.fields.get("max_per_class"):
+            options["max_per_class"] = int(form.fields["max_per_class"])
+    except ValueError:
+        raise ValueError(message)
+    if not 0 <= options.get("score_threshold", 0) <= 1 or options.get("max_per_class", 1) < 1:
+        raise ValueError(message)
+    if form.fields.get("tiling"):
+        options["tiling"] = resolve_tiling(form.fields["tiling"])
+    return options
+
+@router.post("/extract-style/upload", response_model=StyleAnalysisResponse, openapi_extra=upload_openapi({"image": False}))
+async def extract_style_upload(request: Request):
+    """
+    업로드한 이미지 파일(multipart/form-data의 image 필드)에서 인테리어 스타일을 추출합니다.
+    URL로 받은 같은 이미지와 결과 캐시를 공유합니다.
+    """
+    form = await read_upload(request)
+    try:
+        keywords = await vision_service.style_from_fetched(form.files[0].to_fetched())
+        return StyleAnalysisResponse(keywords=keywords)
+    except (InferenceQueueFullError, ModelNotReadyError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"스타일 추출 오류: {str(e)}")
+    finally:
+        form.close()
+
+@router.post("/detect-objects/upload", response_model=ObjectDetectionResponse, openapi_extra=upload_openapi({"image": False}, DETECTION_FIELDS))
+async def detect_objects_upload(request: Request):
+    """
+    업로드한 이미지 파일(multipart/form-data의 image 필드)에서 인테리어 객체를 탐지합니다.
+    """
+    form = await read_upload(request)
+    try:
+        objects_data = await vision_service.objects_from_fetched(form.files[0].to_fetched(), **detection_options(form))
+        objects = [DetectedObject(**obj) for obj in objects_data]
         return ObjectDetectionResponse(objects=objects)
+    except (InferenceQueueFullError, ModelNotReadyError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"객체 탐지 오류: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"객체 탐지 오류: {str(e)}")
+    finally:
+        form.close()
+
+@router.post("/detect-objects/batch/upload", response_model=BatchUploadDetectionResponse, openapi_extra=upload_openapi({"images": True}, DETECTION_FIELDS))
+async def detect_objects_batch_upload(request: Request):
+    """
+    업로드한 여러 이미지 파일(multipart/form-data의 images 필드)에서 인테리어 객체를 한 번에 탐지합니다.
+    URL 배치와 같이 크기가 비슷한 이미지끼리 묶어 배치로 추론하며, 실패한 파일은 해당 항목의 error 필드로 보고됩니다.
+    """
+    form = await read_upload(request, max_files=DETECT_BATCH_MAX_URLS)
+    try:
+        results = await vision_service.detect_objects_fetched_batch(
+            [upload.to_fetched() for upload in form.files], **detection_options(form)
+        )
+        items = [
+            BatchUploadDetectionItem(
+                filename=upload.name,
+                objects=[DetectedObject(**obj) for obj in result["objects"]],
+                error=result["error"],
+            )
+            for upload, result in zip(form.files, results)
+        ]
+        return BatchUploadDetectionResponse(results=items)
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"객체 탐지 오류: {str(e)}")
+    finally:
+        form.close()
+
+@router.post("/similar", response_model=SimilarImageResponse)
+async def find_similar(request: SimilarImageRequest):
+    """
+    이미지 URL과 비슷한 인테리어를 이전에 분석한 이미지 중에서 찾습니다.
+    스타일 추출 때 저장한 SIGLIP 이미지 임베딩의 코사인 유사도 상위 k개를 반환합니다 (같은 이미지는 제외).
+    """
+    try:
+        matches = await vision_service.find_similar(request.image_url, request.k)
+        return SimilarImageResponse(results=[
+            SimilarImage(source=match["source"], styles=match.get("styles", []), score=match["score"]) for match in matches
+        ])
+    except (InferenceQueueFullError, ModelNotReadyError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except EmbeddingIndexDisabledError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"유사 이미지 검색 오류: {str(e)}")
+
+def analyze_response(result: dict) -> AnalyzeResponse:
+    """VisionService.analyze 결과를 응답 모델로 변환 (요청하지 않은 분석은 null)"""
+    objects = result.get("objects")
+    return AnalyzeResponse(**{
+        **result,
+        "objects": [DetectedObject(**obj) for obj in objects] if objects is not None else None,
+    })
+
+@router.post("/analyze", response_model=AnalyzeResponse)
+async def analyze(request: AnalyzeRequest):
+    """
+    이미지 URL 하나로 스타일 추출, 객체 탐지, 임베딩 중 fields에 지정한 분석만 한 번에 실행합니다.
+    이미지는 한 번만 받아 디코딩하고, 두 모델은 병렬로 실행하며 분석별 소요 시간을 함께 반환합니다.
+    """
+    try:
+        result = await vision_service.analyze(
+            request.image_url,
+            tuple(request.fields),
+            score_threshold=request.score_threshold,
+            max_per_class=request.max_per_class,
+            tiling=request.tiling,
+        )
+        return analyze_response(result)
+    except (InferenceQueueFullError, ModelNotReadyError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"이미지 분석 오류: {str(e)}")
+
+@router.post("/analyze/upload", response_model=AnalyzeResponse, openapi_extra=upload_openapi({"image": False}, ("fields", *DETECTION_FIELDS)))
+async def analyze_upload(request: Request):
+    """
+    업로드한 이미지 파일(multipart/form-data의 image 필드)로 /analyze와 같은 분석을 실행합니다.
+    fields 텍스트 필드는 쉼표로 구분합니다 (예: styles,objects).
+    """
+    form = await read_upload(request)
+    try:
+        fields = tuple(field.strip() for field in form.fields.get("fields", "styles,objects").split(",") if field.strip())
+        upload = form.files[0]
+        result = await vision_service.analyze_fetched(
+            upload.to_fetched(), fields, timings={"upload": round(upload.elapsed_ms, 2)}, **detection_options(form)
+        )
+        return analyze_response(result)
+    except (InferenceQueueFullError, ModelNotReadyError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"이미지 분석 오류: {str(e)}")
+    finally:
+        form.close()
+
+@router.get("/cache-stats")
+def cache_stats():
+    """
+    결과 캐시의 적중/미스/제거 통계를 반환합니다.
+    (SQLite 캐시 크기 조회가 이벤트 루프를 막지 않도록 동기 함수로 두어 스레드 풀에서 실행)
+    """
+    return vision_service.cache_stats()
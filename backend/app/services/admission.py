@@ -0,0 +1,311 @@
+import os
+import math
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# 요청 제한 설정 (환경 변수로 조정 가능)
+# RATE_LIMITS는 "경로 접두사=요청 수/초[:버스트]"를 쉼표로 나열하며, 가장 긴 접두사 규칙 하나만 적용된다.
+# 클라이언트 IP별 버킷은 항상 적용하고, RATE_LIMIT_KEY_HEADER 헤더가 API_KEYS에 등록된 키이면 키별 버킷도 함께 적용한다.
+# (등록되지 않은 키는 무시하므로 요청마다 임의의 키를 보내 새 버킷을 얻을 수 없다) 한도는 워커 프로세스별이다.
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMITS = os.getenv(
+    "RATE_LIMITS",
+    "/api/hancut=20/60:5,/api/llm/generate-image=10/60:3,/api/jobs/generate-image=20/60:5,"
+    "/api/llm=60/60:10,/api/vision=120/60:20",
+)
+RATE_LIMIT_KEY_HEADER = os.getenv("RATE_LIMIT_KEY_HEADER", "x-api-key").lower()
+# 키별 한도를 적용할 API 키 (쉼표 구분, 비어 있으면 IP로만 구분)
+API_KEYS = [key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip()]
+# 프록시 뒤에서만 켬 (켜면 X-Forwarded-For의 첫 번째 주소를 클라이언트 IP로 사용)
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+
+# 모델을 쓰는 엔드포인트(POST)의 동시 처리 상한
+# 자리가 없으면 우선순위별 대기열에서 기다리며, 자리가 나면 interactive 대기열부터 넘겨준다.
+# ADMISSION_BATCH_ROUTES 경로와 "X-Priority: batch" 헤더를 보낸 요청은 batch 우선순위다.
+# 자리는 응답이 끝날 때까지 잡고 있으므로, GPT/DALL-E 호출이나 SSE 스트림 동안 자리를 차지해
+# 비전 요청을 굶기는 /api/hancut은 기본값에서 뺀다 (한컷의 이미지 분석은 추론 대기열이 따로 제한).
+ADMISSION_MODEL_ROUTES = os.getenv("ADMISSION_MODEL_ROUTES", "/api/vision")
+ADMISSION_BATCH_ROUTES = os.getenv("ADMISSION_BATCH_ROUTES", "/api/vision/detect-objects/batch")
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "16"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10"))
+
+PRIORITIES = ("interactive", "batch")
+
+
+def _prefixes(spec: str) -> Tuple[str, ...]:
+    return tuple(prefix.strip() for prefix in spec.split(",") if prefix.strip())
+
+
+class AdmissionRejected(Exception):
+    """요청 한도나 동시 처리 대기열을 넘어 거절할 때 발생 (429 응답으로 변환)"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+@dataclass(frozen=True)
+class RateRule:
+    """경로 접두사별 토큰 버킷 규칙 (rate: 초당 토큰, burst: 버킷 크기)"""
+    prefix: str
+    rate: float
+    burst: float
+
+
+def parse_rate_limits(spec: str) -> List[RateRule]:
+    """"/api/hancut=20/60:5,..." -> 긴 접두사 순으로 정렬한 규칙 목록"""
+    rules = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        try:
+            prefix, limit = item.strip().split("=")
+            limit, _, burst = limit.partition(":")
+            count, period = limit.split("/")
+            count, period = float(count), float(period)
+            rules.append(RateRule(prefix.strip(), count / period, float(burst) if burst else count))
+        except ValueError:
+            raise ValueError(f"RATE_LIMITS 형식이 잘못되었습니다 (경로=요청 수/초[:버스트]): {item}")
+    return sorted(rules, key=lambda rule: len(rule.prefix), reverse=True)
+
+
+class RateLimiter:
+    """경로 규칙 x 클라이언트별 토큰 버킷
+
+    이벤트 루프 안에서만 호출되고 갱신 도중 await가 없으므로 잠금 없이 버킷을 읽고 쓴다.
+    버킷은 최근 사용 순으로 최대 max_clients개만 유지한다 (오래 쓰지 않은 버킷은 어차피 가득 찬 상태).
+    """
+
+    def __init__(self, rules: List[RateRule], max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rules = rules
+        self._max_clients = max_clients
+        # (규칙 접두사, 클라이언트) -> [남은 토큰, 마지막 갱신 시각]
+        self._buckets: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+
+    def rule_for(self, path: str) -> Optional[RateRule]:
+        return next((rule for rule in self.rules if path.startswith(rule.prefix)), None)
+
+    def _bucket(self, rule: RateRule, client: str, now: float) -> List[float]:
+        """토큰을 현재 시각까지 채운 버킷"""
+        key = (rule.prefix, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [rule.burst, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self._max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        bucket[0] = min(rule.burst, bucket[0] + (now - bucket[1]) * rule.rate)
+        bucket[1] = now
+        return bucket
+
+    def acquire(self, rule: RateRule, clients: Sequence[str], now: Optional[float] = None) -> float:
+        """모든 클라이언트 버킷에서 토큰 하나씩 쓰고 0을, 하나라도 토큰이 없으면 아무것도 쓰지 않고
+        다음 토큰까지 남은 가장 긴 시간(초)을 반환"""
+        now = time.monotonic() if now is None else now
+        buckets = [self._bucket(rule, client, now) for client in clients]
+        wait = max((1 - bucket[0]) / rule.rate for bucket in buckets)
+        if wait > 0:
+            return wait
+        for bucket in buckets:
+            bucket[0] -= 1
+        return 0.0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class PriorityGate:
+    """모델 엔드포인트 전체의 동시 처리 상한 (자리가 나면 높은 우선순위 대기열부터 넘겨줌)
+
+    세마포어처럼 동작하지만 release가 카운터를 줄이지 않고 대기 중인 요청에 자리를 바로 넘기므로,
+    새로 도착한 요청이 대기 중인 요청을 앞지르지 못한다. 이벤트 루프 안에서만 사용한다.
+    """
+
+    def __init__(
+        self,
+        limit: int = ADMISSION_MAX_CONCURRENCY,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_wait: float = ADMISSION_MAX_WAIT_SECONDS,
+    ):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {priority: deque() for priority in PRIORITIES}
+        # 자리 하나를 점유하는 평균 시간 (Retry-After 추정용 지수 이동 평균)
+        self._hold_seconds = 1.0
+
+    def queued(self, priority: str) -> int:
+        return len(self._queues[priority])
+
+    def retry_after(self) -> float:
+        """대기 중인 요청이 모두 처리될 때까지의 예상 시간"""
+        waiting = sum(len(queue) for queue in self._queues.values())
+        return self._hold_seconds * (waiting + 1) / max(1, self.limit)
+
+    async def acquire(self, priority: str):
+        if self.active < self.limit and not any(self._queues.values()):
+            self.active += 1
+            return
+
+        queue = self._queues[priority]
+        if len(queue) >= self.max_queue:
+            raise AdmissionRejected("모델 처리 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            if waiter in queue:
+                queue.remove(waiter)
+            raise AdmissionRejected("모델 처리 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요", self.retry_after())
+        except asyncio.CancelledError:
+            # 자리를 넘겨받은 직후 클라이언트가 끊었으면 자리를 다음 요청에 넘김
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            elif waiter in queue:
+                queue.remove(waiter)
+            raise
+
+    def release(self, held_seconds: Optional[float] = None):
+        if held_seconds is not None:
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * held_seconds
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    # active는 그대로 두고 자리만 넘김
+                    waiter.set_result(None)
+                    return
+        self.active -= 1
+
+
+# 서비스 인스턴스 생성
+rate_limiter = RateLimiter(parse_rate_limits(RATE_LIMITS))
+admission_gate = PriorityGate()
+
+ADMISSION_REJECTIONS = registry.counter(
+    "hancut_admission_rejections_total", "요청 한도나 모델 처리 대기열 때문에 429로 거절한 요청 수", ("rule", "reason"),
+)
+registry.gauge("hancut_admission_active", "모델 엔드포인트에서 처리 중인 요청 수", lambda: admission_gate.active)
+registry.gauge(
+    "hancut_admission_queued", "모델 엔드포인트 자리를 기다리는 요청 수",
+    lambda: {(priority,): admission_gate.queued(priority) for priority in PRIORITIES}, ("priority",),
+)
+registry.gauge("hancut_rate_limit_buckets", "메모리에 유지 중인 클라이언트별 토큰 버킷 수", lambda: len(rate_limiter))
+
+
+class AdmissionMiddleware:
+    """경로별 클라이언트 요청 한도와 모델 엔드포인트 동시 처리 상한을 적용하는 ASGI 미들웨어
+
+    한도를 넘거나 대기열이 가득 차면 라우트를 실행하지 않고 429와 Retry-After로 응답한다.
+    """
+
+    def __init__(
+        self,
+        app,
+        limiter: Optional[RateLimiter] = None,
+        gate: Optional[PriorityGate] = None,
+        enabled: bool = ADMISSION_ENABLED,
+        model_routes: Tuple[str, ...] = _prefixes(ADMISSION_MODEL_ROUTES),
+        batch_routes: Tuple[str, ...] = _prefixes(ADMISSION_BATCH_ROUTES),
+        api_keys: Sequence[str] = API_KEYS,
+    ):
+        self.app = app
+        self.limiter = limiter if limiter is not None else rate_limiter
+        self.gate = gate if gate is not None else admission_gate
+        self.enabled = enabled
+        self._model_routes = model_routes
+        self._batch_routes = batch_routes
+        # 원문 키 대신 해시로 비교하고 버킷 이름에도 해시만 남김
+        self._api_key_hashes = {self._hash_key(key) for key in api_keys}
+
+    @staticmethod
+    def _header(scope, name: bytes) -> Optional[str]:
+        for key, value in scope.get("headers", ()):
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    @staticmethod
+    def _hash_key(api_key: str) -> str:
+        return hashlib.blake2b(api_key.encode(), digest_size=12).hexdigest()
+
+    def _client_keys(self, scope) -> List[str]:
+        """요청에 적용할 버킷: 클라이언트 IP, 그리고 등록된 API 키면 키(해시)"""
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        if RATE_LIMIT_TRUST_FORWARDED:
+            forwarded = self._header(scope, b"x-forwarded-for")
+            if forwarded:
+                ip = forwarded.split(",")[0].strip()
+        keys = ["ip:" + ip]
+        api_key = self._header(scope, RATE_LIMIT_KEY_HEADER.encode())
+        if api_key:
+            key_hash = self._hash_key(api_key)
+            if key_hash in self._api_key_hashes:
+                keys.append("key:" + key_hash)
+        return keys
+
+    def _priority(self, scope) -> Optional[str]:
+        """모델 엔드포인트면 우선순위, 아니면 None"""
+        path = scope["path"]
+        if scope["method"] != "POST" or not path.startswith(self._model_routes):
+            return None
+        if path.startswith(self._batch_routes) or (self._header(scope, b"x-priority") or "").lower() == "batch":
+            return "batch"
+        return "interactive"
+
+    @staticmethod
+    async def _reject(scope, receive, send, error: AdmissionRejected):
+        response = JSONResponse({"detail": str(error)}, status_code=429, headers={"Retry-After": str(error.retry_after)})
+        await response(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        rule = self.limiter.rule_for(scope["path"])
+        if rule is not None:
+            wait = self.limiter.acquire(rule, self._client_keys(scope))
+            if wait > 0:
+                ADMISSION_REJECTIONS.inc(rule.prefix, "rate_limit")
+                await self._reject(scope, receive, send, AdmissionRejected("요청 한도를 초과했습니다. 잠시 후 다시 시도해주세요", wait))
+                return
+
+        priority = self._priority(scope)
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.gate.acquire(priority)
+        except AdmissionRejected as e:
+            ADMISSION_REJECTIONS.inc(f"model:{priority}", "concurrency")
+            logger.warning(f"모델 엔드포인트 요청 거절 ({priority}): {scope['path']}")
+            await self._reject(scope, receive, send, e)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.gate.release(time.perf_counter() - start)
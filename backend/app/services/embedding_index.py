@@ -0,0 +1,322 @@
+import os
+import json
+import time
+import fcntl
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 이미지 임베딩 색인 설정 (환경 변수로 조정 가능)
+# 색인은 모든 호출자가 공유하고 /similar 결과에 다른 사용자가 보낸 URL과 파일 이름이 포함되므로 명시적으로 켰을 때만 사용
+EMBEDDING_INDEX_ENABLED = os.getenv("EMBEDDING_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+EMBEDDING_INDEX_PATH = os.path.expanduser(os.getenv("EMBEDDING_INDEX_PATH", "~/.cache/hancut/embeddings"))
+# 행 수가 이 값 이상이 되면 IVF 색인을 학습해 근사 검색 (0이면 항상 전수 검색)
+EMBEDDING_IVF_MIN_ROWS = int(os.getenv("EMBEDDING_IVF_MIN_ROWS", "50000"))
+# IVF 검색 시 살펴볼 리스트 수 (클수록 재현율이 높고 느림)
+EMBEDDING_IVF_NPROBE = int(os.getenv("EMBEDDING_IVF_NPROBE", "16"))
+EMBEDDING_SEARCH_BLOCK_ROWS = 4096
+EMBEDDING_IVF_MAX_LISTS = 4096
+EMBEDDING_IVF_ITERATIONS = 8
+
+
+class EmbeddingIndex:
+    """L2 정규화된 이미지 임베딩의 float16 메모리 매핑 저장소와 코사인 유사도 검색
+
+    디렉토리 하나에 다음 파일을 추가 전용으로 쓴다.
+
+        vectors.f16   임베딩 (행 x 차원, float16, 헤더 없음)
+        rows.jsonl    행별 메타데이터 (내용 해시, 출처, 스타일)
+        assign.i32    IVF 리스트 번호 (IVF 학습 후에만)
+        centroids.npy IVF 중심점 (IVF 학습 후에만)
+
+    행 수가 적으면 블록 단위 행렬곱으로 전수 검색하고, EMBEDDING_IVF_MIN_ROWS 이상이면 k-means 중심점으로
+    공간을 나눈 IVF 색인을 한 번 학습해 가까운 nprobe개 리스트만 검색한다. 학습은 백그라운드 스레드에서 잠금 없이
+    진행되고(그동안은 전수 검색), 끝나면 중심점과 배정을 잠금 안에서 한 번에 교체한다. 학습 이후 추가되는 행은
+    가장 가까운 리스트에 바로 배정되므로 다시 학습하지 않는다.
+
+    쓰기는 파일 잠금 아래에서 벡터 -> 리스트 번호 -> 메타데이터 순서로 추가하고, 읽는 쪽은 메타데이터 행 수만큼만
+    보므로 uvicorn --workers N의 워커들이 같은 디렉토리를 공유할 수 있다 (다른 워커가 쓴 행은 다음 조회 때 반영).
+    """
+
+    def __init__(self, path: str, ivf_min_rows: int = EMBEDDING_IVF_MIN_ROWS, nprobe: int = EMBEDDING_IVF_NPROBE):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self._vectors_path = os.path.join(path, "vectors.f16")
+        self._rows_path = os.path.join(path, "rows.jsonl")
+        self._assign_path = os.path.join(path, "assign.i32")
+        self._centroids_path = os.path.join(path, "centroids.npy")
+        self._meta_path = os.path.join(path, "meta.json")
+
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self._rows: List[dict] = []
+        self._row_by_hash: Dict[str, int] = {}
+        self._rows_offset = 0
+        self._vectors = np.empty((0, 0), dtype=np.float16)
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.empty(0, dtype=np.int32)
+        # 리스트 번호로 정렬한 행 번호와 리스트별 시작 위치 (앞의 _sorted_rows개 행 기준, 나머지는 검색 시 직접 거름)
+        self._list_rows = np.empty(0, dtype=np.int64)
+        self._list_bounds = np.zeros(1, dtype=np.int64)
+        self._sorted_rows = 0
+        self._training = False
+
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                self.dim = json.load(f)["dim"]
+        with self._lock:
+            self._refresh()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @contextmanager
+    def _file_lock(self):
+        """여러 워커 프로세스의 동시 추가를 막는 파일 잠금"""
+        with open(os.path.join(self.path, "index.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """다른 워커가 추가한 행을 반영 (self._lock 안에서 호출, 변경이 없으면 stat 한 번)"""
+        try:
+            size = os.path.getsize(self._rows_path)
+        except OSError:
+            size = 0
+        if size > self._rows_offset:
+            with open(self._rows_path, "rb") as f:
+                f.seek(self._rows_offset)
+                data = f.read(size - self._rows_offset)
+            # 쓰는 중인 마지막 줄은 다음 조회에서 읽음
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                row = json.loads(line)
+                self._row_by_hash[row["hash"]] = len(self._rows)
+                self._rows.append(row)
+            self._rows_offset += end
+
+        if self.dim is None and self._rows:
+            # 다른 워커가 처음 만든 색인
+            with open(self._meta_path) as f:
+                self.dim = json.load(f)["dim"]
+        if self._centroids is None and os.path.exists(self._centroids_path):
+            self._centroids = np.load(self._centroids_path)
+
+        count = len(self._rows)
+        if count == len(self._vectors) and (self._centroids is None or count == len(self._assign)):
+            return
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float16, mode="r", shape=(count, self.dim))
+        if self._centroids is not None:
+            self._assign = np.memmap(self._assign_path, dtype=np.int32, mode="r", shape=(count,))
+            # 정렬되지 않은 꼬리가 커지면 리스트별 행 번호를 다시 정렬 (재학습이나 재배정은 하지 않음)
+            if count - self._sorted_rows > max(1024, self._sorted_rows // 8):
+                self._sort_lists()
+
+    def _sort_lists(self):
+        assign = np.asarray(self._assign)
+        self._list_rows = np.argsort(assign, kind="stable")
+        self._list_bounds = np.searchsorted(assign[self._list_rows], np.arange(len(self._centroids) + 1))
+        self._sorted_rows = len(assign)
+
+    @staticmethod
+    def _truncate(path: str, size: int):
+        """중간에 끊긴 쓰기로 남은 꼬리를 잘라 행 정렬을 맞춤"""
+        if os.path.exists(path) and os.path.getsize(path) != size:
+            os.truncate(path, size)
+
+    def add(self, content_hashes: List[str], vectors: np.ndarray, metadata: List[dict]) -> int:
+        """임베딩 추가 (이미 있는 내용 해시는 건너뜀), 추가한 행 수 반환"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(content_hashes), -1)
+        with self._lock, self._file_lock():
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with open(self._meta_path, "w") as f:
+                    json.dump({"dim": self.dim}, f)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"임베딩 차원이 다릅니다: {vectors.shape[1]} (색인: {self.dim})")
+            self._refresh()
+
+            keep, seen = [], set()
+            for index, content_hash in enumerate(content_hashes):
+                if content_hash not in self._row_by_hash and content_hash not in seen:
+                    seen.add(content_hash)
+                    keep.append(index)
+            if not keep:
+                return 0
+
+            count = len(self._rows)
+            self._truncate(self._vectors_path, count * self.dim * 2)
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors[keep].astype(np.float16).tobytes())
+            if self._centroids is not None:
+                self._truncate(self._assign_path, count * 4)
+                with open(self._assign_path, "ab") as f:
+                    f.write(self._nearest_lists(vectors[keep]).tobytes())
+            lines = [
+                json.dumps({"hash": content_hashes[index], **metadata[index]}, ensure_ascii=False) + "\n"
+                for index in keep
+            ]
+            self._truncate(self._rows_path, self._rows_offset)
+            with open(self._rows_path, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+            self._refresh()
+
+            if self._centroids is None and not self._training and 0 < self._ivf_min_rows <= len(self._rows):
+                # 요청 경로를 막지 않도록 학습은 백그라운드에서 (끝날 때까지는 전수 검색)
+                self._training = True
+                threading.Thread(target=self._train_in_background, name="embedding-ivf-train", daemon=True).start()
+            return len(keep)
+
+    def vector(self, content_hash: str) -> Optional[np.ndarray]:
+        """저장된 임베딩 (없으면 None)"""
+        with self._lock:
+            self._refresh()
+            row = self._row_by_hash.get(content_hash)
+            return None if row is None else np.asarray(self._vectors[row], dtype=np.float32)
+
+    def _nearest_lists(self, vectors: np.ndarray, centroids: Optional[np.ndarray] = None) -> np.ndarray:
+        """각 벡터에 가장 가까운 IVF 리스트 번호 (블록 단위로 계산)"""
+        centroids = self._centroids if centroids is None else centroids
+        lists = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), EMBEDDING_SEARCH_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + EMBEDDING_SEARCH_BLOCK_ROWS], dtype=np.float32)
+            lists[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return lists
+
+    def _train_in_background(self):
+        try:
+            self.train_ivf()
+        except Exception as e:
+            logger.error(f"임베딩 IVF 색인 학습 실패 (전수 검색 유지): {str(e)}")
+        finally:
+            with self._lock:
+                self._training = False
+
+    def train_ivf(self, num_lists: Optional[int] = None):
+        """IVF 중심점을 학습하고 모든 행을 리스트에 배정 (이후 추가되는 행은 자동 배정)
+
+        학습과 배정은 잠금 밖에서 그 시점의 행으로 하므로 그동안의 추가와 검색(전수)은 막지 않는다.
+        교체는 잠금 안에서 학습 중 추가된 행까지 배정한 뒤 배정 -> 중심점 파일 순서로 한 번에 하며,
+        다른 스레드나 워커가 먼저 교체했으면 결과를 버린다.
+        """
+        with self._lock:
+            self._refresh()
+            count, vectors, previous = len(self._rows), self._vectors, self._centroids
+            if count == 0:
+                return
+
+        start = time.perf_counter()
+        centroids = self._kmeans(vectors, num_lists)
+        assign = self._nearest_lists(vectors, centroids)
+
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self._centroids is not previous:
+                return
+            total = len(self._rows)
+            assign = np.concatenate([assign, self._nearest_lists(self._vectors[count:total], centroids)])
+            # 배정 -> 중심점 순서로 교체 (중심점 파일이 있으면 모든 행이 배정되어 있음)
+            tmp_path = f"{self._assign_path}.{os.getpid()}.tmp"
+            assign.tofile(tmp_path)
+            os.replace(tmp_path, self._assign_path)
+            tmp_path = f"{self._centroids_path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, centroids)
+            os.replace(tmp_path, self._centroids_path)
+
+            self._centroids = centroids
+            self._assign = np.memmap(self._assign_path, dtype=np.int32, mode="r", shape=(total,))
+            self._sort_lists()
+        logger.info(f"임베딩 IVF 색인 학습: {total}행, 리스트 {len(centroids)}개 ({time.perf_counter() - start:.1f}s)")
+
+    @staticmethod
+    def _kmeans(vectors: np.ndarray, num_lists: Optional[int] = None) -> np.ndarray:
+        """구면 k-means 중심점 (표본에서 학습)"""
+        count = len(vectors)
+        num_lists = min(num_lists or max(1, int(np.sqrt(count))), EMBEDDING_IVF_MAX_LISTS, count)
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(count, size=min(count, num_lists * 32), replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+
+        centroids = sample[rng.choice(len(sample), size=num_lists, replace=False)]
+        for _ in range(EMBEDDING_IVF_ITERATIONS):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(nearest, kind="stable")
+            lists, starts = np.unique(nearest[order], return_index=True)
+            sums = np.zeros_like(centroids)
+            sums[lists] = np.add.reduceat(sample[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # 빈 리스트는 이전 중심점 유지
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        return centroids.astype(np.float32)
+
+    def search(self, query: np.ndarray, k: int = 10, exclude_hash: Optional[str] = None, exact: bool = False) -> List[dict]:
+        """코사인 유사도 상위 k개 행 (score 내림차순, exact면 IVF 색인이 있어도 전수 검색)"""
+        with self._lock:
+            self._refresh()
+            rows, vectors, centroids = self._rows, self._vectors, self._centroids
+            assign, list_rows, list_bounds, sorted_rows = self._assign, self._list_rows, self._list_bounds, self._sorted_rows
+        count = len(vectors)
+        if count == 0:
+            return []
+
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        limit = k + 1 if exclude_hash is not None else k
+        if centroids is not None and not exact and self.nprobe < len(centroids):
+            probe = np.argpartition(centroids @ query, -self.nprobe)[-self.nprobe:]
+            candidates = [list_rows[list_bounds[index]:list_bounds[index + 1]] for index in probe]
+            # 마지막 정렬 이후 추가된 행
+            tail = np.arange(sorted_rows, count)
+            candidates.append(tail[np.isin(assign[sorted_rows:count], probe)])
+            candidates = np.sort(np.concatenate(candidates))
+            scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+            top = np.argsort(-scores)[:limit]
+            ids, scores = candidates[top], scores[top]
+        else:
+            ids, scores = self._brute_force(vectors, query, limit)
+
+        results = []
+        for row_id, score in zip(ids.tolist(), scores.tolist()):
+            row = rows[row_id]
+            if row["hash"] == exclude_hash:
+                continue
+            results.append({**row, "score": round(score, 4)})
+        return results[:k]
+
+    @staticmethod
+    def _brute_force(vectors: np.ndarray, query: np.ndarray, k: int):
+        """블록 단위 float32 행렬곱 전수 검색 (전체를 한 번에 float32로 올리지 않음)"""
+        best_ids = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, len(vectors), EMBEDDING_SEARCH_BLOCK_ROWS):
+            scores = np.asarray(vectors[start:start + EMBEDDING_SEARCH_BLOCK_ROWS], dtype=np.float32) @ query
+            if len(scores) > k:
+                top = np.argpartition(scores, -k)[-k:]
+            else:
+                top = np.arange(len(scores))
+            best_ids = np.concatenate([best_ids, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            if len(best_scores) > k:
+                keep = np.argpartition(best_scores, -k)[-k:]
+                best_ids, best_scores = best_ids[keep], best_scores[keep]
+        order = np.argsort(-best_scores)
+        return best_ids[order], best_scores[order]
+
+    def stats(self) -> dict:
+        return {
+            "rows": len(self._rows),
+            "dim": self.dim,
+            "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+            "ivf_training": self._training,
+            "nprobe": self.nprobe,
+            "bytes": len(self._rows) * (self.dim or 0) * 2,
+        }
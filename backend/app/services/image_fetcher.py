@@ -0,0 +1,189 @@
+import os
+import time
+import hashlib
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, BinaryIO, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import httpx
+from PIL import Image
+
+from app.services.image_preprocess import decode_image
+from app.services.metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+# 이미지 다운로드 설정 (환경 변수로 조정 가능)
+IMAGE_FETCH_CONNECT_TIMEOUT = float(os.getenv("IMAGE_FETCH_CONNECT_TIMEOUT", "3.0"))
+IMAGE_FETCH_READ_TIMEOUT = float(os.getenv("IMAGE_FETCH_READ_TIMEOUT", "10.0"))
+IMAGE_FETCH_MAX_BYTES = int(os.getenv("IMAGE_FETCH_MAX_BYTES", str(20 * 1024 * 1024)))
+IMAGE_FETCH_MAX_CONNECTIONS = int(os.getenv("IMAGE_FETCH_MAX_CONNECTIONS", "64"))
+IMAGE_FETCH_PER_HOST_LIMIT = int(os.getenv("IMAGE_FETCH_PER_HOST_LIMIT", "8"))
+IMAGE_FETCH_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class FetchedImage:
+    """다운로드 및 디코딩이 끝난 이미지와 요청별 통계
+
+    image는 원본이 아니라 두 모델이 쓰는 작업 해상도로 디코딩된 RGB 이미지다 (image_preprocess.decode_image).
+
+    조건부 요청에 서버가 304로 응답하면 image는 None이고 not_modified가 True다.
+    content_hash는 받은 원본 바이트의 해시로, 결과 캐시의 키로 사용된다.
+    업로드처럼 바이트만 받아 두고 아직 디코딩하지 않은 이미지는 image가 None이고,
+    decode는 결과 캐시에 없을 때 호출하는 디코딩 함수다.
+    decode_at은 같은 원본을 다른 크기로 다시 디코딩하는 함수다 (작업 해상도보다 큰 이미지가 필요한 타일 탐지용).
+    """
+    url: str
+    image: Optional[Image.Image]
+    num_bytes: int
+    elapsed_ms: float
+    content_hash: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+    decode: Optional[Callable[[], Awaitable[Image.Image]]] = None
+    decode_at: Optional[Callable[[Tuple[int, int]], Awaitable[Image.Image]]] = None
+
+
+def redecoder(source: Union[bytes, BinaryIO]) -> Callable[[Tuple[int, int]], Awaitable[Image.Image]]:
+    """받아 둔 원본을 주어진 크기로 다시 디코딩하는 함수 (FetchedImage.decode_at)"""
+    async def decode_at(size: Tuple[int, int]) -> Image.Image:
+        start = time.perf_counter()
+        image = await asyncio.to_thread(decode_image, source, size=size)
+        observe_stage("image_decode", time.perf_counter() - start)
+        return image
+    return decode_at
+
+
+class ImageFetcher:
+    """공유 커넥션 풀 기반 비동기 이미지 다운로더"""
+
+    def __init__(
+        self,
+        connect_timeout: float = IMAGE_FETCH_CONNECT_TIMEOUT,
+        read_timeout: float = IMAGE_FETCH_READ_TIMEOUT,
+        max_bytes: int = IMAGE_FETCH_MAX_BYTES,
+        max_connections: int = IMAGE_FETCH_MAX_CONNECTIONS,
+        per_host_limit: int = IMAGE_FETCH_PER_HOST_LIMIT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self._max_bytes = max_bytes
+        self._per_host_limit = per_host_limit
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        # 네트워크 대신 로컬 픽스처를 돌려주는 전송 계층 (벤치마크용, None이면 실제 네트워크)
+        self.transport = transport
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """프로세스 전체에서 공유하는 AsyncClient (첫 요청 시 생성)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self._timeout,
+                limits=self._limits,
+                follow_redirects=True,
+                transport=self.transport,
+            )
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """호스트별 동시 다운로드 수 제한"""
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._per_host_limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def fetch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> FetchedImage:
+        """URL에서 이미지를 스트리밍으로 받아 작업 해상도의 PIL 이미지로 디코딩
+
+        etag/last_modified를 주면 조건부 요청을 보내고, 변경이 없으면 다운로드 없이 반환한다.
+        """
+        start = time.perf_counter()
+        digest = hashlib.blake2b(digest_size=20)
+        num_bytes = 0
+        # 압축된 바이트만 모으고 디코딩은 다 받은 뒤 한 번에 수행
+        # (draft 디코딩은 헤더로 축소 배율을 정해야 하며, 압축 바이트는 원본 픽셀 버퍼보다 훨씬 작음)
+        chunks = []
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        try:
+            async with self._host_semaphore(url):
+                async with self._get_client().stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304:
+                        elapsed_ms = (time.perf_counter() - start) * 1000
+                        logger.info(f"이미지 변경 없음 (304): {url} ({elapsed_ms:.1f}ms)")
+                        return FetchedImage(
+                            url=url,
+                            image=None,
+                            num_bytes=0,
+                            elapsed_ms=elapsed_ms,
+                            etag=etag,
+                            last_modified=last_modified,
+                            not_modified=True,
+                        )
+                    response.raise_for_status()
+                    response_etag = response.headers.get("etag")
+                    response_last_modified = response.headers.get("last-modified")
+
+                    content_length = response.headers.get("content-length")
+                    if content_length and int(content_length) > self._max_bytes:
+                        raise ValueError(f"이미지 크기가 제한을 초과합니다: {content_length} 바이트")
+
+                    async for chunk in response.aiter_bytes(IMAGE_FETCH_CHUNK_SIZE):
+                        num_bytes += len(chunk)
+                        if num_bytes > self._max_bytes:
+                            raise ValueError(f"이미지 크기가 제한을 초과합니다: {self._max_bytes} 바이트 이상")
+                        digest.update(chunk)
+                        chunks.append(chunk)
+        except httpx.HTTPError as http_err:
+            logger.error(f"이미지 다운로드 중 요청 오류: {str(http_err)}")
+            raise ValueError(f"이미지 URL에 접근할 수 없습니다: {str(http_err)}")
+
+        if num_bytes < 10:
+            logger.error(f"이미지 데이터가 너무 작음: {num_bytes} 바이트")
+            raise ValueError("이미지 데이터가 유효하지 않습니다")
+
+        download_seconds = time.perf_counter() - start
+        decode_start = time.perf_counter()
+        # 디코딩은 CPU 작업이므로 이벤트 루프 밖에서 실행
+        data = b"".join(chunks)
+        image = await asyncio.to_thread(decode_image, data)
+        observe_stage("image_fetch", download_seconds)
+        observe_stage("image_decode", time.perf_counter() - decode_start)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.debug(f"이미지 로드 성공: {url} ({num_bytes} 바이트, {elapsed_ms:.1f}ms, {image.size})")
+        return FetchedImage(
+            url=url,
+            image=image,
+            num_bytes=num_bytes,
+            elapsed_ms=elapsed_ms,
+            content_hash=digest.hexdigest(),
+            etag=response_etag,
+            last_modified=response_last_modified,
+            decode_at=redecoder(data),
+        )
+
+    async def aclose(self):
+        """커넥션 풀 종료"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# 서비스 인스턴스 생성
+image_fetcher = ImageFetcher()
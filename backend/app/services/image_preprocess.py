@@ -0,0 +1,112 @@
+import io
+import os
+import logging
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 디코딩 설정 (환경 변수로 조정 가능)
+# 두 모델이 실제로 쓰는 해상도는 Faster R-CNN 입력(짧은 변 800, 긴 변 최대 1333)이 가장 크므로
+# 원본이 그보다 크면 JPEG draft 모드로 1/2, 1/4, 1/8 해상도에서 바로 디코딩한 뒤 그 크기로 줄인다.
+IMAGE_DRAFT_DECODE = os.getenv("IMAGE_DRAFT_DECODE", "true").lower() in ("1", "true", "yes")
+IMAGE_WORKING_MIN_SIDE = int(os.getenv("IMAGE_WORKING_MIN_SIDE", "800"))
+IMAGE_WORKING_MAX_SIDE = int(os.getenv("IMAGE_WORKING_MAX_SIDE", "1333"))
+# 헤더 기준 픽셀 수 상한 (디코딩 전에 거절해 압축 폭탄 이미지로 메모리가 터지는 것을 막음)
+IMAGE_MAX_INPUT_PIXELS = int(os.getenv("IMAGE_MAX_INPUT_PIXELS", str(64_000_000)))
+
+
+def working_size(size: Tuple[int, int]) -> Tuple[int, int]:
+    """모델 입력에 필요한 최대 크기 (Faster R-CNN 리사이즈 규칙과 같으며 확대하지 않음)"""
+    width, height = size
+    scale = min(1.0, IMAGE_WORKING_MIN_SIDE / min(width, height), IMAGE_WORKING_MAX_SIDE / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def decode_image(
+    data: Union[bytes, BinaryIO], draft: bool = IMAGE_DRAFT_DECODE, size: Optional[Tuple[int, int]] = None
+) -> Image.Image:
+    """이미지 바이트(또는 업로드를 받아 둔 파일 객체)를 작업 해상도의 RGB 이미지로 디코딩
+
+    draft가 켜져 있으면 원본 해상도로 디코딩하지 않고 working_size 이상인 가장 작은 해상도로 디코딩한 뒤
+    (JPEG는 디코더가 DCT 단계에서 축소하고 YCbCr -> RGB 변환까지 수행) 남은 배율만 리사이즈한다.
+    결과 이미지 하나를 스타일 추출과 객체 탐지가 같이 사용한다.
+    size를 주면 작업 해상도 대신 그 크기로 디코딩한다 (타일 탐지용, 원본보다 크게 만들지는 않음).
+    원본 크기는 image.info["original_size"]에 남긴다.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        data = io.BytesIO(data)
+    data.seek(0)
+    try:
+        image = Image.open(data)
+    except (OSError, SyntaxError) as img_err:
+        data.seek(0)
+        hex_header = ' '.join([f'{b:02x}' for b in data.read(20)])
+        logger.error(f"이미지 형식 인식 불가: {str(img_err)}")
+        logger.error(f"이미지 헤더 (hex): {hex_header}")
+        raise ValueError(f"이미지 형식을 인식할 수 없습니다: {str(img_err)}")
+    except Image.DecompressionBombError as bomb_err:
+        # 헤더의 해상도가 PIL 한도의 두 배를 넘으면 열 때 바로 거부됨 (다른 해상도 초과와 같이 400)
+        raise ValueError(f"이미지 해상도가 제한을 초과합니다: {str(bomb_err)}")
+
+    width, height = image.size
+    if width * height > IMAGE_MAX_INPUT_PIXELS:
+        raise ValueError(f"이미지 해상도가 제한을 초과합니다: {width}x{height} ({IMAGE_MAX_INPUT_PIXELS} 픽셀 초과)")
+
+    if size is not None:
+        target = (min(size[0], width), min(size[1], height))
+    else:
+        target = working_size(image.size) if draft else image.size
+    try:
+        if target != image.size:
+            # JPEG가 아니면 draft는 아무것도 하지 않음
+            image.draft("RGB", target)
+        image.load()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as img_err:
+        logger.error(f"이미지 디코딩 실패: {str(img_err)}")
+        raise ValueError(f"이미지를 디코딩할 수 없습니다: {str(img_err)}")
+
+    # 팔레트/알파/CMYK 등은 리사이즈 전에 RGB로 변환 (흑백은 줄인 뒤 변환하는 편이 저렴)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    if image.size != target:
+        # draft로 줄이지 못한 형식(PNG 등)은 reduce로 정수배 축소 후 남은 배율만 보간
+        image = image.resize(target, Image.BILINEAR, reducing_gap=3.0)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.info["original_size"] = (width, height)
+    return image
+
+
+def siglip_pixel_values(images: List[Image.Image], processor):
+    """SIGLIP 이미지 프로세서와 같은 결과를 PIL 리사이즈 + 텐서 연산 한 번으로 계산
+
+    이미지 프로세서는 이미지마다 numpy 배열 -> PIL -> numpy 변환을 거치며 float64 중간 배열을 만든다.
+    여기서는 PIL 이미지를 곧바로 목표 크기로 리사이즈해 uint8 배치 버퍼 하나에 모은 뒤 정규화한다.
+    프로세서 설정이 리사이즈 + 스케일 + 정규화가 아니면 프로세서를 그대로 사용한다.
+    """
+    if not all(getattr(processor, name, False) for name in ("do_resize", "do_rescale", "do_normalize")):
+        return processor(images=images, return_tensors="pt")["pixel_values"]
+    return normalize_siglip_pixels(siglip_resize(images, processor), processor)
+
+
+def siglip_resize(images: List[Image.Image], processor):
+    """SIGLIP 입력 크기로 리사이즈한 uint8 배치 (N, H, W, 3) (학습 데이터 캐시도 이 형태로 저장)"""
+    import numpy as np
+
+    width, height = processor.size["width"], processor.size["height"]
+    batch = np.empty((len(images), height, width, 3), dtype=np.uint8)
+    for index, image in enumerate(images):
+        batch[index] = np.asarray(image.resize((width, height), processor.resample))
+    return batch
+
+
+def normalize_siglip_pixels(batch, processor):
+    """siglip_resize의 uint8 배치를 모델 입력 텐서 (N, 3, H, W) float32로 변환"""
+    import torch
+
+    mean = torch.tensor(processor.image_mean, dtype=torch.float32).view(1, 3, 1, 1)
+    std = torch.tensor(processor.image_std, dtype=torch.float32).view(1, 3, 1, 1)
+    pixel_values = torch.as_tensor(batch).permute(0, 3, 1, 2).to(torch.float32, memory_format=torch.contiguous_format)
+    return pixel_values.mul_(processor.rescale_factor).sub_(mean).div_(std)
@@ -0,0 +1,239 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from tempfile import SpooledTemporaryFile
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from PIL import Image
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from app.services.image_fetcher import FetchedImage, redecoder
+from app.services.image_preprocess import decode_image
+from app.services.metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+# 이미지 업로드 설정 (환경 변수로 조정 가능)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_MAX_FIELD_BYTES = int(os.getenv("UPLOAD_MAX_FIELD_BYTES", str(64 * 1024)))
+UPLOAD_MAX_FIELDS = 32
+# 이 크기를 넘는 파일은 메모리 대신 임시 파일에 받음 (0이면 항상 메모리)
+UPLOAD_SPOOL_MAX_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_MEMORY_BYTES", str(1024 * 1024)))
+
+
+class UploadError(Exception):
+    """업로드 요청 형식이나 크기가 잘못되었을 때 발생 (status_code 응답으로 변환)"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class UploadedImage:
+    """multipart 요청에서 받은 이미지 파일 한 개 (디코딩은 결과 캐시에 없을 때만 수행)"""
+    field_name: str
+    filename: Optional[str]
+    file: SpooledTemporaryFile
+    num_bytes: int = 0
+    content_hash: Optional[str] = None
+    elapsed_ms: float = 0.0
+    _decoding: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    @property
+    def name(self) -> str:
+        return self.filename or self.field_name
+
+    async def decode(self) -> Image.Image:
+        """작업 해상도로 디코딩 (스타일 추출과 객체 탐지가 동시에 요청해도 한 번만 수행)"""
+        if self._decoding is None:
+            self._decoding = asyncio.ensure_future(self._decode())
+        return await asyncio.shield(self._decoding)
+
+    async def _decode(self) -> Image.Image:
+        start = time.perf_counter()
+        image = await asyncio.to_thread(decode_image, self.file)
+        observe_stage("image_decode", time.perf_counter() - start)
+        return image
+
+    def to_fetched(self) -> FetchedImage:
+        """URL로 받은 이미지와 같은 경로(결과 캐시, 배치 추론)로 처리하기 위한 FetchedImage"""
+        return FetchedImage(
+            url=f"upload://{self.name}",
+            image=None,
+            num_bytes=self.num_bytes,
+            elapsed_ms=self.elapsed_ms,
+            content_hash=self.content_hash,
+            decode=self.decode,
+            decode_at=redecoder(self.file),
+        )
+
+
+@dataclass
+class UploadForm:
+    """업로드된 이미지 파일과 텍스트 필드"""
+    files: List[UploadedImage] = field(default_factory=list)
+    fields: Dict[str, str] = field(default_factory=dict)
+
+    def file(self, name: str) -> Optional[UploadedImage]:
+        """필드 이름이 name인 첫 번째 파일"""
+        return next((upload for upload in self.files if upload.field_name == name), None)
+
+    def close(self):
+        for upload in self.files:
+            upload.file.close()
+
+
+class _MultipartReader:
+    """multipart/form-data 본문을 청크 단위로 받아 파일은 해시를 계산하며 (임시) 파일에 쓰는 파서
+
+    Starlette의 request.form()과 달리 파일 크기와 개수 제한을 받는 도중에 검사해, 제한을 넘으면
+    본문을 끝까지 받지 않고 바로 거절한다.
+    """
+
+    def __init__(self, boundary: bytes, max_files: int):
+        self.form = UploadForm()
+        self._max_files = max_files
+        self._start = time.perf_counter()
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._upload: Optional[UploadedImage] = None
+        self._digest = None
+        self._field_name: Optional[str] = None
+        self._field_value = bytearray()
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def write(self, chunk: bytes):
+        self._parser.write(chunk)
+
+    def finalize(self):
+        self._parser.finalize()
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        if not name:
+            raise UploadError("multipart 파트에 name이 없습니다")
+
+        if b"filename" not in options:
+            if len(self.form.fields) >= UPLOAD_MAX_FIELDS:
+                raise UploadError(f"폼 필드가 너무 많습니다: 최대 {UPLOAD_MAX_FIELDS}개", status_code=413)
+            self._upload = None
+            self._field_name = name
+            self._field_value = bytearray()
+            return
+
+        if len(self.form.files) >= self._max_files:
+            raise UploadError(f"한 번에 최대 {self._max_files}개의 파일만 업로드할 수 있습니다", status_code=413)
+        filename = options[b"filename"].decode("utf-8", errors="replace") or None
+        self._upload = UploadedImage(
+            field_name=name,
+            filename=filename,
+            file=SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_MEMORY_BYTES),
+        )
+        # URL로 받은 이미지와 같은 해시를 써서 결과 캐시를 공유
+        self._digest = hashlib.blake2b(digest_size=20)
+        self.form.files.append(self._upload)
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._upload is None:
+            if len(self._field_value) + end - start > UPLOAD_MAX_FIELD_BYTES:
+                raise UploadError(f"폼 필드가 너무 큽니다: {self._field_name}", status_code=413)
+            self._field_value += data[start:end]
+            return
+
+        self._upload.num_bytes += end - start
+        if self._upload.num_bytes > UPLOAD_MAX_BYTES:
+            raise UploadError(f"이미지 크기가 제한을 초과합니다: {UPLOAD_MAX_BYTES} 바이트 이상", status_code=413)
+        chunk = data[start:end]
+        self._digest.update(chunk)
+        self._upload.file.write(chunk)
+
+    def _on_part_end(self):
+        if self._upload is None:
+            self.form.fields[self._field_name] = self._field_value.decode("utf-8", errors="replace")
+            return
+        if self._upload.num_bytes < 10:
+            raise UploadError(f"이미지 데이터가 유효하지 않습니다: {self._upload.name}")
+        self._upload.content_hash = self._digest.hexdigest()
+        self._upload.elapsed_ms = (time.perf_counter() - self._start) * 1000
+        self._upload = None
+
+
+async def read_image_upload(request: Request, max_files: int = 1) -> UploadForm:
+    """multipart/form-data 요청 본문을 스트리밍으로 받아 이미지 파일과 텍스트 필드로 분리
+
+    파일은 받는 즉시 해시를 계산하며 메모리(UPLOAD_SPOOL_MAX_MEMORY_BYTES 초과 시 임시 파일)에 쓰고,
+    본문 전체를 한 번에 메모리에 올리지 않는다. 호출자는 처리가 끝나면 form.close()를 호출해야 한다.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadError("multipart/form-data 요청이어야 합니다", status_code=415)
+
+    start = time.perf_counter()
+    reader = _MultipartReader(options[b"boundary"], max_files)
+    try:
+        async for chunk in request.stream():
+            reader.write(chunk)
+        reader.finalize()
+    except MultipartParseError as e:
+        reader.form.close()
+        raise UploadError(f"multipart 본문을 해석할 수 없습니다: {str(e)}")
+    except BaseException:
+        reader.form.close()
+        raise
+    observe_stage("image_upload", time.perf_counter() - start)
+
+    if not reader.form.files or any(upload.content_hash is None for upload in reader.form.files):
+        reader.form.close()
+        raise UploadError("업로드된 이미지 파일이 없거나 본문이 중간에 끊겼습니다")
+    return reader.form
+
+
+def upload_openapi(files: Dict[str, bool], fields: Tuple[str, ...] = ()) -> dict:
+    """read_image_upload로 본문을 직접 읽는 엔드포인트의 OpenAPI 요청 본문 ({파일 필드: 여러 개 허용 여부})"""
+    properties = {}
+    for name, multiple in files.items():
+        binary = {"type": "string", "format": "binary"}
+        properties[name] = {"type": "array", "items": binary} if multiple else binary
+    for name in fields:
+        properties[name] = {"type": "string"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"multipart/form-data": {"schema": {"type": "object", "properties": properties}}},
+        }
+    }
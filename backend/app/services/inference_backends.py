@@ -0,0 +1,128 @@
+import os
+import time
+import hashlib
+import logging
+from typing import Callable, List, Tuple
+
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+# 추론 백엔드 설정
+# eager: 기존 fp32 즉시 실행
+# int8: SIGLIP Linear 층 동적 int8 양자화 (Faster R-CNN은 eager)
+# torchscript: 트레이싱/스크립팅한 그래프를 디스크에 캐시해 재사용
+# compile: torch.compile (SIGLIP 전체, Faster R-CNN 백본)
+VISION_INFERENCE_BACKEND = os.getenv("VISION_INFERENCE_BACKEND", "eager").lower()
+INFERENCE_ARTIFACT_DIR = os.path.expanduser(os.getenv("INFERENCE_ARTIFACT_DIR", "~/.cache/hancut/artifacts"))
+INFERENCE_BACKENDS = ("eager", "int8", "torchscript", "compile")
+
+SIGLIP_EXAMPLE_SHAPE = (1, 3, 224, 224)
+
+
+class SiglipOutputs(nn.Module):
+    """pixel_values -> (logits, 이미지 임베딩) 텐서만 반환하는 래퍼 (트레이싱/양자화/컴파일 공통 입력)
+
+    임베딩은 분류 헤드 입력과 같은 패치 토큰 평균을 L2 정규화한 값으로, 유사 인테리어 검색에 쓴다.
+    """
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        # SiglipForImageClassification.forward와 같은 계산 (패치 토큰 평균 -> 분류 헤드)
+        pooled = self.model.vision_model(pixel_values=pixel_values).last_hidden_state.mean(dim=1)
+        return self.model.classifier(pooled), nn.functional.normalize(pooled, dim=-1)
+
+
+class RcnnRunner:
+    """백엔드와 관계없이 이미지 목록 -> 탐지 결과 목록을 반환하는 호출 래퍼"""
+
+    def __init__(self, module, scripted: bool = False):
+        self._module = module
+        self._scripted = scripted
+
+    def __call__(self, images: List[torch.Tensor]) -> List[dict]:
+        output = self._module(images)
+        # 스크립팅된 탐지 모델은 (losses, detections) 튜플을 반환
+        if self._scripted:
+            return output[1]
+        return output
+
+
+def validate_backend(backend: str) -> str:
+    backend = backend.lower()
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"지원하지 않는 추론 백엔드입니다: {backend} (가능한 값: {', '.join(INFERENCE_BACKENDS)})")
+    return backend
+
+
+def _artifact_path(name: str, identity: str, model: nn.Module) -> str:
+    """모델 식별자, 구조(파라미터 이름/모양), torch 버전이 모두 같을 때만 재사용되는 아티팩트 경로"""
+    structure = ";".join(f"{key}:{tuple(value.shape)}" for key, value in model.state_dict().items())
+    key = hashlib.sha1(f"{identity}:{structure}:{torch.__version__}".encode()).hexdigest()[:16]
+    os.makedirs(INFERENCE_ARTIFACT_DIR, exist_ok=True)
+    return os.path.join(INFERENCE_ARTIFACT_DIR, f"{name}-{key}.pt")
+
+
+def _save_atomic(module, path: str):
+    """여러 워커가 동시에 저장해도 깨진 파일이 남지 않도록 임시 파일 후 교체"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.jit.save(module, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def prepare_siglip(model: nn.Module, backend: str, identity: str) -> Callable[[torch.Tensor], Tuple[torch.Tensor, torch.Tensor]]:
+    """백엔드에 맞게 SIGLIP 추론 함수(pixel_values -> (logits, 임베딩)) 준비"""
+    start = time.perf_counter()
+    wrapper = SiglipOutputs(model).eval()
+
+    if backend == "eager":
+        forward = wrapper
+    elif backend == "int8":
+        forward = torch.ao.quantization.quantize_dynamic(wrapper, {nn.Linear}, dtype=torch.qint8)
+    elif backend == "torchscript":
+        path = _artifact_path("siglip-emb-ts", identity, model)
+        if os.path.exists(path):
+            forward = torch.jit.load(path, map_location="cpu")
+        else:
+            with torch.no_grad():
+                traced = torch.jit.trace(wrapper, torch.zeros(SIGLIP_EXAMPLE_SHAPE), strict=False)
+            forward = torch.jit.freeze(traced)
+            _save_atomic(forward, path)
+        forward.eval()
+    elif backend == "compile":
+        forward = torch.compile(wrapper, dynamic=True)
+    else:
+        raise ValueError(f"지원하지 않는 추론 백엔드입니다: {backend}")
+
+    logger.info(f"[startup] SIGLIP {backend} 백엔드 준비: {time.perf_counter() - start:.2f}s")
+    return forward
+
+
+def prepare_rcnn(model: nn.Module, backend: str, identity: str) -> RcnnRunner:
+    """백엔드에 맞게 Faster R-CNN 추론 함수(이미지 목록 -> 탐지 결과) 준비"""
+    start = time.perf_counter()
+
+    if backend in ("eager", "int8"):
+        runner = RcnnRunner(model)
+    elif backend == "torchscript":
+        path = _artifact_path("rcnn-ts", identity, model)
+        if os.path.exists(path):
+            scripted = torch.jit.load(path, map_location="cpu")
+        else:
+            scripted = torch.jit.script(model)
+            _save_atomic(scripted, path)
+        scripted.eval()
+        runner = RcnnRunner(scripted, scripted=True)
+    elif backend == "compile":
+        # 탐지 후처리는 그래프가 자주 끊기므로 백본만 컴파일
+        model.backbone = torch.compile(model.backbone, dynamic=True)
+        runner = RcnnRunner(model)
+    else:
+        raise ValueError(f"지원하지 않는 추론 백엔드입니다: {backend}")
+
+    logger.info(f"[startup] Faster R-CNN {backend} 백엔드 준비: {time.perf_counter() - start:.2f}s")
+    return runner
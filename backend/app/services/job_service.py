@@ -0,0 +1,668 @@
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import sqlite3
+import asyncio
+import logging
+import ipaddress
+import threading
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Type
+from urllib.parse import urlsplit
+
+import httpx
+import openai
+
+from app.services.llm_service import llm_service
+from app.services.openai_client import RETRYABLE_OPENAI_ERRORS, CircuitOpenError, is_retryable
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# 비동기 작업 설정 (store: memory 또는 sqlite)
+JOB_OPENAI_CONCURRENCY = int(os.getenv("JOB_OPENAI_CONCURRENCY", "2"))
+JOB_REQUESTS_PER_MINUTE = int(os.getenv("JOB_REQUESTS_PER_MINUTE", "5"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "100"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "2"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "60"))
+JOB_RESULT_TTL_SECONDS = float(os.getenv("JOB_RESULT_TTL_SECONDS", "86400"))
+JOB_WEBHOOK_TIMEOUT = float(os.getenv("JOB_WEBHOOK_TIMEOUT", "5"))
+JOB_WEBHOOK_ATTEMPTS = int(os.getenv("JOB_WEBHOOK_ATTEMPTS", "3"))
+# 웹훅을 보낼 수 있는 호스트 (쉼표 구분, ".example.com"은 하위 도메인 포함)
+# 비어 있으면 모든 공인 주소를 허용하고, 사설/루프백/링크 로컬 등 내부 주소는 설정과 관계없이 항상 거부
+JOB_WEBHOOK_ALLOWED_HOSTS = [
+    host.strip().lower() for host in os.getenv("JOB_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+]
+# 실행 중인 작업의 임대 시간 (워커가 LEASE/3마다 갱신하며, 갱신이 끊긴 작업만 다른 워커가 다시 가져감)
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_STORE = os.getenv("JOB_STORE", "memory").lower()
+JOB_SQLITE_PATH = os.path.expanduser(os.getenv("JOB_SQLITE_PATH", "~/.cache/hancut/jobs.sqlite3"))
+
+# 재시도할 오류 (OpenAI 일시적 오류와 서킷 브레이커 차단)
+# 타임아웃은 서버에서 이미 생성되어 과금됐을 수 있으므로 이미지 생성 작업에서는 재시도하지 않음
+RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (
+    *(error for error in RETRYABLE_OPENAI_ERRORS if error is not openai.error.Timeout),
+    CircuitOpenError,
+)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_FINISHED = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class WebhookURLError(ValueError):
+    """허용되지 않는 webhook_url (400 응답으로 변환)"""
+
+
+def _host_allowed(host: str) -> bool:
+    if not JOB_WEBHOOK_ALLOWED_HOSTS:
+        return True
+    return any(
+        host == allowed or (allowed.startswith(".") and host.endswith(allowed))
+        for allowed in JOB_WEBHOOK_ALLOWED_HOSTS
+    )
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def validate_webhook_url(url: str):
+    """서버가 내부망 요청을 대신 보내는 통로가 되지 않도록 webhook_url 검사
+
+    http/https URL이어야 하고, 허용 목록(JOB_WEBHOOK_ALLOWED_HOSTS)이 있으면 그 안의 호스트여야 하며,
+    호스트가 가리키는 모든 주소가 공인 주소여야 한다. DNS가 바뀌는 경우를 막기 위해 전송 직전에도 다시 검사한다.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise WebhookURLError("webhook_url은 http 또는 https URL이어야 합니다")
+    host = parts.hostname.lower()
+    if not _host_allowed(host):
+        raise WebhookURLError(f"허용되지 않은 webhook_url 호스트입니다: {host}")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, ValueError) as e:
+        raise WebhookURLError(f"webhook_url 호스트를 확인할 수 없습니다: {host}") from e
+    if not infos or not all(_is_public_address(info[4][0]) for info in infos):
+        raise WebhookURLError(f"내부 주소로는 웹훅을 보낼 수 없습니다: {host}")
+
+
+class JobQueueFullError(Exception):
+    """작업 대기열이 가득 찼을 때 발생 (503 응답으로 변환)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"작업 대기열이 가득 찼습니다. {retry_after}초 후 다시 시도해주세요")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    """비동기 작업 한 건의 상태와 결과"""
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str = JOB_QUEUED
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    webhook_url: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    # 실행 중인 워커 식별자와 마지막 임대 갱신 시각
+    owner: Optional[str] = None
+    leased_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def public_dict(self) -> dict:
+        """외부(웹훅)로 보내는 필드 (워커 식별자와 임대 정보 제외)"""
+        values = self.to_dict()
+        values.pop("owner")
+        values.pop("leased_at")
+        return values
+
+
+class JobStore:
+    """작업 저장소 인터페이스"""
+
+    def create(self, job: Job):
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    def update(self, job: Job):
+        raise NotImplementedError
+
+    def claim(self, job_id: str, owner: str) -> Optional[Job]:
+        """queued 작업을 원자적으로 running으로 바꾸고 owner에게 임대 (다른 워커가 먼저 가져갔으면 None)"""
+        raise NotImplementedError
+
+    def renew(self, job_id: str, owner: str, leased_at: float) -> bool:
+        """owner가 실행 중인 작업의 임대 갱신 (임대를 잃었으면 False)"""
+        raise NotImplementedError
+
+    def release_expired(self, job_id: str, lease_seconds: float) -> bool:
+        """임대가 만료된 running 작업을 다시 queued로 (살아 있는 워커가 갱신 중이면 False)"""
+        raise NotImplementedError
+
+    def list_unfinished(self) -> List[Job]:
+        """이전 프로세스가 끝내지 못한 작업 (재시작 시 다시 대기열에 넣음)"""
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class InMemoryJobStore(JobStore):
+    """프로세스 메모리 작업 저장소 (끝난 작업은 ttl_seconds 후 정리)"""
+
+    def __init__(self, ttl_seconds: float = JOB_RESULT_TTL_SECONDS):
+        self._ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def _purge(self):
+        cutoff = time.time() - self._ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.status in JOB_FINISHED and job.updated_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def create(self, job: Job):
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = Job(**job.to_dict())
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            # 호출자가 고쳐도 저장된 상태가 바뀌지 않도록 복사본 반환
+            return Job(**job.to_dict()) if job is not None else None
+
+    def update(self, job: Job):
+        with self._lock:
+            self._jobs[job.id] = Job(**job.to_dict())
+
+    def claim(self, job_id: str, owner: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JOB_QUEUED:
+                return None
+            job.status, job.owner = JOB_RUNNING, owner
+            job.leased_at = job.updated_at = time.time()
+            return Job(**job.to_dict())
+
+    def renew(self, job_id: str, owner: str, leased_at: float) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JOB_RUNNING or job.owner != owner:
+                return False
+            job.leased_at = leased_at
+            return True
+
+    def release_expired(self, job_id: str, lease_seconds: float) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JOB_RUNNING or (job.leased_at or 0) >= time.time() - lease_seconds:
+                return False
+            job.status, job.owner, job.leased_at = JOB_QUEUED, None, None
+            return True
+
+    def list_unfinished(self) -> List[Job]:
+        with self._lock:
+            return [Job(**job.to_dict()) for job in self._jobs.values() if job.status not in JOB_FINISHED]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {status: 0 for status in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+
+class SQLiteJobStore(JobStore):
+    """재시작 후에도 유지되는 SQLite 작업 저장소 (payload/result는 JSON으로 저장)"""
+
+    _PURGE_EVERY = 100
+    _COLUMNS = (
+        "id", "kind", "payload", "status", "result", "error", "attempts", "webhook_url", "created_at", "updated_at",
+        "owner", "leased_at",
+    )
+
+    def __init__(self, path: str, ttl_seconds: float = JOB_RESULT_TTL_SECONDS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "result TEXT, error TEXT, attempts INTEGER NOT NULL, webhook_url TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, owner TEXT, leased_at REAL)"
+        )
+        # 임대 컬럼이 없던 이전 버전의 파일이면 추가
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("leased_at", "REAL")):
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+
+    def _to_row(self, job: Job) -> tuple:
+        return (
+            job.id, job.kind, json.dumps(job.payload, ensure_ascii=False), job.status,
+            json.dumps(job.result, ensure_ascii=False) if job.result is not None else None,
+            job.error, job.attempts, job.webhook_url, job.created_at, job.updated_at,
+            job.owner, job.leased_at,
+        )
+
+    def _from_row(self, row: tuple) -> Job:
+        values = dict(zip(self._COLUMNS, row))
+        values["payload"] = json.loads(values["payload"])
+        values["result"] = json.loads(values["result"]) if values["result"] is not None else None
+        return Job(**values)
+
+    def _write(self, job: Job):
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self._COLUMNS)}) VALUES ({placeholders})", self._to_row(job)
+            )
+            self._writes += 1
+            # 끝난 지 오래된 작업은 주기적으로 정리
+            if self._writes % self._PURGE_EVERY == 0:
+                self._conn.execute(
+                    "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                    (*JOB_FINISHED, time.time() - self._ttl_seconds),
+                )
+
+    def create(self, job: Job):
+        self._write(job)
+
+    def update(self, job: Job):
+        self._write(job)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._from_row(row) if row is not None else None
+
+    def claim(self, job_id: str, owner: str) -> Optional[Job]:
+        # 같은 파일을 쓰는 여러 프로세스 중 상태를 바꾼 하나만 실행 (rowcount가 0이면 이미 다른 워커가 가져감)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, leased_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (JOB_RUNNING, owner, now, now, job_id, JOB_QUEUED),
+            )
+            if cursor.rowcount == 0:
+                return None
+        return self.get(job_id)
+
+    def renew(self, job_id: str, owner: str, leased_at: float) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET leased_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                (leased_at, job_id, JOB_RUNNING, owner),
+            )
+        return cursor.rowcount > 0
+
+    def release_expired(self, job_id: str, lease_seconds: float) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, leased_at = NULL "
+                "WHERE id = ? AND status = ? AND (leased_at IS NULL OR leased_at < ?)",
+                (JOB_QUEUED, job_id, JOB_RUNNING, time.time() - lease_seconds),
+            )
+        return cursor.rowcount > 0
+
+    def list_unfinished(self) -> List[Job]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE status NOT IN (?, ?) ORDER BY created_at",
+                JOB_FINISHED,
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED)}
+        with self._lock:
+            for status, count in self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+                counts[status] = count
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_job_store() -> JobStore:
+    """설정에 따라 작업 저장소 생성 (SQLite를 열 수 없으면 메모리 저장소)"""
+    if JOB_STORE == "sqlite":
+        try:
+            return SQLiteJobStore(JOB_SQLITE_PATH)
+        except sqlite3.Error as e:
+            logger.error(f"SQLite 작업 저장소를 열 수 없어 메모리 저장소를 사용합니다: {str(e)}")
+    return InMemoryJobStore()
+
+
+class RateLimiter:
+    """분당 요청 수 제한 (최근 60초 동안의 요청 시작 시각을 기억하는 슬라이딩 윈도우)
+
+    429 응답을 받으면 pause()로 모든 워커의 다음 요청을 함께 늦춘다.
+    requests_per_minute가 0 이하이면 제한하지 않는다.
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, requests_per_minute: int):
+        self._requests_per_minute = requests_per_minute
+        self._starts: Deque[float] = deque()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _wait_seconds(self, now: float) -> float:
+        while self._starts and now - self._starts[0] >= self.WINDOW_SECONDS:
+            self._starts.popleft()
+        wait = self._paused_until - now
+        if self._requests_per_minute > 0 and len(self._starts) >= self._requests_per_minute:
+            wait = max(wait, self._starts[0] + self.WINDOW_SECONDS - now)
+        return wait
+
+    async def acquire(self):
+        """요청 한 건을 보낼 수 있을 때까지 대기"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = self._wait_seconds(now)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self._starts.append(now)
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def retry_after(self) -> int:
+        """대기열이 가득 찼을 때 클라이언트에 알려 줄 재시도 대기 시간 (초)"""
+        return max(1, int(self._wait_seconds(time.monotonic()) + 1))
+
+
+async def _generate_image(payload: dict) -> dict:
+    # 재시도는 작업 큐가 분당 요청 수 제한과 백오프를 지키며 맡으므로 클라이언트 재시도는 끔
+    return await llm_service.generate_image_with_dalle(payload["prompt"], max_retries=0)
+
+
+class JobService:
+    """OpenAI 동시 요청 수와 분당 요청 수를 지키며 작업을 처리하는 비동기 작업 큐
+
+    submit()은 작업을 저장한 뒤 바로 반환하고, 워커가 handlers[kind](payload)를 실행한다.
+    워커는 저장소에서 작업을 원자적으로 가져가(claim) 임대를 갱신하며 실행하므로, 같은 SQLite 파일을 쓰는
+    여러 프로세스가 같은 작업을 중복 실행하지 않고, 임대가 끊긴 작업만 다른 워커가 다시 가져간다.
+    재시도할 수 있는 오류는 지수 백오프(지터 포함)로 max_attempts까지 다시 시도하며,
+    결과는 저장소에서 조회하거나 webhook_url로 받을 수 있다.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handlers: Dict[str, Callable[[dict], Awaitable[dict]]],
+        concurrency: int = JOB_OPENAI_CONCURRENCY,
+        requests_per_minute: int = JOB_REQUESTS_PER_MINUTE,
+        max_queued: int = JOB_MAX_QUEUED,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        backoff_base: float = JOB_BACKOFF_BASE_SECONDS,
+        backoff_max: float = JOB_BACKOFF_MAX_SECONDS,
+        retryable_errors: Tuple[Type[BaseException], ...] = RETRYABLE_ERRORS,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+    ):
+        self._store = store
+        self._handlers = handlers
+        self._concurrency = max(1, concurrency)
+        self._requests_per_minute = requests_per_minute
+        self._max_queued = max(1, max_queued)
+        self._max_attempts = max(1, max_attempts)
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._retryable_errors = retryable_errors
+        self._lease_seconds = max(1.0, lease_seconds)
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._limiter: Optional[RateLimiter] = None
+        self._workers: List[asyncio.Task] = []
+        self._requeued: Optional[asyncio.Task] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        # 대기열에 들어 있는 작업 ID (주기적 재적재가 같은 작업을 두 번 넣지 않도록)
+        self._queued_ids: set = set()
+        self._webhook_tasks: set = set()
+        self._webhook_client: Optional[httpx.AsyncClient] = None
+
+    async def _ensure_workers(self):
+        """현재 이벤트 루프에서 워커 시작 (처음 시작할 때 끝나지 않은 작업을 다시 대기열에 넣음)
+
+        저장소 조회는 스레드에서 실행하므로, 그동안 들어온 다른 호출은 같은 재적재 작업이 끝나길 기다린다.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._limiter = RateLimiter(self._requests_per_minute)
+            self._workers = []
+            self._queued_ids = set()
+            self._requeued = loop.create_task(self._requeue_unfinished())
+            self._sweeper = loop.create_task(self._sweep_expired())
+        await self._requeued
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self._concurrency:
+            self._workers.append(loop.create_task(self._worker()))
+
+    def _enqueue(self, job_id: str):
+        if job_id not in self._queued_ids:
+            self._queued_ids.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _requeue_unfinished(self):
+        """queued 작업과 임대가 만료된 running 작업을 대기열에 넣음 (다른 워커가 임대 중인 작업은 건너뜀)
+
+        여러 프로세스가 같은 queued 작업을 넣어도 실행은 claim에 성공한 하나만 한다.
+        """
+        requeued = 0
+        for job in await asyncio.to_thread(self._store.list_unfinished):
+            if job.status == JOB_RUNNING and not await asyncio.to_thread(
+                self._store.release_expired, job.id, self._lease_seconds
+            ):
+                continue
+            if job.id not in self._queued_ids:
+                requeued += 1
+            self._enqueue(job.id)
+        if requeued:
+            logger.info(f"끝나지 않은 작업 {requeued}개를 다시 대기열에 넣었습니다")
+
+    async def _sweep_expired(self):
+        """실행하던 워커가 죽어 임대가 끊긴 작업을 주기적으로 다시 가져옴"""
+        while True:
+            await asyncio.sleep(self._lease_seconds / 2)
+            try:
+                await self._requeue_unfinished()
+            except Exception as e:
+                logger.error(f"작업 재적재 중 오류: {str(e)}")
+
+    async def _keep_lease(self, job: Job):
+        """실행 중인 작업의 임대를 LEASE/3마다 갱신"""
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
+            leased_at = time.time()
+            if not await asyncio.to_thread(self._store.renew, job.id, self._owner, leased_at):
+                logger.warning(f"작업 임대를 잃었습니다 ({job.id})")
+                return
+            job.leased_at = leased_at
+
+    async def start(self):
+        """서버 시작 시 워커를 띄우고 이전 프로세스가 끝내지 못한 작업을 다시 대기열에 넣음"""
+        await self._ensure_workers()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, kind: str, payload: dict, webhook_url: Optional[str] = None) -> Job:
+        """작업을 저장하고 대기열에 넣은 뒤 바로 반환"""
+        if kind not in self._handlers:
+            raise ValueError(f"지원하지 않는 작업 종류입니다: {kind}")
+        if webhook_url:
+            await validate_webhook_url(webhook_url)
+
+        await self._ensure_workers()
+        if self._queue.qsize() >= self._max_queued:
+            raise JobQueueFullError(self._limiter.retry_after())
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, payload=payload, webhook_url=webhook_url)
+        await asyncio.to_thread(self._store.create, job)
+        self._enqueue(job.id)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self._store.get, job_id)
+
+    def stats(self) -> dict:
+        """대기열과 상태별 작업 수 (SQLite 저장소는 블로킹 조회이므로 스레드에서 호출)"""
+        return {
+            "queued": self.queued,
+            "workers": self._concurrency,
+            "requests_per_minute": self._requests_per_minute,
+            "jobs": self._store.counts(),
+        }
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._queued_ids.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"작업 처리 중 예기치 않은 오류 ({job_id}): {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _retry_delay(self, error: BaseException, attempts: int) -> Optional[float]:
+        """재시도 대기 시간 (재시도하지 않을 오류거나 횟수를 다 쓰면 None)
+
+        retryable_errors 외에 OpenAI 5xx 응답도 재시도한다 (타임아웃은 retryable_errors에 있을 때만).
+        """
+        retryable = isinstance(error, self._retryable_errors) or (
+            is_retryable(error) and not isinstance(error, openai.error.Timeout)
+        )
+        if not retryable or attempts >= self._max_attempts:
+            return None
+        delay = min(self._backoff_max, self._backoff_base * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+        # 서버(Retry-After)나 서킷 브레이커가 알려 준 시간 이상 기다림
+        headers = getattr(error, "headers", None) or {}
+        try:
+            delay = max(delay, float(headers.get("retry-after", 0)), float(getattr(error, "retry_after", 0)))
+        except (TypeError, ValueError):
+            pass
+        return delay
+
+    async def _run(self, job_id: str):
+        # 다른 워커(프로세스)가 이미 가져갔거나 끝난 작업이면 건너뜀
+        job = await asyncio.to_thread(self._store.claim, job_id, self._owner)
+        if job is None:
+            return
+
+        heartbeat = asyncio.ensure_future(self._keep_lease(job))
+        try:
+            await self._attempt(job)
+        finally:
+            heartbeat.cancel()
+
+        job.owner = job.leased_at = None
+        job.updated_at = time.time()
+        await asyncio.to_thread(self._store.update, job)
+        if job.webhook_url:
+            task = asyncio.ensure_future(self._notify(job))
+            self._webhook_tasks.add(task)
+            task.add_done_callback(self._webhook_tasks.discard)
+
+    async def _attempt(self, job: Job):
+        """성공하거나 재시도할 수 없을 때까지 handler 실행 (결과는 job에 기록)"""
+        while True:
+            await self._limiter.acquire()
+            job.attempts += 1
+            try:
+                job.result = await self._handlers[job.kind](job.payload)
+                job.status = JOB_SUCCEEDED
+                job.error = None
+                break
+            except Exception as e:
+                delay = self._retry_delay(e, job.attempts)
+                if delay is None:
+                    logger.error(f"작업 실패 ({job.id}, {job.attempts}회 시도): {str(e)}")
+                    job.status = JOB_FAILED
+                    job.error = str(e)
+                    break
+                if getattr(e, "http_status", None) == 429:
+                    # 요청 한도 초과는 모든 워커가 함께 쉬도록 제한기를 멈춤
+                    self._limiter.pause(delay)
+                logger.warning(f"작업 재시도 예정 ({job.id}, {job.attempts}회 시도, {delay:.1f}초 후): {str(e)}")
+                job.error = str(e)
+                job.updated_at = time.time()
+                await asyncio.to_thread(self._store.update, job)
+                await asyncio.sleep(delay)
+
+    async def _notify(self, job: Job):
+        """작업 결과를 webhook_url로 POST (실패하면 짧게 대기 후 재시도, 리다이렉트는 따라가지 않음)"""
+        if self._webhook_client is None or self._webhook_client.is_closed:
+            self._webhook_client = httpx.AsyncClient(timeout=JOB_WEBHOOK_TIMEOUT, follow_redirects=False)
+        for attempt in range(1, JOB_WEBHOOK_ATTEMPTS + 1):
+            try:
+                await validate_webhook_url(job.webhook_url)
+            except WebhookURLError as e:
+                logger.warning(f"웹훅 전송 취소 ({job.id}): {str(e)}")
+                return
+            try:
+                response = await self._webhook_client.post(job.webhook_url, json=job.public_dict())
+                response.raise_for_status()
+                return
+            except httpx.HTTPError as e:
+                logger.warning(f"웹훅 전송 실패 ({job.id}, {attempt}회): {str(e)}")
+                if attempt < JOB_WEBHOOK_ATTEMPTS:
+                    await asyncio.sleep(2 ** (attempt - 1))
+
+    async def aclose(self):
+        """워커와 웹훅 클라이언트 정리 (대기 중인 작업은 저장소에 남아 재시작 시 다시 처리)"""
+        tasks = [*self._workers, *self._webhook_tasks, *(task for task in (self._sweeper,) if task is not None)]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._sweeper = None
+        if self._webhook_client is not None:
+            await self._webhook_client.aclose()
+            self._webhook_client = None
+        self._store.close()
+
+
+# 서비스 인스턴스 생성
+job_service = JobService(create_job_store(), {"image": _generate_image})
+registry.gauge("hancut_job_queue_depth", "처리를 기다리는 이미지 생성 작업 수", lambda: job_service.queued)
@@ -1,9 +1,18 @@
 import os
 import json
+import time
+import asyncio
+import hashlib
+import unicodedata
 import openai
-from typing import Optional
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, Optional
 from dotenv import load_dotenv
 
+from app.services.result_cache import ResultCache
+from app.services.openai_client import OpenAIClient, CircuitOpenError, is_retryable
+from app.services.metrics import observe_stage, registry, stage_timer
+
 
 # 환경 변수 로드
 load_dotenv()
@@ -11,16 +20,133 @@ load_dotenv()
 # OpenAI API 키 설정
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
+# 프롬프트 생성 결과 캐시 설정
+LLM_PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("LLM_PROMPT_CACHE_MAX_ENTRIES", "2048"))
+LLM_PROMPT_CACHE_TTL_SECONDS = float(os.getenv("LLM_PROMPT_CACHE_TTL_SECONDS", "3600"))
+
 class LLMService:
     """GPT-3.5-turbo를 이용한 인테리어 프롬프트 생성 및 DALL-E 3 이미지 생성 서비스"""
 
+    def __init__(
+        self,
+        cache_max_entries: int = LLM_PROMPT_CACHE_MAX_ENTRIES,
+        cache_ttl_seconds: float = LLM_PROMPT_CACHE_TTL_SECONDS,
+        openai_client: Optional[OpenAIClient] = None,
+    ):
+        # 정규화한 입력이 같으면 생성된 프롬프트를 재사용
+        self._prompt_cache = ResultCache("prompt", max_entries=cache_max_entries, ttl_seconds=cache_ttl_seconds)
+        self._inflight_prompts: Dict[str, asyncio.Future] = {}
+        # 프로세스 전체에서 공유하는 OpenAI HTTP 세션 (타임아웃, 재시도, 서킷 브레이커 포함)
+        self._openai = openai_client or OpenAIClient()
+
+        # 캐시 효과 측정을 위한 카운터
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self._register_metrics()
+
+    def _register_metrics(self):
+        """프롬프트 캐시와 OpenAI 호출 상태를 /metrics 수집 시점에 읽도록 등록"""
+        registry.gauge("hancut_llm_upstream_calls_total", "GPT API 호출 수", lambda: self.upstream_calls, kind="counter")
+        registry.gauge(
+            "hancut_llm_saved_calls_total", "프롬프트 캐시 적중과 요청 병합으로 생략한 GPT 호출 수",
+            lambda: self.cache_stats()["saved_calls"], kind="counter",
+        )
+        registry.gauge(
+            "hancut_llm_prompt_cache_hit_ratio", "프롬프트 캐시 적중률",
+            lambda: self._prompt_cache.memory_stats()["hit_ratio"],
+        )
+        registry.gauge(
+            "hancut_openai_circuit_open", "OpenAI 서킷 브레이커가 열려 있으면 1",
+            lambda: 0 if self._openai.breaker.state == "closed" else 1,
+        )
+        registry.gauge("hancut_openai_retries_total", "OpenAI 호출 재시도 수", lambda: self._openai.retries, kind="counter")
+
     @staticmethod
-    async def generate_interior_prompt(text: str) -> str:
+    def _normalize_text(text: str) -> str:
+        """유니코드 정규화 후 공백을 하나로 합친 텍스트"""
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @staticmethod
+    def _normalize_keywords(keywords: Optional[list]) -> list:
+        """대소문자, 공백, 순서, 중복 차이를 없앤 키워드 목록"""
+        normalized = (" ".join(str(keyword).lower().split()) for keyword in keywords or [])
+        return sorted({keyword for keyword in normalized if keyword})
+
+    def _hancut_cache_key(
+        self,
+        text: str,
+        style_keywords: Optional[list] = None,
+        object_keywords: Optional[list] = None) -> str:
+        """키워드 대소문자, 순서, 중복만 다른 요청이 같은 캐시 항목을 쓰도록 정규화한 요청의 키"""
+        return self._prompt_cache_key(self._hancut_request(text, style_keywords, object_keywords, normalize_keywords=True))
+
+    @staticmethod
+    def _prompt_cache_key(request: dict) -> str:
+        """모델, 메시지, 생성 옵션을 모두 포함한 캐시 키 (시스템 프롬프트가 바뀌면 자동으로 무효화)"""
+        return hashlib.sha256(json.dumps(request, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+    async def _complete_prompt(self, request: dict, use_cache: bool = True, key: Optional[str] = None) -> str:
+        """ChatCompletion 요청 후 프롬프트 추출
+
+        같은 요청은 캐시된 결과를 쓰고, 동시에 들어온 같은 요청은 진행 중인 호출 하나를 공유한다.
+        use_cache가 False면 캐시를 건너뛰고 새로 생성한 결과로 캐시를 갱신한다.
+        key를 주면 요청 대신 그 키로 캐시를 찾는다 (정규화한 요청의 키 등).
+        """
+        key = key or self._prompt_cache_key(request)
+        if not use_cache:
+            return await self._request_prompt(request, key)
+
+        cached = await self._prompt_cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight_prompts.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request_prompt(request, key))
+            self._inflight_prompts[key] = task
+            task.add_done_callback(lambda _: self._inflight_prompts.pop(key, None))
+        else:
+            self.coalesced_calls += 1
+        # 한 요청자가 취소되어도 같은 호출을 기다리는 다른 요청자에게는 영향이 없도록 보호
+        return await asyncio.shield(task)
+
+    async def _request_prompt(self, request: dict, key: str) -> str:
+        self.upstream_calls += 1
+        with stage_timer("llm_call"):
+            response = await self._openai.call(openai.ChatCompletion.acreate, self._openai.chat_timeout, **request)
+        prompt = self.parse_prompt_result(response.choices[0].message.content)
+        self._prompt_cache.set(key, prompt)
+        return prompt
+
+    def cache_stats(self) -> dict:
+        """프롬프트 캐시 적중률과 절약한 API 호출 수"""
+        stats = self._prompt_cache.stats()
+        memory = stats["memory"]
+        saved_calls = memory["hits"] + self.coalesced_calls
+        requests = saved_calls + self.upstream_calls
+        return {
+            **stats,
+            "upstream_calls": self.upstream_calls,
+            "coalesced_calls": self.coalesced_calls,
+            "saved_calls": saved_calls,
+            "saved_ratio": round(saved_calls / requests, 4) if requests else 0.0,
+        }
+
+    def upstream_stats(self) -> dict:
+        """OpenAI 호출, 재시도, 서킷 브레이커 상태"""
+        return self._openai.stats()
+
+    async def aclose(self):
+        """공유 OpenAI 세션 종료"""
+        await self._openai.aclose()
+
+    async def generate_interior_prompt(self, text: str, use_cache: bool = True) -> str:
         """
         사용자 텍스트로부터 인테리어 프롬프트를 생성합니다.
         
         Args:
             text (str): 사용자가 입력한 인테리어 요구사항 텍스트
+            use_cache (bool): False면 캐시를 건너뛰고 새로 생성
             
         Returns:
             str: 생성된 인테리어 디자인 프롬프트
@@ -43,53 +169,50 @@ class LLMService:
             }
             """
 
-            # API 호출
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-4.1-nano",
-                messages=[
+            # API 호출 (응답의 JSON에서 프롬프트 추출, 실패 시 텍스트 그대로 반환)
+            return await self._complete_prompt({
+                "model": "gpt-4.1-nano",
+                "messages": [
                     {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text}
+                    {"role": "user", "content": self._normalize_text(text)}
                 ],
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            # 응답에서 JSON 추출
-            result = response.choices[0].message.content.strip()
-            
-            # JSON 파싱
-            try:
-                result_json = json.loads(result)
-                return result_json["prompt"]
-            except json.JSONDecodeError:
-                # JSON 파싱에 실패한 경우 텍스트 그대로 반환
-                return result
+                "temperature": 0.7,
+                "max_tokens": 1000
+            }, use_cache=use_cache)
                 
+        except CircuitOpenError:
+            raise
         except Exception as e:
             print(f"LLM 서비스 오류: {str(e)}")
             return f"프롬프트 생성 중 오류가 발생했습니다: {str(e)}"
     
-    @staticmethod
-    async def generate_image_with_dalle(prompt: str) -> dict:
+    async def generate_image_with_dalle(self, prompt: str, max_retries: Optional[int] = None) -> dict:
         """
         DALL-E 3을 사용하여 프롬프트 기반으로 이미지를 생성합니다.
         
         Args:
             prompt (str): 이미지 생성에 사용할 프롬프트
+            max_retries Optional[int]: 클라이언트 재시도 횟수 (작업 큐처럼 호출자가 재시도하면 0)
             
         Returns:
             dict: 이미지 URL이 포함된 응답 딕셔너리
         """
         try:
             # DALL-E 3 API 호출
-            response = await openai.Image.acreate(
-                model="dall-e-3",
-                prompt=prompt,
-                size="1024x1792",  # 세로형 이미지 (인테리어에 적합)
-                quality="standard",
-                n=1,  # 이미지 1개 생성
-                response_format="url"
-            )
+            with stage_timer("dalle_call"):
+                response = await self._openai.call(
+                    openai.Image.acreate,
+                    self._openai.image_timeout,
+                    max_retries=max_retries,
+                    # 타임아웃된 요청도 서버에서는 생성되어 과금될 수 있으므로 다시 보내지 않음
+                    retry_timeouts=False,
+                    model="dall-e-3",
+                    prompt=prompt,
+                    size="1024x1792",  # 세로형 이미지 (인테리어에 적합)
+                    quality="standard",
+                    n=1,  # 이미지 1개 생성
+                    response_format="url"
+                )
             
             # 응답에서 이미지 URL 추출
             image_url = response.data[0].url
@@ -100,34 +223,27 @@ class LLMService:
             }
                 
         except Exception as e:
+            if is_retryable(e) or isinstance(e, CircuitOpenError):
+                # 호출자(작업 큐)가 재시도 여부를 판단할 수 있도록 원래 오류 유지
+                print(f"DALL-E 일시적 오류: {str(e)}")
+                raise
             print(f"DALL-E 이미지 생성 오류: {str(e)}")
             raise Exception(f"이미지 생성 중 오류가 발생했습니다: {str(e)}")
 
 
 
     @staticmethod
-    async def generate_hancut_prompt(
-        text: str, 
-        style_keywords: Optional[list] = None, 
-        object_keywords: Optional[list] = None) -> str:
-        """
-        사용자 입력 텍스트와 스타일 키워드를 기반으로 인테리어 프롬프트 생성
+    def _hancut_messages(
+        text: str,
+        style_keywords: Optional[list] = None,
+        object_keywords: Optional[list] = None) -> list:
+        """스타일/객체 키워드를 넣은 시스템 프롬프트와 사용자 텍스트로 GPT 메시지 구성"""
+        # 스타일 키워드를 영어 쉼표로 연결
+        style_str = ", ".join(style_keywords or [])
+        object_str = ", ".join(object_keywords or [])
         
-        Args:
-            text (str): 사용자 입력 텍스트
-            style_keywords Optional[list]: 이미지 분석을 통해 추출된 스타일 키워드 리스트
-            object_keywords Optional[list]: 이미지 분석을 통해 추출된 객체 키워드 리스트
-            
-        Returns:
-            str: 생성된 인테리어 프롬프트
-        """
-        try:
-            # 스타일 키워드를 영어 쉼표로 연결
-            style_str = ", ".join(style_keywords or [])
-            object_str = ", ".join(object_keywords or [])
-            
-            # GPT 시스템 프롬프트
-            system_prompt = f"""
+        # GPT 시스템 프롬프트
+        system_prompt = f"""
                 You are a professional architectural photographer. 
                 Always generate extremely realistic, photojournalistic interior scenes 
                 as if they were taken with a full-frame DSLR camera using a 35mm lens. 
@@ -161,31 +277,105 @@ class LLMService:
                     "color_palette": ["색상1", "색상2", ...]
                 }}
                 """
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text}
+        ]
 
+    @staticmethod
+    def parse_prompt_result(result: str) -> str:
+        """GPT 응답(JSON 형식 요청)에서 프롬프트만 추출 (JSON이 아니면 텍스트 그대로 반환)"""
+        result = result.strip()
+        try:
+            result_json = json.loads(result)
+            return result_json["prompt"]
+        except json.JSONDecodeError:
+            return result
 
+    def _hancut_request(
+        self,
+        text: str,
+        style_keywords: Optional[list] = None,
+        object_keywords: Optional[list] = None,
+        normalize_keywords: bool = False) -> dict:
+        """GPT 요청 본문 (키워드는 관련도 순서를 그대로 보내고, normalize_keywords는 캐시 키를 만들 때만 사용)"""
+        if normalize_keywords:
+            style_keywords = self._normalize_keywords(style_keywords)
+            object_keywords = self._normalize_keywords(object_keywords)
+        return {
+            "model": "gpt-4.1-nano",
+            "messages": self._hancut_messages(self._normalize_text(text), style_keywords, object_keywords),
+            "temperature": 0.7,
+            "max_tokens": 1000
+        }
 
-            # GPT API 호출
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-4.1-nano",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text}
-                ],
-                temperature=0.7,
-                max_tokens=1000
+    async def generate_hancut_prompt(
+        self,
+        text: str, 
+        style_keywords: Optional[list] = None, 
+        object_keywords: Optional[list] = None,
+        use_cache: bool = True) -> str:
+        """
+        사용자 입력 텍스트와 스타일 키워드를 기반으로 인테리어 프롬프트 생성
+        
+        Args:
+            text (str): 사용자 입력 텍스트
+            style_keywords Optional[list]: 이미지 분석을 통해 추출된 스타일 키워드 리스트
+            object_keywords Optional[list]: 이미지 분석을 통해 추출된 객체 키워드 리스트
+            use_cache (bool): False면 캐시를 건너뛰고 새로 생성
+            
+        Returns:
+            str: 생성된 인테리어 프롬프트
+        """
+        try:
+            # GPT API 호출 및 응답 파싱
+            return await self._complete_prompt(
+                self._hancut_request(text, style_keywords, object_keywords),
+                use_cache=use_cache,
+                key=self._hancut_cache_key(text, style_keywords, object_keywords),
             )
 
-            # 응답 파싱
-            result = response.choices[0].message.content.strip()
-            try:
-                result_json = json.loads(result)
-                return result_json["prompt"]
-            except json.JSONDecodeError:
-                return result
-
+        except CircuitOpenError:
+            raise
         except Exception as e:
             print(f"LLM 서비스 오류: {str(e)}")
             return f"프롬프트 생성 중 오류가 발생했습니다: {str(e)}"
 
+    async def stream_hancut_prompt(
+        self,
+        text: str,
+        style_keywords: Optional[list] = None,
+        object_keywords: Optional[list] = None,
+        use_cache: bool = True) -> AsyncIterator[str]:
+        """
+        generate_hancut_prompt의 스트리밍 버전. GPT 응답 토큰을 생성되는 대로 내보냅니다.
+
+        오류는 기본 문자열로 바꾸지 않고 그대로 전달하며, 순회를 중단하면 API 응답 스트림도 닫힙니다.
+        전체 토큰을 이어 붙인 결과는 parse_prompt_result로 프롬프트만 추출할 수 있습니다.
+        캐시에 있으면 저장된 프롬프트를 토큰 하나로 내보내고, 끝까지 받은 결과는 캐시에 저장합니다.
+        """
+        request = self._hancut_request(text, style_keywords, object_keywords)
+        key = self._hancut_cache_key(text, style_keywords, object_keywords)
+        if use_cache:
+            cached = await self._prompt_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        self.upstream_calls += 1
+        start = time.perf_counter()
+        response = await self._openai.call(openai.ChatCompletion.acreate, self._openai.chat_timeout, **request, stream=True)
+        tokens = []
+        async with aclosing(response):
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.get("content")
+                if token:
+                    tokens.append(token)
+                    yield token
+        observe_stage("llm_call", time.perf_counter() - start)
+        self._prompt_cache.set(key, self.parse_prompt_result("".join(tokens)))
+
 # 서비스 인스턴스 생성
 llm_service = LLMService()
\ No newline at end of file
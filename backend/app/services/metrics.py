@@ -0,0 +1,294 @@
+import os
+import time
+import bisect
+import resource
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 지연 시간 히스토그램 버킷 (초)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values
+        ]
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        self._counts = [0] * (len(upper_bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class _Timer:
+    """with 블록의 소요 시간을 히스토그램에 기록"""
+
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램 (관측값 단위: 초)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self._upper_bounds = tuple(sorted(buckets))
+        self._children: Dict[LabelValues, _HistogramChild] = {}
+
+    def labels(self, *labelvalues: str) -> _HistogramChild:
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues, _HistogramChild(self._upper_bounds))
+        return child
+
+    def observe(self, value: float, *labelvalues: str):
+        self.labels(*labelvalues).observe(value)
+
+    def time(self, *labelvalues: str) -> _Timer:
+        return _Timer(self.labels(*labelvalues))
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            children = list(self._children.items())
+        for labels, child in children:
+            counts, total = child.snapshot()
+            cumulative = 0
+            for upper_bound, count in zip((*self._upper_bounds, float("inf")), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, ("le", _format_value(upper_bound)))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """수집 시점에 함수를 호출해 값을 읽는 게이지 (대기열 길이, 메모리 등)
+
+    fn은 레이블이 없으면 숫자를, 있으면 {레이블 값 튜플: 숫자}를 반환한다.
+    kind를 "counter"로 주면 서비스가 이미 세고 있는 누적 카운터를 그대로 내보낼 수 있다.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, fn: Callable, labelnames: Sequence[str] = (), kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self._fn = fn
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        try:
+            value = self._fn()
+        except Exception:
+            # 아직 초기화되지 않은 서비스 등은 값을 생략
+            return []
+        samples = value.items() if isinstance(value, dict) else [((), value)]
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(sample)}"
+            for labels, sample in samples
+            if sample is not None
+        ]
+
+
+class MetricsRegistry:
+    """Prometheus 텍스트 형식으로 내보낼 지표 모음"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = REQUEST_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, fn: Callable, labelnames: Sequence[str] = (), kind: str = "gauge") -> Gauge:
+        """같은 이름으로 다시 등록하면 함수를 교체 (서비스 인스턴스가 바뀌는 경우)"""
+        metric = Gauge(name, documentation, fn, labelnames, kind)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _resident_memory_bytes() -> float:
+    """현재 RSS (Linux는 /proc, 그 외에는 최대 RSS로 대체)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+registry = MetricsRegistry()
+
+# HTTP 요청 지표 (route는 경로 템플릿이라 레이블 수가 URL 수만큼 늘지 않음)
+HTTP_REQUESTS = registry.counter("hancut_http_requests_total", "HTTP 요청 수", ("method", "route", "status"))
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "hancut_http_request_duration_seconds", "HTTP 요청 처리 시간 (스트리밍 응답은 스트림 종료까지)", ("method", "route")
+)
+_in_flight = [0]
+registry.gauge("hancut_http_requests_in_flight", "처리 중인 HTTP 요청 수", lambda: _in_flight[0])
+
+# 단계별 소요 시간
+# image_fetch, image_decode, siglip_preprocess, siglip_forward, rcnn_preprocess, rcnn_forward, llm_call, dalle_call
+STAGE_SECONDS = registry.histogram("hancut_stage_duration_seconds", "파이프라인 단계별 소요 시간", ("stage",), STAGE_BUCKETS)
+
+registry.gauge("hancut_process_resident_memory_bytes", "프로세스 RSS", _resident_memory_bytes)
+
+
+def stage_timer(stage: str) -> _Timer:
+    """with stage_timer("siglip_forward"): ... 형태로 단계 소요 시간 기록"""
+    return STAGE_SECONDS.time(stage)
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+class MetricsMiddleware:
+    """요청 수와 처리 시간을 경로 템플릿별로 기록하는 ASGI 미들웨어
+
+    요청 제한 미들웨어의 429처럼 라우터에 닿기 전에 끝난 요청은 scope에 route가 없으므로,
+    route_prefixes 중 가장 긴 일치 접두사(예: /api/hancut)로 기록한다. 어디에도 맞지 않으면 unmatched.
+    """
+
+    def __init__(self, app, exclude_paths: Iterable[str] = ("/metrics",), route_prefixes: Iterable[str] = ()):
+        self.app = app
+        self._exclude_paths = set(exclude_paths)
+        self._route_prefixes = sorted((prefix.rstrip("/") for prefix in route_prefixes), key=len, reverse=True)
+
+    def _route_label(self, scope) -> str:
+        path = scope.get("path", "")
+        prefix = next(
+            (prefix for prefix in self._route_prefixes if path == prefix or path.startswith(prefix + "/")), None
+        )
+        route = getattr(scope.get("route"), "path", None)
+        if route:
+            # 라우터 안의 상대 경로만 남기는 FastAPI 버전에서도 라우터 간에 템플릿이 겹치지 않도록 접두사를 붙임
+            return prefix + route if prefix and not route.startswith(prefix) else route
+        return prefix or "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self._exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        _in_flight[0] += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight[0] -= 1
+            # 라우터가 매칭한 경로 템플릿 (라우터에 닿지 않았으면 접두사, 그것도 없으면 unmatched)
+            route = self._route_label(scope)
+            method = scope.get("method", "")
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.inc(method, route, str(status[0]))
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """동시에 들어온 요청을 모아 한 번의 배치 추론으로 처리하는 마이크로 배처
+
+    최대 max_batch_size개 또는 첫 요청 이후 max_wait_ms가 지날 때까지 요청을 모은 뒤
+    batch_fn(items) -> results 를 한 번 호출하고, 결과를 각 요청자에게 순서대로 돌려준다.
+    동시에 실행되는 배치 수는 max_concurrent_batches로 제한되며, 슬롯을 기다리는 동안
+    쌓인 요청은 다음 배치에 합쳐진다.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        max_concurrent_batches: int = 1,
+    ):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._max_concurrent_batches = max(1, max_concurrent_batches)
+
+        self._pending: Deque[Tuple[Any, asyncio.Future]] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._has_items: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        # 실행 중인 배치 작업 (참조를 잡아 두어 실행 중에 수거되지 않게 하고, 종료 시 끝날 때까지 기다림)
+        self._dispatches: set = set()
+
+        # 배치 크기 통계
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """배치에 합쳐지기를 기다리는 요청 수"""
+        return len(self._pending)
+
+    def _ensure_worker(self):
+        """현재 이벤트 루프에서 수집 작업 시작 (루프가 바뀌면 다시 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending.clear()
+            self._has_items = asyncio.Event()
+            self._slots = asyncio.Semaphore(self._max_concurrent_batches)
+            self._worker = None
+            self._dispatches = set()
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._collect_forever())
+
+    async def submit(self, item: Any) -> Any:
+        """항목 하나를 배치 대기열에 넣고 결과를 기다림"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._pending.append((item, future))
+        self._has_items.set()
+        return await future
+
+    async def _collect_forever(self):
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._collect_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = self._loop.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def aclose(self):
+        """수집 작업을 멈추고 실행 중인 배치가 끝날 때까지 기다림 (아직 배치에 들어가지 않은 요청은 취소)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+        while self._pending:
+            _, future = self._pending.popleft()
+            future.cancel()
+
+    async def _collect_batch(self) -> List[Tuple[Any, asyncio.Future]]:
+        """첫 요청을 기다린 뒤 크기 또는 시간 제한까지 요청을 모음"""
+        while not self._pending:
+            self._has_items.clear()
+            await self._has_items.wait()
+
+        batch = []
+        deadline = self._loop.time() + self.max_wait_ms / 1000
+        while True:
+            while self._pending and len(batch) < self.max_batch_size:
+                item, future = self._pending.popleft()
+                if not future.cancelled():
+                    batch.append((item, future))
+            remaining = deadline - self._loop.time()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            self._has_items.clear()
+            try:
+                await asyncio.wait_for(self._has_items.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        return batch
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """배치 추론 실행 후 결과 분배"""
+        try:
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                return
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                results = await self._batch_fn([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
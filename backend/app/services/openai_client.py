@@ -0,0 +1,273 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Optional
+
+import aiohttp
+import openai
+
+logger = logging.getLogger(__name__)
+
+# OpenAI HTTP 세션 설정 (시간 단위: 초)
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_CHAT_TIMEOUT = float(os.getenv("OPENAI_CHAT_TIMEOUT", "60"))
+OPENAI_IMAGE_TIMEOUT = float(os.getenv("OPENAI_IMAGE_TIMEOUT", "120"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_KEEPALIVE_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_RETRY_BASE_SECONDS = float(os.getenv("OPENAI_RETRY_BASE_SECONDS", "0.5"))
+OPENAI_RETRY_MAX_SECONDS = float(os.getenv("OPENAI_RETRY_MAX_SECONDS", "8"))
+
+# 서킷 브레이커 설정 (최근 WINDOW번의 호출 중 실패 비율이 FAILURE_RATIO 이상이면 OPEN_SECONDS 동안 차단)
+OPENAI_BREAKER_WINDOW = int(os.getenv("OPENAI_BREAKER_WINDOW", "20"))
+OPENAI_BREAKER_MIN_CALLS = int(os.getenv("OPENAI_BREAKER_MIN_CALLS", "10"))
+OPENAI_BREAKER_FAILURE_RATIO = float(os.getenv("OPENAI_BREAKER_FAILURE_RATIO", "0.5"))
+OPENAI_BREAKER_OPEN_SECONDS = float(os.getenv("OPENAI_BREAKER_OPEN_SECONDS", "30"))
+# half_open 시험 호출이 이 시간 안에 끝나지 않으면 다른 호출이 다시 시험할 수 있게 함 (이미지 생성 타임아웃보다 길게)
+OPENAI_BREAKER_PROBE_TIMEOUT_SECONDS = float(os.getenv("OPENAI_BREAKER_PROBE_TIMEOUT_SECONDS", "150"))
+
+# 재시도할 오류 (429 및 일시적인 서버/네트워크 오류)
+RETRYABLE_OPENAI_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.ServiceUnavailableError,
+    openai.error.APIConnectionError,
+    openai.error.Timeout,
+    openai.error.TryAgain,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """다시 시도하면 성공할 수 있는 오류인지 (429, 5xx, 타임아웃, 연결 오류)"""
+    if isinstance(error, RETRYABLE_OPENAI_ERRORS):
+        return True
+    status = getattr(error, "http_status", None)
+    return isinstance(error, openai.error.APIError) and status is not None and status >= 500
+
+
+class CircuitOpenError(Exception):
+    """업스트림 오류율이 높아 서킷 브레이커가 호출을 차단했을 때 발생 (503 응답으로 변환)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"OpenAI API 오류가 많아 일시적으로 요청을 차단했습니다. {retry_after}초 후 다시 시도해주세요")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """최근 호출의 실패 비율로 동작하는 서킷 브레이커
+
+    closed: 모든 호출 허용. 최근 window번 중 실패 비율이 failure_ratio 이상이면 open으로 전환
+    open: open_seconds 동안 모든 호출을 즉시 거절
+    half_open: 시험 호출 하나만 허용하고, 성공하면 closed, 실패하면 다시 open
+               (시험 호출이 결과 없이 끝나거나 probe_timeout을 넘기면 다음 호출이 다시 시험)
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window: int = OPENAI_BREAKER_WINDOW,
+        min_calls: int = OPENAI_BREAKER_MIN_CALLS,
+        failure_ratio: float = OPENAI_BREAKER_FAILURE_RATIO,
+        open_seconds: float = OPENAI_BREAKER_OPEN_SECONDS,
+        probe_timeout: float = OPENAI_BREAKER_PROBE_TIMEOUT_SECONDS,
+    ):
+        self._results: Deque[bool] = deque(maxlen=max(1, window))
+        self._min_calls = max(1, min_calls)
+        self._failure_ratio = failure_ratio
+        self._open_seconds = open_seconds
+        self._probe_timeout = probe_timeout
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started_at = 0.0
+
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self._open_seconds:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def retry_after(self) -> int:
+        remaining = self._opened_at + self._open_seconds - time.monotonic()
+        return max(1, int(remaining + 1))
+
+    def before_call(self):
+        """호출 전 확인 (차단 상태면 CircuitOpenError)"""
+        state = self.state
+        now = time.monotonic()
+        probe_busy = self._probe_in_flight and now - self._probe_started_at < self._probe_timeout
+        if state == self.OPEN or (state == self.HALF_OPEN and probe_busy):
+            self.rejected += 1
+            raise CircuitOpenError(self.retry_after())
+        if state == self.HALF_OPEN:
+            self._probe_in_flight = True
+            self._probe_started_at = now
+
+    def release(self):
+        """결과 없이 끝난 호출 (취소 등). 시험 호출이었다면 다음 호출이 다시 시험할 수 있게 풀어 줌"""
+        if self._state == self.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record(self, success: bool):
+        if self._state == self.HALF_OPEN:
+            self._probe_in_flight = False
+            if success:
+                self._state = self.CLOSED
+                self._results.clear()
+                logger.info("OpenAI 서킷 브레이커 닫힘: 시험 호출 성공")
+            else:
+                self._trip()
+            return
+
+        self._results.append(success)
+        failures = self._results.count(False)
+        if (
+            self._state == self.CLOSED
+            and len(self._results) >= self._min_calls
+            and failures / len(self._results) >= self._failure_ratio
+        ):
+            self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.trips += 1
+        logger.warning(f"OpenAI 서킷 브레이커 열림: {self._open_seconds:.0f}초 동안 호출 차단")
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "recent_calls": len(self._results),
+            "recent_failures": self._results.count(False),
+            "rejected": self.rejected,
+            "trips": self.trips,
+        }
+
+
+class OpenAIClient:
+    """프로세스 전체에서 하나의 aiohttp 세션을 공유하는 OpenAI 호출기
+
+    openai 0.28의 비동기 API는 openai.aiosession에 세션이 있으면 그 세션을 쓰고, 없으면
+    호출마다 새 세션(새 TCP/TLS 연결)을 만든다. call()은 공유 세션을 지정한 뒤 호출 단위
+    타임아웃, 지터가 있는 지수 백오프 재시도, 서킷 브레이커를 적용한다.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = OPENAI_MAX_CONNECTIONS,
+        keepalive_seconds: float = OPENAI_KEEPALIVE_SECONDS,
+        connect_timeout: float = OPENAI_CONNECT_TIMEOUT,
+        chat_timeout: float = OPENAI_CHAT_TIMEOUT,
+        image_timeout: float = OPENAI_IMAGE_TIMEOUT,
+        max_retries: int = OPENAI_MAX_RETRIES,
+        retry_base: float = OPENAI_RETRY_BASE_SECONDS,
+        retry_max: float = OPENAI_RETRY_MAX_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self._max_connections = max_connections
+        self._keepalive_seconds = keepalive_seconds
+        self._connect_timeout = connect_timeout
+        self.chat_timeout = chat_timeout
+        self.image_timeout = image_timeout
+        self._max_retries = max(0, max_retries)
+        self._retry_base = retry_base
+        self._retry_max = retry_max
+        self.breaker = breaker or CircuitBreaker()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """공유 세션 (첫 호출 시 또는 이벤트 루프가 바뀌면 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._loop = loop
+            connector = aiohttp.TCPConnector(
+                limit=self._max_connections,
+                keepalive_timeout=self._keepalive_seconds,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _retry_delay(self, error: BaseException, attempt: int) -> float:
+        delay = min(self._retry_max, self._retry_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+        # 서버가 Retry-After를 알려 주면 그 이상 기다림
+        headers = getattr(error, "headers", None) or {}
+        try:
+            delay = max(delay, float(headers.get("retry-after", 0)))
+        except (TypeError, ValueError):
+            pass
+        return delay
+
+    async def call(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        timeout: float,
+        max_retries: Optional[int] = None,
+        retry_timeouts: bool = True,
+        **kwargs,
+    ) -> Any:
+        """openai 비동기 함수(예: openai.ChatCompletion.acreate) 호출
+
+        timeout은 한 번의 시도에 대한 전체 제한 시간이며, 연결 수립은 connect_timeout으로 따로 제한한다.
+        stream=True 호출은 응답이 시작될 때까지만 재시도하고, 이후 스트림 오류는 호출자에게 그대로 전달된다.
+        max_retries는 이 호출의 재시도 횟수 (None이면 OPENAI_MAX_RETRIES, 호출자가 직접 재시도하면 0).
+        retry_timeouts가 False면 타임아웃은 재시도하지 않는다 (서버에서 이미 처리됐을 수 있는 유료 생성 요청).
+        """
+        openai.aiosession.set(self._get_session())
+        max_retries = self._max_retries if max_retries is None else max(0, max_retries)
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            self.calls += 1
+            try:
+                result = await fn(request_timeout=(self._connect_timeout, timeout), **kwargs)
+            except Exception as e:
+                retryable = is_retryable(e)
+                # 잘못된 요청(4xx)은 업스트림 장애가 아니므로 오류율에 넣지 않음
+                self.breaker.record(success=not retryable)
+                if (
+                    not retryable
+                    or attempt >= max_retries
+                    or (not retry_timeouts and isinstance(e, openai.error.Timeout))
+                ):
+                    self.failures += 1
+                    raise
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                self.retries += 1
+                # 5xx 오류 메시지에는 응답 본문과 헤더 전체가 붙으므로 앞부분만 기록
+                logger.warning(f"OpenAI 호출 재시도 {attempt}/{max_retries} ({delay:.2f}초 후): {str(e)[:200]}")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # 취소 등은 성공도 실패도 아니므로 기록하지 않고 시험 호출 자리만 돌려줌
+                self.breaker.release()
+                raise
+            self.breaker.record(success=True)
+            return result
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "breaker": self.breaker.stats(),
+        }
+
+    async def aclose(self):
+        """공유 세션 종료"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
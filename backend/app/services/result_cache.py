@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# 결과 캐시 설정 (backend: memory 또는 sqlite)
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "86400"))
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory").lower()
+RESULT_CACHE_SQLITE_PATH = os.path.expanduser(
+    os.getenv("RESULT_CACHE_SQLITE_PATH", "~/.cache/hancut/result_cache.sqlite3")
+)
+
+
+class LRUCache:
+    """TTL이 있는 메모리 LRU 캐시"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._max_entries = max(1, max_entries)
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 캐시 크기 조정을 위한 카운터
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """값 조회 (없거나 만료되면 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        """값 저장 (가장 오래 사용되지 않은 항목부터 제거)"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SQLiteCacheBackend:
+    """재시작 후에도 유지되는 SQLite 캐시 저장소 (값은 JSON으로 저장)
+
+    get/set은 블로킹 호출이므로 이벤트 루프에서는 ResultCache를 통해 스레드에서 실행한다.
+    """
+
+    _PURGE_EVERY = 1000
+
+    def __init__(self, path: str, ttl_seconds: float):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.write_errors = 0
+        # 쓰기는 응답을 기다리게 하지 않도록 전용 스레드 하나에서 순서대로 처리
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-cache-writer")
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at = row
+            if expires_at < time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(value)
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time() + self._ttl_seconds),
+            )
+            self._writes += 1
+            # 만료된 항목은 주기적으로 정리
+            if self._writes % self._PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+    def set_in_background(self, key: str, value: Any):
+        """쓰기 스레드에 저장을 맡기고 바로 반환 (실패는 로그만 남김)"""
+        self._writer.submit(self._set_logged, key, value)
+
+    def _set_logged(self, key: str, value: Any):
+        try:
+            self.set(key, value)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self.write_errors += 1
+            logger.warning(f"SQLite 캐시 저장 실패: {str(e)}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "write_errors": self.write_errors,
+        }
+
+    def close(self):
+        # 대기 중인 쓰기를 마친 뒤 연결을 닫음
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+class ResultCache:
+    """메모리 LRU 앞단 + 선택적 SQLite 뒷단으로 구성된 2단 캐시
+
+    namespace는 같은 SQLite 파일을 여러 캐시가 공유할 수 있도록 키 앞에 붙는다.
+    메모리 적중은 바로 반환하고, 디스크 조회는 스레드에서 실행하며, 디스크 쓰기는 기다리지 않는다.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = RESULT_CACHE_TTL_SECONDS,
+        disk: Optional[SQLiteCacheBackend] = None,
+    ):
+        self._namespace = namespace
+        self._memory = LRUCache(max_entries, ttl_seconds)
+        self._disk = disk
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._memory.get(key)
+        if value is None and self._disk is not None:
+            value = await asyncio.to_thread(self._disk.get, f"{self._namespace}:{key}")
+            if value is not None:
+                # 디스크에서 찾은 값은 메모리로 올려 다음 조회를 빠르게
+                self._memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._memory.set(key, value)
+        if self._disk is not None:
+            self._disk.set_in_background(f"{self._namespace}:{key}", value)
+
+    def memory_stats(self) -> dict:
+        """디스크를 건드리지 않는 메모리 캐시 통계 (메트릭 수집용)"""
+        return self._memory.stats()
+
+    def stats(self) -> dict:
+        stats = {"memory": self._memory.stats()}
+        if self._disk is not None:
+            stats["disk"] = self._disk.stats()
+        return stats
+
+
+def create_disk_backend() -> Optional[SQLiteCacheBackend]:
+    """설정에 따라 SQLite 뒷단 생성 (memory 모드면 None)"""
+    if RESULT_CACHE_BACKEND != "sqlite":
+        return None
+    try:
+        return SQLiteCacheBackend(RESULT_CACHE_SQLITE_PATH, RESULT_CACHE_TTL_SECONDS)
+    except sqlite3.Error as e:
+        logger.error(f"SQLite 캐시를 열 수 없어 메모리 캐시만 사용합니다: {str(e)}")
+        return None
@@ -0,0 +1,77 @@
+import os
+import json
+import struct
+import logging
+from typing import Callable, Dict
+
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+# safetensors 헤더의 dtype 이름 -> torch dtype
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def load_safetensors_mmap(path: str) -> Dict[str, torch.Tensor]:
+    """safetensors 파일을 복사하지 않고 메모리 매핑한 텐서로 읽음
+
+    safetensors.torch.load_file은 텐서를 프로세스 메모리로 복사하지만, 여기서는 파일 전체를
+    MAP_PRIVATE로 매핑하고 각 텐서를 그 위의 뷰로 만든다. 추론 중에는 가중치에 쓰지 않으므로
+    같은 파일을 매핑한 모든 워커 프로세스가 페이지 캐시의 같은 물리 페이지를 공유한다.
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+
+    data_start = 8 + header_size
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    buffer = torch.empty(0, dtype=torch.uint8).set_(storage)
+
+    tensors = {}
+    for name, info in header.items():
+        begin, end = info["data_offsets"]
+        raw = buffer[data_start + begin:data_start + end]
+        tensors[name] = raw.view(_SAFETENSORS_DTYPES[info["dtype"]]).reshape(info["shape"])
+    return tensors
+
+
+def load_checkpoint_mmap(path: str) -> Dict[str, torch.Tensor]:
+    """torch.save 체크포인트를 메모리 매핑으로 읽음 (zip 형식이 아니면 일반 로드로 대체)"""
+    try:
+        return torch.load(path, map_location="cpu", weights_only=True, mmap=True)
+    except RuntimeError as e:
+        # 구형(비 zip) 직렬화 형식은 mmap을 지원하지 않음
+        logger.warning(f"체크포인트를 메모리 매핑할 수 없어 복사해서 읽습니다: {str(e)}")
+        return torch.load(path, map_location="cpu", weights_only=True)
+
+
+def build_with_weights(factory: Callable[[], nn.Module], state_dict: Dict[str, torch.Tensor]) -> nn.Module:
+    """파라미터를 할당하지 않고 모델 구조만 만든 뒤 state_dict의 텐서를 그대로 파라미터로 사용
+
+    init_empty_weights는 파라미터만 meta 장치에 만들고 버퍼(위치 인덱스 등)는 실제로 만든다.
+    load_state_dict(assign=True)는 값을 복사하지 않고 텐서 객체를 교체하므로, 메모리 매핑된
+    텐서가 그대로 모델 파라미터가 된다 (무작위 초기화 비용과 가중치 복사본이 모두 없어짐).
+    """
+    from accelerate import init_empty_weights
+
+    with init_empty_weights():
+        model = factory()
+    model.load_state_dict(state_dict, strict=True, assign=True)
+
+    remaining = [name for name, param in model.named_parameters() if param.is_meta]
+    if remaining:
+        raise RuntimeError(f"가중치 파일에 없는 파라미터가 있습니다: {remaining[:5]}")
+    return model
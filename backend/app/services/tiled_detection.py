@@ -0,0 +1,75 @@
+import os
+import math
+from typing import List, Optional, Tuple
+
+from app.services.image_preprocess import working_size
+
+# 타일 탐지 설정 (환경 변수로 조정 가능)
+# 일반 탐지는 작업 해상도(짧은 변 800, 긴 변 최대 1333)로 줄인 이미지 한 장만 보므로, 파노라마나 고해상도 사진의
+# 작은 객체(꽃병, 시계, 컵 등)는 수십 픽셀로 줄어 놓치기 쉽다. 타일 탐지는 원본을 더 큰 해상도로 다시 디코딩해
+# 겹치는 타일로 나눈 뒤 한 배치로 추론하고, 전체 이미지 결과와 클래스별 NMS로 합친다.
+#   off:  타일 탐지 안 함
+#   on:   항상 타일 탐지
+#   auto: 원본이 작업 해상도보다 DETECTION_TILE_MIN_DOWNSCALE배 이상 클 때만 타일 탐지
+TILING_MODES = ("off", "on", "auto")
+DETECTION_TILING = os.getenv("DETECTION_TILING", "off").lower()
+DETECTION_TILE_SIZE = int(os.getenv("DETECTION_TILE_SIZE", "800"))
+DETECTION_TILE_OVERLAP = float(os.getenv("DETECTION_TILE_OVERLAP", "0.2"))
+DETECTION_TILE_MAX_TILES = int(os.getenv("DETECTION_TILE_MAX_TILES", "6"))
+DETECTION_TILE_MIN_DOWNSCALE = float(os.getenv("DETECTION_TILE_MIN_DOWNSCALE", "2.5"))
+DETECTION_TILE_NMS_IOU = float(os.getenv("DETECTION_TILE_NMS_IOU", "0.5"))
+# 타일 안쪽 경계에서 이 거리(픽셀) 안에 닿은 상자는 잘린 객체로 보고 버림
+TILE_EDGE_MARGIN = 2
+
+
+def resolve_tiling(mode: Optional[str]) -> str:
+    """요청의 타일 모드 (None이면 DETECTION_TILING)"""
+    mode = (mode or DETECTION_TILING).lower()
+    if mode not in TILING_MODES:
+        raise ValueError(f"지원하지 않는 타일 모드입니다: {mode} (가능한 값: {', '.join(TILING_MODES)})")
+    return mode
+
+
+def tile_starts(length: int, tile: int = DETECTION_TILE_SIZE, overlap: float = DETECTION_TILE_OVERLAP) -> List[int]:
+    """한 축에서 타일 시작 위치 (양 끝 타일은 이미지 경계에 맞추고 사이는 균등 간격)"""
+    if length <= tile:
+        return [0]
+    stride = max(1, round(tile * (1 - overlap)))
+    count = math.ceil((length - tile) / stride) + 1
+    return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+
+def plan_tiles(size: Tuple[int, int]) -> List[Tuple[int, int, int, int]]:
+    """이미지를 덮는 겹치는 타일 목록 [(left, top, right, bottom)] (이미지보다 큰 축은 이미지 크기로 자름)"""
+    width, height = size
+    tile_width, tile_height = min(DETECTION_TILE_SIZE, width), min(DETECTION_TILE_SIZE, height)
+    return [
+        (left, top, left + tile_width, top + tile_height)
+        for top in tile_starts(height)
+        for left in tile_starts(width)
+    ]
+
+
+def tile_count(size: Tuple[int, int]) -> int:
+    width, height = size
+    return len(tile_starts(width)) * len(tile_starts(height))
+
+
+def tile_decode_size(original_size: Tuple[int, int]) -> Tuple[int, int]:
+    """타일 수가 DETECTION_TILE_MAX_TILES를 넘지 않는 가장 큰 디코딩 크기 (원본보다 크거나 작업 해상도보다 작지 않음)"""
+    width, height = original_size
+    min_scale = working_size(original_size)[0] / width
+    scale = 1.0
+    while scale > min_scale:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        if tile_count(size) <= DETECTION_TILE_MAX_TILES:
+            return size
+        scale *= 0.95
+    return working_size(original_size)
+
+
+def should_tile(original_size: Tuple[int, int], mode: str) -> bool:
+    """auto 모드는 일반 탐지가 원본 해상도를 DETECTION_TILE_MIN_DOWNSCALE배 이상 버릴 때만 타일 탐지"""
+    if mode != "auto":
+        return mode == "on"
+    return original_size[0] / working_size(original_size)[0] >= DETECTION_TILE_MIN_DOWNSCALE
@@ -1,30 +1,256 @@
 import os
-import io
-import torch
+import math
+import hashlib
+import time
+import asyncio
+import threading
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+from PIL import Image
 import numpy as np
-from PIL import Image, UnidentifiedImageError
-import requests
-from transformers import AutoModelForImageClassification, AutoImageProcessor
-from safetensors import safe_open
-
-from torchvision.models.detection import fasterrcnn_resnet50_fpn_v2, FasterRCNN_ResNet50_FPN_V2_Weights
-from torchvision.transforms import functional as F
 import logging
 
+# torch, torchvision, transformers는 가져오는 데만 수 초가 걸리므로 모델을 로드하는 시점에 가져온다
+# (앱은 모델이 준비되기 전에도 /healthz, /readyz와 LLM 요청을 처리할 수 있음)
+from app.services.image_fetcher import image_fetcher, FetchedImage
+from app.services.image_preprocess import siglip_pixel_values
+from app.services.result_cache import ResultCache, create_disk_backend
+from app.services.embedding_index import EmbeddingIndex, EMBEDDING_INDEX_ENABLED, EMBEDDING_INDEX_PATH
+from app.services.tiled_detection import (
+    DETECTION_TILE_MAX_TILES, DETECTION_TILE_NMS_IOU, DETECTION_TILE_OVERLAP, DETECTION_TILE_SIZE, TILE_EDGE_MARGIN,
+    plan_tiles, resolve_tiling, should_tile, tile_count, tile_decode_size,
+)
+from app.services.micro_batcher import MicroBatcher
+from app.services.metrics import observe_stage, registry, stage_timer
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 모델 가중치 캐시 설정 (true면 다운로드 없이 로컬 캐시만 사용)
+VISION_LOCAL_ONLY = os.getenv("VISION_LOCAL_ONLY", "false").lower() in ("1", "true", "yes")
+SIGLIP_MODEL_PATH = os.getenv("SIGLIP_MODEL_PATH", "./app/models/siglip")
+
+# 가중치 파일을 메모리 매핑해 같은 노드의 워커 프로세스끼리 공유 (uvicorn --workers N 배포용)
+# 파라미터가 파일 페이지를 그대로 가리키므로 워커 수만큼 모델 메모리가 늘지 않는다.
+# eager/compile 백엔드에서만 효과가 있고, int8/torchscript는 변환된 가중치를 워커마다 따로 만든다.
+VISION_MMAP_WEIGHTS = os.getenv("VISION_MMAP_WEIGHTS", "false").lower() in ("1", "true", "yes")
+
+# 추론 실행기 설정 (스레드 수가 0이면 torch 기본값 사용)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "16"))
+TORCH_INTRA_OP_THREADS = int(os.getenv("TORCH_INTRA_OP_THREADS", "0"))
+TORCH_INTER_OP_THREADS = int(os.getenv("TORCH_INTER_OP_THREADS", "0"))
+
+# 스타일 추출 마이크로 배칭 설정
+STYLE_BATCH_MAX_SIZE = int(os.getenv("STYLE_BATCH_MAX_SIZE", "16"))
+STYLE_BATCH_MAX_WAIT_MS = float(os.getenv("STYLE_BATCH_MAX_WAIT_MS", "10"))
+
+# 배치 객체 탐지 설정
+RCNN_BATCH_SIZE = int(os.getenv("RCNN_BATCH_SIZE", "4"))
+DETECT_BATCH_MAX_URLS = int(os.getenv("DETECT_BATCH_MAX_URLS", "64"))
+
+# 객체 탐지 후처리 설정
+# RCNN_BOX_SCORE_THRESH / RCNN_DETECTIONS_PER_IMG는 모델 내부 후처리(NMS) 전에 낮은 점수의 상자를 버려 연산을 줄이며,
+# 요청의 신뢰도 기준은 RCNN_BOX_SCORE_THRESH보다 낮출 수 없다. DETECTION_MAX_PER_CLASS가 0이면 클래스별 개수 제한 없음.
+DETECTION_SCORE_THRESHOLD = float(os.getenv("DETECTION_SCORE_THRESHOLD", "0.7"))
+DETECTION_MAX_PER_CLASS = int(os.getenv("DETECTION_MAX_PER_CLASS", "10"))
+RCNN_BOX_SCORE_THRESH = float(os.getenv("RCNN_BOX_SCORE_THRESH", "0.3"))
+RCNN_DETECTIONS_PER_IMG = int(os.getenv("RCNN_DETECTIONS_PER_IMG", "100"))
+
+# /api/vision/analyze에서 고를 수 있는 결과
+ANALYZE_FIELDS = ("styles", "objects", "embedding")
+
+# 모델 준비 설정 (워밍업은 더미 입력으로 한 번 추론해 메모리 할당과 커널 초기화를 미리 수행)
+VISION_WARMUP = os.getenv("VISION_WARMUP", "true").lower() in ("1", "true", "yes")
+VISION_NOT_READY_RETRY_AFTER = int(os.getenv("VISION_NOT_READY_RETRY_AFTER", "5"))
+
+
+def _module_bytes(module) -> int:
+    """모델 파라미터와 버퍼가 차지하는 메모리 (바이트)"""
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+def _elapsed_ms(start: float) -> float:
+    """perf_counter 기준 경과 시간(ms)"""
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+class InferenceQueueFullError(Exception):
+    """추론 대기열이 가득 찼을 때 발생 (503 응답으로 변환)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"추론 대기열이 가득 찼습니다. {retry_after}초 후 다시 시도해주세요")
+        self.retry_after = retry_after
+
+
+class ModelNotReadyError(Exception):
+    """요청에 필요한 모델이 아직 로드/워밍업 중이거나 로드에 실패했을 때 발생 (503 응답으로 변환)"""
+
+    def __init__(self, model: str, status: str, retry_after: int = VISION_NOT_READY_RETRY_AFTER):
+        if status == "failed":
+            message = f"{model} 모델을 로드하지 못했습니다. 서버 로그를 확인해주세요"
+        else:
+            message = f"{model} 모델을 준비하는 중입니다. {retry_after}초 후 다시 시도해주세요"
+        super().__init__(message)
+        self.model = model
+        self.status = status
+        self.retry_after = retry_after
+
+
+class EmbeddingIndexDisabledError(Exception):
+    """임베딩 색인이 꺼져 있거나 열지 못해 유사 검색을 할 수 없을 때 발생 (501 응답으로 변환)"""
+
+
+class InferenceExecutor:
+    """torch 추론 전용 스레드 풀: 이벤트 루프에서 모델을 실행하지 않도록 분리"""
+
+    def __init__(
+        self,
+        workers: int = INFERENCE_WORKERS,
+        max_queue: int = INFERENCE_MAX_QUEUE,
+        intra_op_threads: int = TORCH_INTRA_OP_THREADS,
+        inter_op_threads: int = TORCH_INTER_OP_THREADS,
+    ):
+        self._workers = max(1, workers)
+        self._max_pending = self._workers + max(0, max_queue)
+        self._intra_op_threads = intra_op_threads
+        self._inter_op_threads = inter_op_threads
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        # 작업 1건의 평균 소요 시간 (Retry-After 추정용 지수 이동 평균)
+        self._avg_seconds = 0.5
+
+    @property
+    def pending(self) -> int:
+        """실행 중이거나 대기 중인 작업 수"""
+        return self._pending
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """첫 작업 시 torch 스레드 설정 후 풀 생성"""
+        if self._pool is None:
+            import torch
+
+            if self._intra_op_threads > 0:
+                torch.set_num_threads(self._intra_op_threads)
+            if self._inter_op_threads > 0:
+                try:
+                    torch.set_num_interop_threads(self._inter_op_threads)
+                except RuntimeError as e:
+                    # 병렬 작업이 이미 시작된 뒤에는 변경할 수 없음
+                    logger.warning(f"inter-op 스레드 수 설정 실패: {str(e)}")
+            self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="inference")
+            logger.info(
+                f"추론 실행기 시작: workers={self._workers}, max_pending={self._max_pending}, "
+                f"intra_op={torch.get_num_threads()}, inter_op={torch.get_num_interop_threads()}"
+            )
+        return self._pool
+
+    def retry_after(self) -> int:
+        """대기열이 비워질 때까지 예상 시간(초)"""
+        return max(1, math.ceil(self._pending * self._avg_seconds / self._workers))
+
+    def _timed(self, fn: Callable, args: tuple):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable, *args):
+        """추론 함수를 스레드 풀에서 실행 (대기열이 가득 차면 즉시 거절)"""
+        with self._lock:
+            if self._pending >= self._max_pending:
+                raise InferenceQueueFullError(self.retry_after())
+            self._pending += 1
+
+        try:
+            future = self._get_pool().submit(self._timed, fn, args)
+        except Exception:
+            self._release(None)
+            raise
+        # 요청이 취소되어도 실제 작업이 끝날 때까지 대기열 수를 유지
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def run_blocking(self, fn: Callable, *args):
+        """대기열 제한 없이 추론 스레드에서 실행하고 결과를 기다림 (시작 시 워밍업용)"""
+        return self._get_pool().submit(fn, *args).result()
+
+    def shutdown(self):
+        """스레드 풀 종료"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
 class VisionService:
     """이미지 분석 서비스: 스타일 추출 및 객체 탐지"""
 
-    def __init__(self):
+    def __init__(self, inference_backend: Optional[str] = None):
         """모델 초기화"""
-        # 모델 로드는 첫 요청 시 지연 로드
+        # 모델은 start_background_load() 또는 warm_up()에서 로드
         self._siglip_model = None
         self._siglip_processor = None
+        self._siglip_forward = None
+        self._num_style_logits = 0
         self._rcnn_model = None
         self._rcnn_weights = None
+        self._rcnn_forward = None
+        self._interior_mask = None
+        self._model_bytes: Dict[str, int] = {}
+
+        # 추론 백엔드 (eager / int8 / torchscript / compile)
+        # None이면 VISION_INFERENCE_BACKEND를 쓰며, 검증은 모델 라이브러리를 가져올 때 수행
+        self._inference_backend = inference_backend
+
+        # 모델별 준비 상태 (pending -> loading -> warming -> ready, 실패 시 failed)
+        self._model_status: Dict[str, str] = {"siglip": "pending", "rcnn": "pending"}
+        self._model_errors: Dict[str, str] = {}
+        self._startup_timings: Dict[str, float] = {}
+        self._startup_started_at: Optional[float] = None
+        self.time_to_ready: Optional[float] = None
+        self._loader_thread: Optional[threading.Thread] = None
+
+        # 진행 중인 이미지 다운로드 (같은 URL 요청 합치기)
+        self._inflight_fetches: Dict[tuple, asyncio.Future] = {}
+
+        # 여러 추론 스레드가 동시에 모델을 로드하지 않도록 보호
+        self._load_lock = threading.Lock()
+
+        # 추론 전용 실행기
+        self._executor = InferenceExecutor()
+
+        # 스타일 추출 요청을 묶는 마이크로 배처
+        self._style_batcher = MicroBatcher(
+            self._run_style_batch,
+            max_batch_size=STYLE_BATCH_MAX_SIZE,
+            max_wait_ms=STYLE_BATCH_MAX_WAIT_MS,
+            max_concurrent_batches=INFERENCE_WORKERS,
+        )
+
+        # 결과 캐시 (이미지 내용 해시 + 모델 식별자 + 임계값 기준)
+        disk_cache = create_disk_backend()
+        self._result_cache = ResultCache("vision", disk=disk_cache)
+        # URL별 ETag/Last-Modified와 마지막 내용 해시
+        self._url_cache = ResultCache("url", disk=disk_cache)
+        # 스타일 추출 때 계산한 이미지 임베딩 색인 (SIGLIP 모델을 등록할 때 열림)
+        self._embedding_index: Optional[EmbeddingIndex] = None
+
+        # 결과 캐시 키와 백엔드 아티팩트에 쓰이는 모델 식별자
+        # (가중치나 백엔드가 바뀌면 이전 결과를 재사용하지 않음)
+        # (백엔드 이름이 앞에 붙으므로 모델을 등록할 때 확정)
+        self._siglip_file_identity = self._file_identity(os.path.join(SIGLIP_MODEL_PATH, "model.safetensors"))
+        self._siglip_identity: Optional[str] = None
+        self._rcnn_identity: Optional[str] = None
 
         # 캐시 디렉토리 설정
         self._cache_dir = os.path.expanduser("~/.cache/torch/hub")
@@ -54,20 +280,132 @@ class VisionService:
           "Mid-Century Modern", "Modern", "Rustic", "Scandinavian", "Shabby Chic",
            "Southwestern", "Traditional", "Tropical", "Victorian"]
 
+        self._register_metrics()
+
+    def _register_metrics(self):
+        """대기열 길이, 모델 메모리, 캐시 통계를 /metrics 수집 시점에 읽도록 등록"""
+        registry.gauge("hancut_inference_queue_pending", "추론 스레드 풀에서 실행 중이거나 대기 중인 작업 수", lambda: self._executor.pending)
+        registry.gauge("hancut_style_batch_queue_depth", "스타일 마이크로 배치에 합쳐지기를 기다리는 요청 수", lambda: self._style_batcher.queue_depth)
+        registry.gauge("hancut_image_fetches_in_flight", "진행 중인 이미지 다운로드 수", lambda: len(self._inflight_fetches))
+        registry.gauge(
+            "hancut_model_memory_bytes", "로드된 모델의 파라미터와 버퍼 크기",
+            lambda: {(name,): size for name, size in self._model_bytes.items()}, ("model",),
+        )
+        registry.gauge(
+            "hancut_model_ready", "모델 로드와 워밍업 완료 여부 (1=준비됨)",
+            lambda: {(name,): int(status == "ready") for name, status in self._model_status.items()}, ("model",),
+        )
+        registry.gauge("hancut_time_to_ready_seconds", "서버 시작부터 모든 모델이 준비될 때까지 걸린 시간", lambda: self.time_to_ready)
+        registry.gauge(
+            "hancut_embedding_index_rows", "임베딩 색인에 저장된 이미지 수",
+            lambda: len(self._embedding_index) if self._embedding_index is not None else 0,
+        )
+        registry.gauge(
+            "hancut_cache_lookups_total", "결과 캐시 조회 수", self._cache_lookups, ("cache", "result"), kind="counter",
+        )
+
+    def _cache_lookups(self) -> dict:
+        lookups = {}
+        for name, cache in (("vision", self._result_cache), ("url", self._url_cache)):
+            memory = cache.memory_stats()
+            lookups[(name, "hit")] = memory["hits"]
+            lookups[(name, "miss")] = memory["misses"]
+        return lookups
+
+    @staticmethod
+    def _file_identity(path: str) -> str:
+        """파일 크기와 수정 시각으로 만든 가벼운 식별자"""
+        try:
+            stat = os.stat(path)
+            return f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            return f"{os.path.basename(path)}:missing"
+
+    def _configure_style_head(self, config):
+        """분류 헤드 출력 중 스타일 후보에 대응하는 열 수를 미리 계산 (후보 순서 = 라벨 순서)"""
+        num_labels = config.num_labels
+        if num_labels != len(self._style_candidates):
+            logger.warning(
+                f"SIGLIP 라벨 수({num_labels})와 스타일 후보 수({len(self._style_candidates)})가 다릅니다. "
+                f"앞의 {min(num_labels, len(self._style_candidates))}개만 사용합니다"
+            )
+        self._num_style_logits = min(num_labels, len(self._style_candidates))
+
+    def _resolve_backend(self) -> str:
+        """추론 백엔드 모듈(torch 포함)을 가져오고 백엔드 이름 검증"""
+        from app.services.inference_backends import VISION_INFERENCE_BACKEND, validate_backend
+
+        self._inference_backend = validate_backend(self._inference_backend or VISION_INFERENCE_BACKEND)
+        return self._inference_backend
+
+    def _set_siglip_model(self, model):
+        """로드된 SIGLIP 모델에 추론 백엔드를 적용하고 서비스에 등록"""
+        from app.services.inference_backends import prepare_siglip
+
+        backend = self._resolve_backend()
+        self._siglip_identity = f"{backend}:{self._siglip_file_identity}"
+        self._configure_style_head(model.config)
+        self._siglip_forward = prepare_siglip(model, self._inference_backend, self._siglip_identity)
+        self._siglip_model = model
+        self._open_embedding_index()
+        self._model_bytes["siglip"] = _module_bytes(model)
+
+    def _set_rcnn_model(self, model):
+        """로드된 Faster R-CNN 모델에 추론 백엔드를 적용하고 서비스에 등록"""
+        from torchvision.models.detection import FasterRCNN_ResNet50_FPN_V2_Weights
+        from app.services.inference_backends import prepare_rcnn
+
+        if self._rcnn_weights is None:
+            self._rcnn_weights = FasterRCNN_ResNet50_FPN_V2_Weights.DEFAULT
+        # 점수가 낮은 상자는 모델 안에서 NMS 전에 버림 (스크립팅 전에 설정해야 아티팩트에 반영됨)
+        model.roi_heads.score_thresh = RCNN_BOX_SCORE_THRESH
+        model.roi_heads.detections_per_img = RCNN_DETECTIONS_PER_IMG
+        backend = self._resolve_backend()
+        # 후처리 설정이 바뀌면 캐시된 탐지 결과와 스크립팅 아티팩트를 재사용하지 않음
+        self._rcnn_identity = (
+            f"{backend}:{os.path.basename(self._rcnn_weights.url)}"
+            f":{RCNN_BOX_SCORE_THRESH}:{RCNN_DETECTIONS_PER_IMG}:{DETECTION_MAX_PER_CLASS}"
+        )
+        self._interior_mask = self._class_mask(self._interior_objects)
+        self._rcnn_forward = prepare_rcnn(model, self._inference_backend, self._rcnn_identity)
+        self._rcnn_model = model
+        self._model_bytes["rcnn"] = _module_bytes(model)
+
+    def _open_embedding_index(self):
+        """가중치 파일별 임베딩 색인 열기 (가중치가 바뀌면 임베딩을 비교할 수 없으므로 새 디렉토리)"""
+        if not EMBEDDING_INDEX_ENABLED or self._embedding_index is not None:
+            return
+        key = hashlib.sha1(self._siglip_file_identity.encode()).hexdigest()[:12]
+        try:
+            self._embedding_index = EmbeddingIndex(os.path.join(EMBEDDING_INDEX_PATH, key))
+            logger.info(f"임베딩 색인: {self._embedding_index.path} ({len(self._embedding_index)}행)")
+        except (OSError, ValueError) as e:
+            logger.error(f"임베딩 색인을 열 수 없어 유사 검색을 사용하지 않습니다: {str(e)}")
+
     def _load_siglip_model(self):
         """SIGLIP 모델 로드"""
-        if self._siglip_model is None:
+        if self._siglip_model is not None:
+            return
+        with self._load_lock:
+            if self._siglip_model is not None:
+                return
             print("SIGLIP 모델 로드 중...")
 
             try:
+                from transformers import AutoModelForImageClassification, AutoImageProcessor
+
                 # 모델 로드
-                model_path = "./app/models/siglip"
+                model_path = SIGLIP_MODEL_PATH
 
-                self._siglip_model = AutoModelForImageClassification.from_pretrained(
-                    model_path,
-                    config=model_path + "/config.json",
-                    cache_dir=self._cache_dir
-                )
+                start = time.perf_counter()
+                model = self._load_siglip_mmap(model_path) if VISION_MMAP_WEIGHTS else None
+                if model is None:
+                    model = AutoModelForImageClassification.from_pretrained(
+                        model_path,
+                        config=model_path + "/config.json",
+                        cache_dir=self._cache_dir
+                    )
+                logger.info(f"[startup] SIGLIP 역직렬화: {time.perf_counter() - start:.2f}s")
 
                 # 프로세서 로드
                 self._siglip_processor = AutoImageProcessor.from_pretrained(
@@ -75,164 +413,937 @@ class VisionService:
                     cache_dir=self._cache_dir
                 )
 
+                start = time.perf_counter()
+                model.eval()
+                logger.info(f"[startup] SIGLIP eval(): {time.perf_counter() - start:.2f}s")
+
+                self._set_siglip_model(model)
                 print("SIGLIP 모델 로드 완료")
             except Exception as e:
                 print(f"SIGLIP 모델 로드 중 오류 발생: {str(e)}")
                 raise e
 
+    @staticmethod
+    def _load_siglip_mmap(model_path: str):
+        """메모리 매핑한 safetensors 가중치로 SIGLIP 생성 (실패하면 None을 반환해 일반 로드로 대체)"""
+        from transformers import AutoConfig, AutoModelForImageClassification
+        from app.services.shared_weights import build_with_weights, load_safetensors_mmap
+
+        try:
+            config = AutoConfig.from_pretrained(model_path + "/config.json")
+            state_dict = load_safetensors_mmap(os.path.join(model_path, "model.safetensors"))
+            return build_with_weights(lambda: AutoModelForImageClassification.from_config(config), state_dict)
+        except Exception as e:
+            logger.warning(f"SIGLIP 가중치를 메모리 매핑으로 로드하지 못해 일반 로드로 대체합니다: {str(e)}")
+            return None
+
+    def _verify_checkpoint(self, path: str, hash_prefix: str) -> bool:
+        """캐시된 체크포인트가 torchvision이 제공한 SHA256 접두사와 일치하는지 확인
+
+        검증에 성공하면 파일 크기와 수정 시각을 옆 파일에 기록해 두고,
+        파일이 바뀌지 않았다면 다음 시작 시 전체 해시 계산을 건너뛴다.
+        """
+        marker = path + ".verified"
+        stat = os.stat(path)
+        signature = f"{hash_prefix}:{stat.st_size}:{stat.st_mtime_ns}"
+        if os.path.exists(marker):
+            with open(marker) as f:
+                if f.read() == signature:
+                    return True
+
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        if not sha256.hexdigest().startswith(hash_prefix):
+            return False
+
+        with open(marker, "w") as f:
+            f.write(signature)
+        return True
+
+    def _ensure_rcnn_checkpoint(self) -> str:
+        """검증된 Faster R-CNN 체크포인트 경로 반환 (없거나 손상된 경우에만 다운로드)"""
+        checkpoints_dir = os.path.join(self._cache_dir, "checkpoints")
+        os.makedirs(checkpoints_dir, exist_ok=True)
+
+        import torch
+
+        model_url = self._rcnn_weights.url
+        filename = os.path.basename(model_url)
+        cached_file = os.path.join(checkpoints_dir, filename)
+        match = torch.hub.HASH_REGEX.search(filename)
+        hash_prefix = match.group(1) if match else None
+
+        if os.path.exists(cached_file):
+            if hash_prefix is None or self._verify_checkpoint(cached_file, hash_prefix):
+                logger.info(f"캐시된 체크포인트 사용: {cached_file}")
+                return cached_file
+            logger.warning(f"체크포인트 해시 불일치, 손상된 파일을 삭제합니다: {cached_file}")
+            self._remove_checkpoint(cached_file)
+
+        if VISION_LOCAL_ONLY:
+            raise FileNotFoundError(f"로컬 전용 모드에서 체크포인트를 찾을 수 없습니다: {cached_file}")
+
+        # 임시 파일로 받은 뒤 해시가 맞을 때만 제자리로 이동 (동시 시작한 워커끼리 안전)
+        start = time.perf_counter()
+        torch.hub.download_url_to_file(model_url, cached_file, hash_prefix=hash_prefix, progress=False)
+        logger.info(f"[startup] Faster R-CNN 다운로드: {time.perf_counter() - start:.2f}s")
+        if hash_prefix is not None:
+            self._verify_checkpoint(cached_file, hash_prefix)
+        return cached_file
+
+    @staticmethod
+    def _remove_checkpoint(path: str):
+        """체크포인트와 검증 기록 삭제"""
+        for target in (path, path + ".verified"):
+            if os.path.exists(target):
+                os.remove(target)
+
     def _load_rcnn_model(self):
         """Faster R-CNN 모델 로드"""
-        if self._rcnn_model is None:
+        if self._rcnn_model is not None:
+            return
+        with self._load_lock:
+            if self._rcnn_model is not None:
+                return
             logger.info("Faster R-CNN 모델 로드 중...")
-            try:
-                print("모델 초기화 중...")
+            import torch
+            from torchvision.models.detection import fasterrcnn_resnet50_fpn_v2, FasterRCNN_ResNet50_FPN_V2_Weights
 
-                # 캐시 디렉토리 확인
-                checkpoints_dir = os.path.join(self._cache_dir, "checkpoints")
-                os.makedirs(checkpoints_dir, exist_ok=True)
+            self._rcnn_weights = FasterRCNN_ResNet50_FPN_V2_Weights.DEFAULT
 
-                # 캐시 파일 경로 설정
-                self._rcnn_weights = FasterRCNN_ResNet50_FPN_V2_Weights.DEFAULT
-                model_url = self._rcnn_weights.url
-                filename = os.path.basename(model_url)
-                cached_file = os.path.join(checkpoints_dir, filename)
+            for attempt in range(2):
+                cached_file = self._ensure_rcnn_checkpoint()
+                try:
+                    start = time.perf_counter()
+                    num_classes = len(self._rcnn_weights.meta["categories"])
+                    if VISION_MMAP_WEIGHTS:
+                        from app.services.shared_weights import build_with_weights, load_checkpoint_mmap
 
-                # 기존 캐시 파일이 존재하면 삭제 (손상된 파일일 수 있음)
-                if os.path.exists(cached_file):
-                    print(f"기존 캐시 파일 삭제 중: {cached_file}")
-                    os.remove(cached_file)
+                        model = build_with_weights(
+                            lambda: fasterrcnn_resnet50_fpn_v2(weights=None, weights_backbone=None, num_classes=num_classes),
+                            load_checkpoint_mmap(cached_file),
+                        )
+                    else:
+                        state_dict = torch.load(cached_file, map_location="cpu", weights_only=True)
+                        model = fasterrcnn_resnet50_fpn_v2(
+                            weights=None,
+                            weights_backbone=None,
+                            num_classes=num_classes,
+                        )
+                        model.load_state_dict(state_dict)
+                    logger.info(f"[startup] Faster R-CNN 역직렬화: {time.perf_counter() - start:.2f}s")
+                    break
+                except Exception as e:
+                    # 해시 검증을 통과했더라도 읽을 수 없는 파일이면 한 번만 복구 시도
+                    logger.error(f"Faster R-CNN 체크포인트 로드 실패: {str(e)}")
+                    self._remove_checkpoint(cached_file)
+                    if attempt == 1 or VISION_LOCAL_ONLY:
+                        raise
 
-                # 모델 생성
-                self._rcnn_model = fasterrcnn_resnet50_fpn_v2(weights=self._rcnn_weights)
-                self._rcnn_model.eval()
+            start = time.perf_counter()
+            model.eval()
+            logger.info(f"[startup] Faster R-CNN eval(): {time.perf_counter() - start:.2f}s")
 
-                print("Faster R-CNN 모델 로드 완료")
-            except Exception as e:
-                print(f"Faster R-CNN 모델 로드 중 오류 발생: {str(e)}")
-                print(f"현재 캐시 디렉토리 내용: {os.listdir(self._cache_dir)}")
+            self._set_rcnn_model(model)
+            print("Faster R-CNN 모델 로드 완료")
 
-                # 두 번째 방법으로 시도 (직접 가중치 로딩)
-                try:
-                    print("대체 방법으로 모델 로드 시도 중...")
-                    self._rcnn_model = fasterrcnn_resnet50_fpn_v2(pretrained=False)
-                    self._rcnn_weights = FasterRCNN_ResNet50_FPN_V2_Weights.DEFAULT
-                    self._rcnn_model.eval()
-                    print("Faster R-CNN 모델 로드 완료 (대체 방법)")
-                except Exception as fallback_error:
-                    print(f"대체 방법 실패: {str(fallback_error)}")
-                    raise e
-
-    async def _load_image_from_url(self, image_url: str) -> Image.Image:
-        """URL에서 이미지 로드"""
-        try:
-            logger.info(f"이미지 다운로드 시도: {image_url}")
-            response = requests.get(image_url)
-            response.raise_for_status()
+    def _warm_up_siglip(self):
+        """더미 이미지로 SIGLIP 전처리와 추론을 한 번 실행 (추론 스레드에서 실행)"""
+        import torch
+
+        pixel_values = siglip_pixel_values([Image.new("RGB", (640, 480))], self._siglip_processor)
+        with torch.no_grad():
+            self._siglip_forward(pixel_values)
 
-            # 이미지 데이터 확인
-            image_data = response.content
-            logger.info(f"다운로드 완료: {len(image_data)} 바이트")
+    def _warm_up_rcnn(self):
+        """더미 이미지로 Faster R-CNN 추론을 한 번 실행 (추론 스레드에서 실행)"""
+        import torch
 
-            # 이미지 열기 전 파일 헤더 체크 (간단한 검증)
-            if len(image_data) < 10:
-                logger.error(f"이미지 데이터가 너무 작음: {len(image_data)} 바이트")
-                raise ValueError("이미지 데이터가 유효하지 않습니다")
+        x = [self._rcnn_weights.transforms()(Image.new("RGB", (640, 480)))]
+        with torch.no_grad():
+            self._rcnn_forward(x)
 
-            # BytesIO로 변환하여 PIL로 열기
-            image_bytes = io.BytesIO(image_data)
+    def warm_up(self, models: Tuple[str, ...] = ("siglip", "rcnn"), warm: bool = VISION_WARMUP):
+        """모델을 로드하고 워밍업한 뒤 요청을 받을 수 있는 상태로 표시
+
+        모델별로 독립적으로 준비되므로 SIGLIP이 먼저 준비되면 스타일 추출부터 처리할 수 있다.
+        로드에 실패한 모델은 failed로 남고, 그 모델이 필요한 요청은 503으로 거절된다.
+        """
+        steps = {
+            "siglip": (self._load_siglip_model, self._warm_up_siglip),
+            "rcnn": (self._load_rcnn_model, self._warm_up_rcnn),
+        }
+        for name in models:
+            load, warm_up = steps[name]
             try:
-                image = Image.open(image_bytes).convert("RGB")
-                logger.info(f"이미지 로드 성공: {image.format}, {image.size}")
-                return image
-            except UnidentifiedImageError as img_err:
-                logger.error(f"이미지 형식 인식 불가: {str(img_err)}")
-                # 이미지 형식 문제라면 더 자세한 로그 남기기
-                header_bytes = image_data[:20]
-                hex_header = ' '.join([f'{b:02x}' for b in header_bytes])
-                logger.error(f"이미지 헤더 (hex): {hex_header}")
-                raise ValueError(f"이미지 형식을 인식할 수 없습니다: {str(img_err)}")
-
-        except requests.RequestException as req_err:
-            logger.error(f"이미지 다운로드 중 요청 오류: {str(req_err)}")
-            raise ValueError(f"이미지 URL에 접근할 수 없습니다: {str(req_err)}")
+                self._model_status[name] = "loading"
+                start = time.perf_counter()
+                load()
+                self._startup_timings[f"{name}_load"] = round(time.perf_counter() - start, 2)
+
+                if warm:
+                    self._model_status[name] = "warming"
+                    start = time.perf_counter()
+                    # 추론 스레드에서 실행해 torch 스레드 설정이 첫 추론보다 먼저 적용되도록 함
+                    self._executor.run_blocking(warm_up)
+                    self._startup_timings[f"{name}_warmup"] = round(time.perf_counter() - start, 2)
+                self._model_status[name] = "ready"
+            except Exception as e:
+                self._model_status[name] = "failed"
+                self._model_errors[name] = str(e)
+                logger.error(f"{name} 모델 준비 실패: {str(e)}")
+
+    def _load_in_background(self):
+        start = time.perf_counter()
+        import torch, torchvision, transformers  # noqa: F401
+        self._startup_timings["import"] = round(time.perf_counter() - start, 2)
+        logger.info(f"[startup] torch/torchvision/transformers 임포트: {self._startup_timings['import']:.2f}s")
+
+        self.warm_up()
+        if self.is_ready():
+            self.time_to_ready = round(time.perf_counter() - self._startup_started_at, 2)
+            logger.info(f"[startup] 모델 준비 완료: {self.time_to_ready:.2f}s {self._startup_timings}")
+
+    def start_background_load(self):
+        """모델 로드와 워밍업을 백그라운드 스레드에서 시작 (서버는 바로 요청을 받음)"""
+        if self._loader_thread is not None:
+            return
+        self._startup_started_at = time.perf_counter()
+        self._loader_thread = threading.Thread(target=self._load_in_background, name="model-loader", daemon=True)
+        self._loader_thread.start()
+
+    def is_ready(self, model: Optional[str] = None) -> bool:
+        """모델(기본값: 전체)이 로드와 워밍업을 마쳤는지"""
+        models = [model] if model else list(self._model_status)
+        return all(self._model_status[name] == "ready" for name in models)
+
+    def _require_ready(self, model: str):
+        """모델이 준비되지 않았으면 기다리지 않고 ModelNotReadyError"""
+        status = self._model_status[model]
+        if status != "ready":
+            raise ModelNotReadyError(model, status)
+
+    def readiness(self) -> dict:
+        """/readyz 응답: 모델별 상태, 단계별 소요 시간(초), 준비까지 걸린 시간"""
+        elapsed = None
+        if self._startup_started_at is not None:
+            elapsed = round(time.perf_counter() - self._startup_started_at, 2)
+        return {
+            "ready": self.is_ready(),
+            "models": dict(self._model_status),
+            "errors": dict(self._model_errors),
+            "timings": dict(self._startup_timings),
+            "time_to_ready_seconds": self.time_to_ready,
+            "elapsed_seconds": elapsed,
+        }
+
+    async def fetch_image(self, image_url: str, conditional: bool = True) -> FetchedImage:
+        """URL에서 이미지 로드 (같은 URL을 동시에 요청하면 다운로드와 디코딩은 한 번만 수행)"""
+        key = (image_url, conditional)
+        task = self._inflight_fetches.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_image(image_url, conditional))
+            self._inflight_fetches[key] = task
+            task.add_done_callback(lambda _: self._inflight_fetches.pop(key, None))
+        # 한 요청자가 취소되어도 같은 다운로드를 기다리는 다른 요청자에게는 영향이 없도록 보호
+        return await asyncio.shield(task)
+
+    async def fetch_images(self, image_urls: List[Optional[str]]) -> Dict[str, object]:
+        """여러 URL을 동시에 로드 (중복 URL은 한 번만, 결과는 URL별 FetchedImage 또는 예외)"""
+        unique_urls = list(dict.fromkeys(url for url in image_urls if url))
+        loaded = await asyncio.gather(
+            *[self.fetch_image(url) for url in unique_urls],
+            return_exceptions=True,
+        )
+        return dict(zip(unique_urls, loaded))
+
+    async def _fetch_image(self, image_url: str, conditional: bool) -> FetchedImage:
+        """URL에서 이미지 로드 (이전에 받은 ETag/Last-Modified가 있으면 조건부 요청)"""
+        validators = await self._url_cache.get(image_url) if conditional else None
+        try:
+            logger.debug(f"이미지 다운로드 시도: {image_url}")
+            if validators is not None:
+                fetched = await image_fetcher.fetch(
+                    image_url,
+                    etag=validators.get("etag"),
+                    last_modified=validators.get("last_modified"),
+                )
+                if fetched.not_modified:
+                    # 변경 없음: 이전 내용 해시로 결과 캐시를 조회할 수 있음
+                    fetched.content_hash = validators["content_hash"]
+                    return fetched
+            else:
+                fetched = await image_fetcher.fetch(image_url)
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"이미지 로드 중 예상치 못한 오류: {str(e)}")
             raise ValueError(f"이미지 로드 실패: {str(e)}")
 
+        if fetched.etag or fetched.last_modified:
+            self._url_cache.set(image_url, {
+                "etag": fetched.etag,
+                "last_modified": fetched.last_modified,
+                "content_hash": fetched.content_hash,
+            })
+        return fetched
+
+    async def _ensure_decoded(self, fetched: FetchedImage) -> FetchedImage:
+        """결과 캐시에 없어 픽셀이 필요할 때 호출
+
+        업로드는 받아 둔 바이트를 디코딩하고, 304 응답이었던 URL은 조건 없이 다시 다운로드한다.
+        """
+        if fetched.image is not None:
+            return fetched
+        if fetched.decode is not None:
+            fetched.image = await fetched.decode()
+            return fetched
+        return await self.fetch_image(fetched.url, conditional=False)
+
+    def _style_cache_key(self, content_hash: str) -> str:
+        return f"style:{self._siglip_identity}:{content_hash}"
+
+    def _detection_cache_key(self, content_hash: str) -> str:
+        return f"detect:{self._rcnn_identity}:{content_hash}"
+
+    def _tiled_detection_cache_key(self, content_hash: str) -> str:
+        tiling = f"{DETECTION_TILE_SIZE}-{DETECTION_TILE_OVERLAP}-{DETECTION_TILE_MAX_TILES}-{DETECTION_TILE_NMS_IOU}"
+        return f"detect-tiled:{self._rcnn_identity}:{tiling}:{content_hash}"
+
+    def _predict_styles(self, images: List[Image.Image]) -> List[dict]:
+        """SIGLIP 배치 추론 (추론 스레드에서 실행)"""
+        import torch
+
+        self._load_siglip_model()
+
+        # SIGLIP 입력 준비 (이미지 분류 모델이므로 이미지 입력만 사용)
+        with stage_timer("siglip_preprocess"):
+            pixel_values = siglip_pixel_values(images, self._siglip_processor)
+
+        # 이미지 인코더 + 분류 헤드 (스타일별 가중치와의 행렬곱)만 실행
+        with stage_timer("siglip_forward"), torch.no_grad():
+            logits, embeddings = self._siglip_forward(pixel_values)
+            probs = torch.sigmoid(logits[:, :self._num_style_logits])
+
+        # 이미지별 상위 3개 스타일 추출
+        top_probs, top_indices = torch.topk(probs, k=3, dim=-1)
+        results = [
+            {
+                "styles": [self._style_candidates[idx] for idx in indices],
+                "probabilities": [round(prob, 4) for prob in row_probs],
+                # 결과 캐시에는 넣지 않고 임베딩 색인에 저장
+                "embedding": embedding,
+            }
+            for indices, row_probs, embedding in zip(top_indices.tolist(), top_probs.tolist(), embeddings.float().numpy())
+        ]
+        logger.debug(f"상위 3개 스타일: {[result['styles'] for result in results]}")
+
+        return results
+
+    def _class_mask(self, labels: List[str]):
+        """COCO 클래스 id -> 포함 여부 불리언 텐서"""
+        import torch
+
+        mask = torch.zeros(len(self._coco_labels), dtype=torch.bool)
+        mask[[self._coco_labels.index(label) for label in labels]] = True
+        return mask
+
+    def _parse_detections(self, prediction: dict, image_size: Tuple[int, int]) -> list:
+        """모델 출력 1건에서 인테리어 객체만 추출 (텐서 연산으로 필터링 후 한 번에 파이썬 값으로 변환)
+
+        점수 내림차순이며, 요청별 기준을 적용하기 전의 결과라 결과 캐시에 그대로 저장한다.
+        box는 이미지 크기에 대한 비율 좌표 [x1, y1, x2, y2]다.
+        """
+        import torch
+
+        labels, scores, boxes = prediction["labels"], prediction["scores"], prediction["boxes"]
+        keep = self._interior_mask[labels] & (scores >= RCNN_BOX_SCORE_THRESH)
+        labels, scores, boxes = labels[keep], scores[keep], boxes[keep]
+
+        order = torch.argsort(scores, descending=True)
+        labels, scores, boxes = labels[order], scores[order], boxes[order]
+        if DETECTION_MAX_PER_CLASS > 0:
+            # 클래스 안에서의 순위(1부터)로 클래스별 상위 k개만 남김
+            rank = (labels.unsqueeze(0) == labels.unsqueeze(1)).tril().sum(dim=1)
+            keep = rank <= DETECTION_MAX_PER_CLASS
+            labels, scores, boxes = labels[keep], scores[keep], boxes[keep]
+
+        width, height = image_size
+        boxes = boxes / boxes.new_tensor([width, height, width, height])
+        return [
+            {"label": self._coco_labels[label], "confidence": score, "box": [round(v, 4) for v in box]}
+            for label, score, box in zip(labels.tolist(), scores.tolist(), boxes.tolist())
+        ]
+
+    @staticmethod
+    def select_detections(objects: list, score_threshold: Optional[float] = None, max_per_class: Optional[int] = None) -> list:
+        """캐시된 탐지 결과(점수 내림차순)에 요청별 신뢰도 기준과 클래스별 개수 제한 적용"""
+        threshold = max(DETECTION_SCORE_THRESHOLD if score_threshold is None else score_threshold, RCNN_BOX_SCORE_THRESH)
+        limit = max_per_class or DETECTION_MAX_PER_CLASS
+        if DETECTION_MAX_PER_CLASS > 0:
+            limit = min(limit, DETECTION_MAX_PER_CLASS)
+
+        selected = []
+        counts: Dict[str, int] = {}
+        for obj in objects:
+            if obj["confidence"] < threshold:
+                break
+            if limit and counts.get(obj["label"], 0) >= limit:
+                continue
+            counts[obj["label"]] = counts.get(obj["label"], 0) + 1
+            selected.append(obj)
+        return selected
+
+    @staticmethod
+    def label_counts(objects: list) -> Dict[str, int]:
+        """라벨별 객체 수 (처음 나온 순서 유지)"""
+        counts: Dict[str, int] = {}
+        for obj in objects:
+            counts[obj["label"]] = counts.get(obj["label"], 0) + 1
+        return counts
+
+    def _predict_objects_batch(self, images: List[Image.Image]) -> List[list]:
+        """Faster R-CNN 배치 추론 (추론 스레드에서 실행)"""
+        import torch
+
+        self._load_rcnn_model()
+
+        # 이미지 전처리
+        with stage_timer("rcnn_preprocess"):
+            transform = self._rcnn_weights.transforms()
+            x = [transform(image) for image in images]
+
+        # 객체 탐지
+        with stage_timer("rcnn_forward"), torch.no_grad():
+            predictions = self._rcnn_forward(x)
+
+        # 결과 파싱
+        return [self._parse_detections(prediction, image.size) for prediction, image in zip(predictions, images)]
+
+    def _predict_objects(self, image: Image.Image) -> list:
+        """Faster R-CNN 단일 이미지 추론 (추론 스레드에서 실행)"""
+        return self._predict_objects_batch([image])[0]
+
+    def _predict_objects_tiled(self, image: Image.Image, whole_objects: list) -> list:
+        """겹치는 타일을 한 배치로 추론해 전체 이미지 탐지 결과와 클래스별 NMS로 합침 (추론 스레드에서 실행)
+
+        타일 안쪽 경계에 닿은 상자는 잘린 객체일 가능성이 높아 버린다. 겹침보다 작은 객체는 옆 타일에서
+        온전히 보이고, 타일보다 큰 객체는 전체 이미지 결과에 있다.
+        """
+        import torch
+        from torchvision.ops import batched_nms
+
+        self._load_rcnn_model()
+        width, height = image.size
+        tiles = plan_tiles(image.size)
+
+        with stage_timer("rcnn_preprocess"):
+            transform = self._rcnn_weights.transforms()
+            x = [transform(image.crop(tile)) for tile in tiles]
+
+        with stage_timer("rcnn_tiles_forward"), torch.no_grad():
+            predictions = self._rcnn_forward(x)
+
+        boxes, labels, scores = [], [], []
+        for (left, top, right, bottom), prediction in zip(tiles, predictions):
+            tile_boxes = prediction["boxes"]
+            cut = torch.zeros(len(tile_boxes), dtype=torch.bool)
+            if left > 0:
+                cut |= tile_boxes[:, 0] <= TILE_EDGE_MARGIN
+            if top > 0:
+                cut |= tile_boxes[:, 1] <= TILE_EDGE_MARGIN
+            if right < width:
+                cut |= tile_boxes[:, 2] >= right - left - TILE_EDGE_MARGIN
+            if bottom < height:
+                cut |= tile_boxes[:, 3] >= bottom - top - TILE_EDGE_MARGIN
+            boxes.append(tile_boxes[~cut] + tile_boxes.new_tensor([left, top, left, top]))
+            labels.append(prediction["labels"][~cut])
+            scores.append(prediction["scores"][~cut])
+
+        if whole_objects:
+            # 비율 좌표를 타일 디코딩 크기의 픽셀 좌표로 되돌림
+            boxes.append(torch.tensor([obj["box"] for obj in whole_objects]) * torch.tensor([width, height, width, height]))
+            labels.append(torch.tensor([self._coco_labels.index(obj["label"]) for obj in whole_objects]))
+            scores.append(torch.tensor([obj["confidence"] for obj in whole_objects]))
+
+        boxes, labels, scores = torch.cat(boxes), torch.cat(labels), torch.cat(scores)
+        keep = batched_nms(boxes, scores, labels, DETECTION_TILE_NMS_IOU)
+        return self._parse_detections({"boxes": boxes[keep], "labels": labels[keep], "scores": scores[keep]}, image.size)
+
+    @staticmethod
+    def _bucket_by_shape(indexed_images: List[Tuple[int, Image.Image]], batch_size: int) -> List[list]:
+        """종횡비가 비슷한 이미지끼리 묶어 배치 내 패딩 낭비를 줄임"""
+        buckets: Dict[int, list] = {}
+        for index, image in indexed_images:
+            width, height = image.size
+            # 1/4 옥타브 단위의 종횡비 구간
+            key = round(math.log2(width / height) * 4)
+            buckets.setdefault(key, []).append((index, image))
+
+        chunks = []
+        for key in sorted(buckets):
+            items = sorted(buckets[key], key=lambda item: item[1].size[0] * item[1].size[1])
+            chunks.extend(items[i:i + batch_size] for i in range(0, len(items), batch_size))
+        return chunks
+
+    async def _run_style_batch(self, images: List[Image.Image]) -> List[dict]:
+        """마이크로 배처가 모은 이미지를 한 번에 추론"""
+        return await self._executor.run(self._predict_styles, images)
+
+    async def _style_result_from_image(self, image: Image.Image) -> dict:
+        """스타일과 확률 계산 (동시 요청은 배치로 묶임)"""
+        # 배치 대기열도 추론 대기열과 같은 기준으로 제한
+        if self._style_batcher.queue_depth >= STYLE_BATCH_MAX_SIZE * INFERENCE_MAX_QUEUE:
+            raise InferenceQueueFullError(self._executor.retry_after())
+        return await self._style_batcher.submit(image)
+
+    async def extract_style_from_image(self, image: Image.Image) -> list:
+        """디코딩된 이미지의 스타일 키워드 추출"""
+        self._require_ready("siglip")
+        result = await self._style_result_from_image(image)
+        return result["styles"]
+
+    async def style_from_fetched(self, fetched: FetchedImage) -> list:
+        """내용 해시 기반 결과 캐시를 거쳐 스타일 키워드 추출"""
+        key = self._style_cache_key(fetched.content_hash)
+        cached = await self._result_cache.get(key)
+        if cached is not None:
+            return cached["styles"]
+
+        self._require_ready("siglip")
+        result, _ = await self._infer_style_from_fetched(fetched)
+        return result["styles"]
+
+    async def _infer_style_from_fetched(self, fetched: FetchedImage) -> Tuple[dict, np.ndarray]:
+        """스타일 추론 후 결과 캐시와 임베딩 색인에 저장 (결과, 임베딩 반환)"""
+        fetched = await self._ensure_decoded(fetched)
+        result = dict(await self._style_result_from_image(fetched.image))
+        embedding = result.pop("embedding")
+        self._result_cache.set(self._style_cache_key(fetched.content_hash), result)
+        if self._embedding_index is not None:
+            try:
+                await asyncio.to_thread(
+                    self._embedding_index.add,
+                    [fetched.content_hash], embedding[None], [{"source": fetched.url, "styles": result["styles"]}],
+                )
+            except (OSError, ValueError) as e:
+                logger.error(f"임베딩 저장 실패: {str(e)}")
+        return result, embedding
+
+    async def similar_from_fetched(self, fetched: FetchedImage, k: int = 10) -> List[dict]:
+        """이전에 본 이미지 중 임베딩이 가장 가까운 k개 (자기 자신 제외, score는 코사인 유사도)"""
+        if self._embedding_index is None:
+            raise EmbeddingIndexDisabledError("임베딩 색인이 비활성화되어 있습니다 (EMBEDDING_INDEX_ENABLED)")
+        embedding = await asyncio.to_thread(self._embedding_index.vector, fetched.content_hash)
+        if embedding is None:
+            # 처음 보는 이미지는 스타일 추론으로 임베딩을 구하고 색인에 추가
+            _, embedding = await self._infer_style_from_fetched(fetched)
+
+        start = time.perf_counter()
+        matches = await asyncio.to_thread(self._embedding_index.search, embedding, k, fetched.content_hash)
+        observe_stage("embedding_search", time.perf_counter() - start)
+        return matches
+
+    async def find_similar(self, image_url: str, k: int = 10) -> List[dict]:
+        """이미지 URL과 비슷한 이전 인테리어 이미지 검색"""
+        self._require_ready("siglip")
+        fetched = await self.fetch_image(image_url)
+        return await self.similar_from_fetched(fetched, k)
+
+    async def objects_from_fetched(
+        self, fetched: FetchedImage, score_threshold: Optional[float] = None, max_per_class: Optional[int] = None,
+        tiling: Optional[str] = None,
+    ) -> list:
+        """내용 해시 기반 결과 캐시를 거쳐 객체 탐지 (신뢰도 기준과 클래스별 개수 제한은 캐시 이후에 적용)
+
+        tiling은 타일 탐지 모드(off/on/auto, None이면 DETECTION_TILING)다.
+        """
+        mode = resolve_tiling(tiling)
+        if mode == "off":
+            objects = await self._whole_objects_from_fetched(fetched)
+        else:
+            objects = await self._tiled_objects_from_fetched(fetched, mode)
+        return self.select_detections(objects, score_threshold, max_per_class)
+
+    async def _whole_objects_from_fetched(self, fetched: FetchedImage) -> list:
+        """작업 해상도 이미지 한 장으로 탐지 (결과 캐시 사용)"""
+        cached = await self._result_cache.get(self._detection_cache_key(fetched.content_hash))
+        if cached is not None:
+            return cached
+
+        self._require_ready("rcnn")
+        fetched = await self._ensure_decoded(fetched)
+        objects = await self._executor.run(self._predict_objects, fetched.image)
+        self._result_cache.set(self._detection_cache_key(fetched.content_hash), objects)
+        return objects
+
+    async def _tiled_objects_from_fetched(self, fetched: FetchedImage, mode: str) -> list:
+        """전체 이미지 탐지에 원본을 더 크게 디코딩한 타일 탐지를 더한 결과
+
+        타일이 필요 없는 이미지(auto 기준 미달이거나 타일 한 장이면 덮이는 작은 이미지)는 전체 이미지 결과를 쓴다.
+        원본 크기를 함께 캐시해 두어 다음 요청은 디코딩 없이 판단한다.
+        """
+        def wants_tiles(original_size: Tuple[int, int]) -> bool:
+            return should_tile(original_size, mode) and tile_count(tile_decode_size(original_size)) > 1
+
+        key = self._tiled_detection_cache_key(fetched.content_hash)
+        cached = await self._result_cache.get(key)
+        if cached is not None:
+            if not wants_tiles(tuple(cached["original_size"])):
+                return await self._whole_objects_from_fetched(fetched)
+            if cached["objects"] is not None:
+                return cached["objects"]
+
+        self._require_ready("rcnn")
+        fetched = await self._ensure_decoded(fetched)
+        whole_objects = await self._whole_objects_from_fetched(fetched)
+        original_size = fetched.image.info.get("original_size", fetched.image.size)
+        if not wants_tiles(original_size):
+            if cached is None:
+                self._result_cache.set(key, {"original_size": list(original_size), "objects": None})
+            return whole_objects
+
+        # 작업 해상도로 줄인 이미지 대신 원본을 타일 수에 맞는 크기로 다시 디코딩
+        image = fetched.image
+        size = tile_decode_size(original_size)
+        if fetched.decode_at is not None and size != image.size:
+            image = await fetched.decode_at(size)
+        objects = await self._executor.run(self._predict_objects_tiled, image, whole_objects)
+        self._result_cache.set(key, {"original_size": list(original_size), "objects": objects})
+        return objects
+
     async def extract_style(self, image_url: str) -> list:
         """이미지에서 스타일 키워드 추출"""
-        print("extract_style 실행됨")
+        # 모델이 준비되지 않았으면 이미지를 받기 전에 거절
+        self._require_ready("siglip")
         try:
-            # SIGLIP 모델 로드
-            self._load_siglip_model()
-
             # 이미지 로드
-            image = await self._load_image_from_url(image_url)
-
-            # 스타일 텍스트 프롬프트 생성
-            style_texts = [f"This is a photo of {style} style interior." for style in self._style_candidates]
-
-            # SIGLIP 입력 준비
-            logger.info("SIGLIP 모델에 입력 준비 중...")
-            inputs = self._siglip_processor(
-                text=style_texts,
-                images=image,
-                return_tensors="pt",
-                padding="max_length"
-            )
-
-            # 이미지와 텍스트 임베딩 계산
-            logger.info("모델 예측 시작...")
-            with torch.no_grad():
-                outputs = self._siglip_model(**inputs)
-                logits = outputs.logits  # logits 속성 사용
-                probs = torch.sigmoid(logits)
+            fetched = await self.fetch_image(image_url)
 
-            # 상위 3개 스타일 추출
-            top_probs, top_indices = torch.topk(probs[0], k=3)
-            top_styles = [self._style_candidates[idx.item()] for idx in top_indices]
-            logger.info(f"상위 3개 스타일: {top_styles}")
-
-            return top_styles
+            # 모델 추론은 추론 스레드 풀에서 배치로 실행
+            return await self.style_from_fetched(fetched)
 
+        except (InferenceQueueFullError, ModelNotReadyError):
+            raise
         except Exception as e:
             logger.error(f"스타일 추출 오류: {str(e)}")
             return ["modern"]  # 오류 시 기본 스타일 반환
 
 
-    async def detect_objects(self, image_url: str) -> list:
+    async def detect_objects(
+        self, image_url: str, score_threshold: Optional[float] = None, max_per_class: Optional[int] = None,
+        tiling: Optional[str] = None,
+    ) -> list:
         """이미지에서 인테리어 관련 객체 탐지"""
+        self._require_ready("rcnn")
         try:
-            # Faster R-CNN 모델 로드
-            self._load_rcnn_model()
-
             # 이미지 로드
-            image = await self._load_image_from_url(image_url)
-
-            # 이미지 전처리
-            transform = self._rcnn_weights.transforms()
-            x = [transform(image)]
-
-            # 객체 탐지
-            with torch.no_grad():
-                predictions = self._rcnn_model(x)
+            fetched = await self.fetch_image(image_url)
 
-            # 결과 파싱
-            detected_objects = []
-            for i, (boxes, labels, scores) in enumerate(zip(predictions[0]['boxes'], predictions[0]['labels'], predictions[0]['scores'])):
-                if scores >= 0.7:  # 신뢰도 70% 이상만 고려
-                    label = self._coco_labels[labels.item()]
-                    if label in self._interior_objects:  # 인테리어 관련 객체만 필터링
-                        detected_objects.append({
-                            "label": label,
-                            "confidence": float(scores.item())
-                        })
-
-            return detected_objects
+            # 모델 추론은 추론 스레드 풀에서 실행
+            return await self.objects_from_fetched(fetched, score_threshold, max_per_class, tiling)
 
+        except (InferenceQueueFullError, ModelNotReadyError):
+            raise
         except Exception as e:
             logger.error(f"객체 탐지 오류: {str(e)}")
             return []  # 오류 시 빈 리스트 반환
 
+    async def analyze(
+        self, image_url: str, fields: Tuple[str, ...] = ("styles", "objects"),
+        score_threshold: Optional[float] = None, max_per_class: Optional[int] = None, tiling: Optional[str] = None,
+    ) -> dict:
+        """이미지 URL 하나를 한 번만 받아 요청한 분석(fields: styles, objects, embedding)을 병렬로 실행"""
+        self._require_fields_ready(fields)
+        timings = {}
+        start = time.perf_counter()
+        fetched = await self.fetch_image(image_url)
+        timings["fetch"] = _elapsed_ms(start)
+        return await self.analyze_fetched(fetched, fields, score_threshold, max_per_class, tiling, timings)
+
+    def _require_fields_ready(self, fields: Tuple[str, ...]):
+        unknown = set(fields) - set(ANALYZE_FIELDS)
+        if unknown or not fields:
+            raise ValueError(f"fields는 {', '.join(ANALYZE_FIELDS)} 중에서 골라야 합니다: {', '.join(sorted(unknown))}")
+        if "styles" in fields or "embedding" in fields:
+            self._require_ready("siglip")
+        if "objects" in fields:
+            self._require_ready("rcnn")
+
+    async def analyze_fetched(
+        self, fetched: FetchedImage, fields: Tuple[str, ...] = ("styles", "objects"),
+        score_threshold: Optional[float] = None, max_per_class: Optional[int] = None, tiling: Optional[str] = None,
+        timings: Optional[dict] = None,
+    ) -> dict:
+        """받은 이미지(업로드 등) 하나로 요청한 분석만 실행해 한 결과로 반환
+
+        styles와 embedding은 같은 SIGLIP 추론 한 번으로 구하며, 요청하지 않은 모델은 실행하지 않는다.
+        디코딩은 두 분기가 공유하고(결과 캐시에 모두 있으면 디코딩하지 않음), 한 분기가 실패하면 나머지는 취소한다.
+        분기별 소요 시간(ms)은 timings의 style / detect에 기록된다.
+        """
+        self._require_fields_ready(fields)
+        timings = {} if timings is None else timings
+        result: dict = {"timings": timings}
+        start = time.perf_counter()
+
+        async def style_branch():
+            branch_start = time.perf_counter()
+            try:
+                cached = await self._result_cache.get(self._style_cache_key(fetched.content_hash))
+                embedding = None
+                if "embedding" in fields and self._embedding_index is not None:
+                    embedding = await asyncio.to_thread(self._embedding_index.vector, fetched.content_hash)
+                if cached is None or ("embedding" in fields and embedding is None):
+                    cached, embedding = await self._infer_style_from_fetched(fetched)
+                if "styles" in fields:
+                    result["styles"] = cached["styles"]
+                    result["probabilities"] = cached["probabilities"]
+                if "embedding" in fields:
+                    result["embedding"] = [round(float(value), 6) for value in embedding]
+            finally:
+                timings["style"] = _elapsed_ms(branch_start)
+
+        async def detect_branch():
+            branch_start = time.perf_counter()
+            try:
+                objects = await self.objects_from_fetched(fetched, score_threshold, max_per_class, tiling)
+                result["objects"] = objects
+                result["object_counts"] = self.label_counts(objects)
+            finally:
+                timings["detect"] = _elapsed_ms(branch_start)
+
+        branches = []
+        if "styles" in fields or "embedding" in fields:
+            branches.append(style_branch())
+        if "objects" in fields:
+            branches.append(detect_branch())
+        tasks = [asyncio.ensure_future(branch) for branch in branches]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        timings["analyze"] = _elapsed_ms(start)
+        return result
+
+    async def extract_style_and_objects(
+        self, style_url: Optional[str], object_url: Optional[str],
+        score_threshold: Optional[float] = None, max_per_class: Optional[int] = None, tiling: Optional[str] = None,
+    ) -> Tuple[list, list, dict]:
+        """스타일 이미지와 객체 이미지를 동시에 로드하고 두 모델을 병렬로 실행
+
+        같은 URL이면 다운로드와 디코딩은 한 번만 수행한다. 단계별 소요 시간(ms)을 함께 반환하며,
+        실패 시 기본값은 extract_style/detect_objects와 같다.
+        """
+        timings = {}
+        results = {}
+        async for stage, value in self.iter_style_and_objects(
+            style_url, object_url, timings, score_threshold, max_per_class, tiling
+        ):
+            results[stage] = value
+        return results["styles"], results["objects"], timings
+
+    async def iter_style_and_objects(
+        self, style_url: Optional[str], object_url: Optional[str], timings: dict,
+        score_threshold: Optional[float] = None, max_per_class: Optional[int] = None, tiling: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[str, list]]:
+        """extract_style_and_objects와 같은 처리를 하되 ("styles" | "objects", 결과)를 끝나는 순서대로 내보냄
+
+        단계별 소요 시간(ms)은 timings에 기록된다. 호출자가 중간에 순회를 멈추면 남은 단계는 취소된다.
+        """
+        if style_url:
+            self._require_ready("siglip")
+        if object_url:
+            self._require_ready("rcnn")
+
+        start = time.perf_counter()
+        loaded = await self.fetch_images([style_url, object_url])
+        timings["fetch"] = _elapsed_ms(start)
+
+        missing = ValueError("이미지 URL이 필요합니다")
+        branches = self.iter_style_and_objects_from_fetched(
+            loaded[style_url] if style_url else missing,
+            loaded[object_url] if object_url else missing,
+            timings,
+            score_threshold,
+            max_per_class,
+            tiling,
+        )
+        # 호출자가 순회를 멈추면 안쪽 생성기도 바로 닫아 남은 단계를 취소
+        async with aclosing(branches):
+            async for item in branches:
+                yield item
+
+    async def extract_style_and_objects_from_fetched(
+        self, style_image: FetchedImage, object_image: FetchedImage,
+        score_threshold: Optional[float] = None, max_per_class: Optional[int] = None, tiling: Optional[str] = None,
+    ) -> Tuple[list, list, dict]:
+        """이미 받은 이미지(업로드 등)로 extract_style_and_objects와 같은 처리 (같은 이미지면 디코딩은 한 번)"""
+        self._require_ready("siglip")
+        self._require_ready("rcnn")
+        timings = {}
+        results = {}
+        async for stage, value in self.iter_style_and_objects_from_fetched(
+            style_image, object_image, timings, score_threshold, max_per_class, tiling
+        ):
+            results[stage] = value
+        return results["styles"], results["objects"], timings
+
+    async def iter_style_and_objects_from_fetched(
+        self, style_image: Union[FetchedImage, BaseException], object_image: Union[FetchedImage, BaseException], timings: dict,
+        score_threshold: Optional[float] = None, max_per_class: Optional[int] = None, tiling: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[str, list]]:
+        """받은 이미지(또는 받기 실패 예외)로 두 모델을 병렬 실행해 끝나는 순서대로 내보냄"""
+
+        def resolved(fetched: Union[FetchedImage, BaseException]) -> FetchedImage:
+            if isinstance(fetched, BaseException):
+                raise fetched
+            return fetched
+
+        async def style_branch() -> Tuple[str, list]:
+            branch_start = time.perf_counter()
+            try:
+                return "styles", await self.style_from_fetched(resolved(style_image))
+            except (InferenceQueueFullError, ModelNotReadyError):
+                raise
+            except Exception as e:
+                logger.error(f"스타일 추출 오류: {str(e)}")
+                return "styles", ["modern"]  # 오류 시 기본 스타일 반환
+            finally:
+                timings["style"] = _elapsed_ms(branch_start)
+
+        async def detect_branch() -> Tuple[str, list]:
+            branch_start = time.perf_counter()
+            try:
+                return "objects", await self.objects_from_fetched(
+                    resolved(object_image), score_threshold, max_per_class, tiling
+                )
+            except (InferenceQueueFullError, ModelNotReadyError):
+                raise
+            except Exception as e:
+                logger.error(f"객체 탐지 오류: {str(e)}")
+                return "objects", []  # 오류 시 빈 리스트 반환
+            finally:
+                timings["detect"] = _elapsed_ms(branch_start)
+
+        tasks = [asyncio.ensure_future(style_branch()), asyncio.ensure_future(detect_branch())]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def shutdown(self):
+        """추론 스레드 풀 정리"""
+        self._executor.shutdown()
+
+    async def aclose(self):
+        """실행 중인 스타일 배치가 끝나길 기다린 뒤 추론 스레드 풀 정리"""
+        await self._style_batcher.aclose()
+        self.shutdown()
+
+    def cache_stats(self) -> dict:
+        """결과 캐시, URL 검증 캐시, 임베딩 색인 통계"""
+        return {
+            "results": self._result_cache.stats(),
+            "urls": self._url_cache.stats(),
+            "embeddings": self._embedding_index.stats() if self._embedding_index is not None else None,
+        }
+
+    async def detect_objects_batch(
+        self, image_urls: List[str], score_threshold: Optional[float] = None, max_per_class: Optional[int] = None,
+        tiling: Optional[str] = None,
+    ) -> List[dict]:
+        """여러 이미지 URL에서 객체 탐지 (항목별 결과와 오류를 URL 순서대로 반환)"""
+        self._require_ready("rcnn")
+
+        # 모든 이미지를 동시에 다운로드
+        loaded = await asyncio.gather(
+            *[self.fetch_image(url) for url in image_urls],
+            return_exceptions=True,
+        )
+        results = await self.detect_objects_fetched_batch(loaded, score_threshold, max_per_class, tiling)
+        return [{"image_url": url, **result} for url, result in zip(image_urls, results)]
+
+    async def detect_objects_fetched_batch(
+        self, loaded: List[Union[FetchedImage, BaseException]],
+        score_threshold: Optional[float] = None, max_per_class: Optional[int] = None, tiling: Optional[str] = None,
+    ) -> List[dict]:
+        """받은 이미지(업로드 등) 목록에서 객체 탐지 (항목별 objects/error를 입력 순서대로 반환)
+
+        받기에 실패한 항목은 예외를 그대로 넘기면 해당 항목의 error로 보고된다.
+        타일 탐지는 전체 이미지 탐지를 배치로 끝낸 뒤 이미지별로 수행한다 (타일끼리 한 배치).
+        """
+        self._require_ready("rcnn")
+        mode = resolve_tiling(tiling)
+        results = [{"objects": [], "error": None} for _ in loaded]
+
+        # 결과 캐시에 있는 항목은 추론에서 제외
+        pending = []
+        for index, fetched in enumerate(loaded):
+            if isinstance(fetched, BaseException):
+                results[index]["error"] = str(fetched)
+                continue
+            cached = await self._result_cache.get(self._detection_cache_key(fetched.content_hash))
+            if cached is not None:
+                results[index]["objects"] = self.select_detections(cached, score_threshold, max_per_class)
+            else:
+                pending.append((index, fetched))
+
+        # 304였지만 결과가 없는 항목은 다시 다운로드, 업로드는 여기서 디코딩
+        redecoded = await asyncio.gather(
+            *[self._ensure_decoded(fetched) for _, fetched in pending],
+            return_exceptions=True,
+        )
+        indexed_images = []
+        fetched_by_index = {}
+        for (index, _), fetched in zip(pending, redecoded):
+            if isinstance(fetched, BaseException):
+                results[index]["error"] = str(fetched)
+            else:
+                fetched_by_index[index] = fetched
+                indexed_images.append((index, fetched.image))
+
+        # 크기별 배치를 추론 워커 수만큼만 동시에 제출
+        slots = asyncio.Semaphore(INFERENCE_WORKERS)
+
+        async def run_chunk(chunk: list):
+            async with slots:
+                try:
+                    outputs = await self._executor.run(self._predict_objects_batch, [image for _, image in chunk])
+                except Exception as e:
+                    logger.error(f"배치 객체 탐지 오류: {str(e)}")
+                    for index, _ in chunk:
+                        results[index]["error"] = f"객체 탐지 오류: {str(e)}"
+                    return
+            for (index, _), objects in zip(chunk, outputs):
+                results[index]["objects"] = self.select_detections(objects, score_threshold, max_per_class)
+                self._result_cache.set(self._detection_cache_key(fetched_by_index[index].content_hash), objects)
+
+        chunks = self._bucket_by_shape(indexed_images, RCNN_BATCH_SIZE)
+        await asyncio.gather(*[run_chunk(chunk) for chunk in chunks])
+        if mode == "off":
+            return results
+
+        async def run_tiled(index: int, fetched: FetchedImage):
+            async with slots:
+                try:
+                    objects = await self._tiled_objects_from_fetched(fetched, mode)
+                except Exception as e:
+                    logger.error(f"타일 객체 탐지 오류: {str(e)}")
+                    results[index]["error"] = f"객체 탐지 오류: {str(e)}"
+                    return
+            results[index]["objects"] = self.select_detections(objects, score_threshold, max_per_class)
+
+        await asyncio.gather(*[
+            run_tiled(index, fetched_by_index.get(index, fetched))
+            for index, fetched in enumerate(loaded)
+            if not isinstance(fetched, BaseException) and results[index]["error"] is None
+        ])
+        return results
+
 # 서비스 인스턴스 생성
 vision_service = VisionService()
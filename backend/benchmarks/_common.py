@@ -0,0 +1,167 @@
+"""벤치마크 공통 유틸리티"""
+import io
+import os
+import sys
+import json
+import math
+import glob
+import logging
+import platform
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+# 모델 경로가 backend 기준 상대 경로이므로 작업 디렉토리를 고정
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(BACKEND_DIR)
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+logger = logging.getLogger("benchmarks")
+
+# 서비스 내부의 요청별 INFO 로그가 측정을 방해하지 않도록 제한
+logging.getLogger("app").setLevel(logging.WARNING)
+
+
+def percentile(values, pct: float) -> float:
+    """정렬 기반 백분위수 (nearest-rank)"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(latencies_ms) -> dict:
+    """지연 시간 목록 요약 (ms)"""
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": round(float(np.mean(latencies_ms)), 2) if latencies_ms else float("nan"),
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+    }
+
+
+def synthetic_image(width: int, height: int, seed: int = 0) -> Image.Image:
+    """그라디언트 + 노이즈로 만든 재현 가능한 RGB 테스트 이미지"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([
+        x * 255 / max(1, width - 1),
+        y * 255 / max(1, height - 1),
+        (x + y) * 127 / max(1, width + height - 2),
+    ], axis=-1)
+    noise = rng.normal(0, 20, size=(height, width, 3))
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8), "RGB")
+
+
+def encode_image(image: Image.Image, fmt: str = "JPEG", quality: int = 90) -> bytes:
+    """PIL 이미지를 파일 바이트로 인코딩"""
+    buffer = io.BytesIO()
+    if fmt.upper() == "JPEG":
+        image.save(buffer, fmt, quality=quality)
+    else:
+        image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def load_fixture_images(directory: str = None, sizes=((640, 480), (1024, 768), (1920, 1080))) -> dict:
+    """{파일 이름: 바이트} 형태의 이미지 픽스처
+
+    directory가 있으면 그 안의 jpg/png 파일을, 없으면 sizes 크기의 합성 JPEG를 사용한다.
+    """
+    if directory:
+        paths = sorted(
+            path for pattern in ("*.jpg", "*.jpeg", "*.png")
+            for path in glob.glob(os.path.join(directory, pattern))
+        )
+        if not paths:
+            raise SystemExit(f"픽스처 이미지가 없습니다: {directory}")
+        fixtures = {}
+        for path in paths:
+            with open(path, "rb") as f:
+                fixtures[os.path.basename(path)] = f.read()
+        return fixtures
+    return {
+        f"synthetic_{width}x{height}_{seed}.jpg": encode_image(synthetic_image(width, height, seed=seed))
+        for seed, (width, height) in enumerate(sizes)
+    }
+
+
+def environment_info() -> dict:
+    """실행 간 결과를 비교할 때 함께 확인해야 하는 환경 정보"""
+    import torch
+    import torchvision
+    import transformers
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, cwd=BACKEND_DIR,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "torchvision": torchvision.__version__,
+        "transformers": transformers.__version__,
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+def load_vision_service(inference_backend: str = None, service=None):
+    """실제 가중치로 VisionService를 준비하고, 가중치가 없으면 무작위 초기화 모델로 대체
+
+    무작위 초기화는 시드를 고정하므로 백엔드끼리 같은 가중치로 비교할 수 있다.
+    service를 주면 새로 만들지 않고 그 인스턴스(예: 앱의 vision_service)에 모델을 채운다.
+    """
+    import torch
+    from app.services.vision_service import SIGLIP_MODEL_PATH, VisionService
+
+    if service is None:
+        service = VisionService(inference_backend) if inference_backend else VisionService()
+
+    try:
+        service._load_siglip_model()
+    except Exception as e:
+        from transformers import AutoConfig, AutoModelForImageClassification, AutoImageProcessor
+
+        logger.warning(f"SIGLIP 가중치 로드 실패, 무작위 초기화 모델로 측정합니다: {str(e)}")
+        model_path = SIGLIP_MODEL_PATH
+        config = AutoConfig.from_pretrained(model_path)
+        service._siglip_processor = AutoImageProcessor.from_pretrained(model_path)
+        torch.manual_seed(0)
+        service._set_siglip_model(AutoModelForImageClassification.from_config(config).eval())
+
+    try:
+        service._load_rcnn_model()
+    except Exception as e:
+        from torchvision.models.detection import fasterrcnn_resnet50_fpn_v2, FasterRCNN_ResNet50_FPN_V2_Weights
+
+        logger.warning(f"Faster R-CNN 가중치 로드 실패, 무작위 초기화 모델로 측정합니다: {str(e)}")
+        service._rcnn_weights = FasterRCNN_ResNet50_FPN_V2_Weights.DEFAULT
+        torch.manual_seed(0)
+        service._set_rcnn_model(fasterrcnn_resnet50_fpn_v2(
+            weights=None,
+            weights_backbone=None,
+            num_classes=len(service._rcnn_weights.meta["categories"]),
+        ).eval())
+
+    # 서비스가 요청을 받을 수 있는 상태로 표시 (워밍업 포함)
+    service.warm_up()
+    return service
+
+
+def write_json(path: str, payload: dict):
+    """결과를 JSON 파일로 저장 (benchmarks.compare로 비교할 수 있도록 환경 정보를 함께 기록)"""
+    payload = {"environment": environment_info(), **payload}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {path}")
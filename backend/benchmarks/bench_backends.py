@@ -0,0 +1,97 @@
+"""추론 백엔드별 지연 시간, 메모리, 모델 로드 시간 벤치마크
+
+메모리를 공정하게 비교하기 위해 백엔드마다 별도 프로세스에서 측정한다.
+torchscript는 첫 실행 시 아티팩트를 만들고, 이후 실행에서는 디스크 캐시를 재사용한다.
+
+    python -m benchmarks.bench_backends --backends eager int8 torchscript compile
+"""
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+from benchmarks._common import latency_summary, synthetic_image, write_json
+
+
+def rss_mb() -> float:
+    """현재 프로세스 RSS (MB)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def measure(backend: str, repeats: int) -> dict:
+    """현재 프로세스에서 한 백엔드를 로드하고 측정"""
+    from benchmarks._common import load_vision_service
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    service = load_vision_service(backend)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    image = synthetic_image(1024, 768, seed=0)
+    results = {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "rss_after_load_mb": round(rss_loaded, 1),
+        "model_rss_mb": round(rss_loaded - rss_before, 1),
+    }
+
+    for name, fn in (
+        ("siglip_batch1", lambda: service._predict_styles([image])),
+        ("siglip_batch8", lambda: service._predict_styles([image] * 8)),
+        ("rcnn_batch1", lambda: service._predict_objects_batch([image])),
+    ):
+        fn()  # 워밍업 (compile 백엔드는 여기서 컴파일)
+        latencies = []
+        for _ in range(repeats):
+            t = time.perf_counter()
+            fn()
+            latencies.append((time.perf_counter() - t) * 1000)
+        results[name] = latency_summary(latencies)
+
+    results["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return results
+
+
+def main(args):
+    rows = []
+    for backend in args.backends:
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_backends", "--worker", backend, "--repeats", str(args.repeats)],
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            print(f"{backend}: 실패\n{completed.stderr[-2000:]}")
+            continue
+        row = json.loads(completed.stdout.strip().splitlines()[-1])
+        rows.append(row)
+        print(
+            f"{backend:>12}: load={row['load_seconds']:>6.2f}s  rss={row['rss_after_load_mb']:>7.1f}MB  "
+            f"peak={row['peak_rss_mb']:>7.1f}MB  siglip p50={row['siglip_batch1']['p50_ms']:>7.1f}ms  "
+            f"siglip x8 p50={row['siglip_batch8']['p50_ms']:>7.1f}ms  rcnn p50={row['rcnn_batch1']['p50_ms']:>7.1f}ms"
+        )
+
+    if args.output:
+        write_json(args.output, {"benchmark": "inference_backends", "results": rows})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["eager", "int8", "torchscript", "compile"])
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        import logging
+        logging.basicConfig(level=logging.ERROR)
+        print(json.dumps(measure(args.worker, args.repeats)))
+    else:
+        main(args)
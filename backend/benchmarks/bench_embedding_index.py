@@ -0,0 +1,125 @@
+"""임베딩 색인 벤치마크: 전수 검색 vs IVF 검색의 조회 지연 시간과 재현율
+
+군집 구조가 있는 합성 단위 벡터(SIGLIP 임베딩과 같은 768차원)로 색인을 만든 뒤 다음을 측정한다.
+
+    insert:  배치 추가 처리량 (rows/s)
+    exact:   블록 단위 전수 검색 조회 지연 시간 (재현율 기준)
+    train:   IVF 학습(표본 k-means + 전체 배정) 시간
+    ivf:     nprobe별 조회 지연 시간과 전수 검색 대비 recall@k
+    append:  IVF 학습 이후 한 행씩 추가하는 지연 시간 (재학습 없이 리스트에 배정)
+
+    python -m benchmarks.bench_embedding_index --sizes 100000 1000000 --output embedding_index.json
+    python -m benchmarks.bench_embedding_index --sizes 100000 --nprobe 4 8 16 32 --queries 200
+"""
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+from benchmarks._common import latency_summary, write_json
+from app.services.embedding_index import EmbeddingIndex
+
+INSERT_BATCH_ROWS = 50000
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def synthetic_vectors(rng, centers: np.ndarray, count: int, noise: float) -> np.ndarray:
+    """군집 중심 주변에 흩어진 단위 벡터"""
+    labels = rng.integers(0, len(centers), size=count)
+    return unit(centers[labels] + rng.normal(0, noise, size=(count, centers.shape[1])).astype(np.float32)).astype(np.float32)
+
+
+def timed_queries(index: EmbeddingIndex, queries: np.ndarray, k: int, exact: bool):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        matches = index.search(query, k, exact=exact)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({match["hash"] for match in matches})
+    return latencies, results
+
+
+def run_size(size: int, args) -> list:
+    rng = np.random.default_rng(args.seed)
+    centers = unit(rng.normal(size=(args.clusters, args.dim))).astype(np.float32)
+    noise = args.noise / np.sqrt(args.dim)
+    directory = tempfile.mkdtemp(prefix="embedding-index-", dir=args.dir)
+    rows = []
+    try:
+        # 자동 IVF 학습을 끄고 전수 검색부터 측정
+        index = EmbeddingIndex(directory, ivf_min_rows=0)
+        start = time.perf_counter()
+        for offset in range(0, size, INSERT_BATCH_ROWS):
+            count = min(INSERT_BATCH_ROWS, size - offset)
+            vectors = synthetic_vectors(rng, centers, count, noise)
+            index.add([str(offset + i) for i in range(count)], vectors, [{}] * count)
+        insert_seconds = time.perf_counter() - start
+        rows.append({"name": f"insert/{size}", "rows_per_sec": round(size / insert_seconds, 1), "seconds": round(insert_seconds, 2)})
+        print(f"{rows[-1]['name']:28s} {rows[-1]['rows_per_sec']:10.1f} rows/s ({insert_seconds:.1f}s)")
+
+        # 저장된 벡터 근처의 질의 (같은 벡터가 아니라 약간 흔든 벡터)
+        stored = np.asarray(index._vectors[np.sort(rng.choice(size, size=args.queries, replace=False))], dtype=np.float32)
+        queries = unit(stored + rng.normal(0, noise / 2, size=stored.shape).astype(np.float32))
+
+        latencies, truth = timed_queries(index, queries, args.k, exact=True)
+        rows.append({"name": f"exact/{size}", "recall": 1.0, **latency_summary(latencies)})
+        print(f"{rows[-1]['name']:28s} p50={rows[-1]['p50_ms']:8.2f}ms p95={rows[-1]['p95_ms']:8.2f}ms")
+
+        start = time.perf_counter()
+        index.train_ivf()
+        train_seconds = time.perf_counter() - start
+        rows.append({"name": f"train/{size}", "lists": index.stats()["ivf_lists"], "seconds": round(train_seconds, 2)})
+        print(f"{rows[-1]['name']:28s} lists={rows[-1]['lists']} ({train_seconds:.1f}s)")
+
+        for nprobe in args.nprobe:
+            index.nprobe = nprobe
+            latencies, found = timed_queries(index, queries, args.k, exact=False)
+            recall = np.mean([len(a & b) / args.k for a, b in zip(found, truth)])
+            rows.append({"name": f"ivf/{size}/nprobe{nprobe}", "recall": round(float(recall), 4), **latency_summary(latencies)})
+            print(
+                f"{rows[-1]['name']:28s} p50={rows[-1]['p50_ms']:8.2f}ms p95={rows[-1]['p95_ms']:8.2f}ms "
+                f"recall@{args.k}={recall:.4f}"
+            )
+
+        latencies = []
+        for i, vector in enumerate(synthetic_vectors(rng, centers, args.appends, noise)):
+            start = time.perf_counter()
+            index.add([f"append-{i}"], vector[None], [{}])
+            latencies.append((time.perf_counter() - start) * 1000)
+        rows.append({"name": f"append/{size}", **latency_summary(latencies)})
+        print(f"{rows[-1]['name']:28s} p50={rows[-1]['p50_ms']:8.2f}ms p95={rows[-1]['p95_ms']:8.2f}ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100000, 1000000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=2000, help="합성 데이터의 군집 수")
+    parser.add_argument("--noise", type=float, default=1.0, help="군집 내 흩어짐 정도")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", nargs="+", type=int, default=[4, 8, 16, 32])
+    parser.add_argument("--appends", type=int, default=200, help="IVF 학습 후 한 행씩 추가할 횟수")
+    parser.add_argument("--dir", help="색인을 만들 임시 디렉토리의 상위 경로 (기본값: 시스템 임시 디렉토리)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args))
+
+    if args.output:
+        write_json(args.output, {"benchmark": "embedding_index", "config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""FastAPI 앱 전체 부하 테스트 (네트워크와 API 키 없이 같은 프로세스에서 실행)
+
+앱은 httpx.ASGITransport로 직접 호출하고, 이미지 URL은 로컬 픽스처를 돌려주는 전송 계층으로,
+OpenAI 호출은 가짜 OpenAI 서버(benchmarks.fake_openai_server)로 보낸다.
+엔드포인트별로 동시 요청 N개를 유지하며 처리량, 상태 코드, p50/p95/p99 지연 시간과
+/metrics의 단계별 평균 소요 시간을 기록한다.
+
+결과 캐시는 기본적으로 크기 1로 줄여 매 요청이 실제 추론을 하도록 한다 (--cache로 켬).
+요청 한도와 동시 처리 상한도 기본적으로 끈다 (--admission으로 켬).
+
+    python -m benchmarks.bench_load --endpoints style detect prompt hancut --concurrency 8 --requests 64
+    python -m benchmarks.bench_load --fixtures ./fixtures --fetch-latency-ms 30 --output load.json
+"""
+import os
+import re
+import time
+import asyncio
+import argparse
+import mimetypes
+
+import httpx
+
+from benchmarks._common import latency_summary, load_fixture_images, load_vision_service, write_json
+from benchmarks.fake_openai_server import add_config_arguments, config_from_args, start_fake_openai_server
+
+FIXTURE_HOST = "http://fixtures.local"
+
+ENDPOINTS = {
+    "style": ("/api/vision/extract-style", lambda i, url: {"image_url": url}),
+    "detect": ("/api/vision/detect-objects", lambda i, url: {"image_url": url}),
+    "analyze": ("/api/vision/analyze", lambda i, url: {"image_url": url, "fields": ["styles", "objects"]}),
+    "prompt": ("/api/llm/generate-prompt", lambda i, url: {"text": f"따뜻한 느낌의 원룸 인테리어 {i}"}),
+    "hancut": ("/api/hancut/", lambda i, url: {
+        "text_request": {"text": f"밝은 거실 {i}"},
+        "style_img_request": {"image_url": url},
+        "object_img_request": {"image_url": url},
+    }),
+}
+
+_STAGE_LINE = re.compile(r'^hancut_stage_duration_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+
+
+def fixture_transport(fixtures: dict, latency_ms: float) -> httpx.MockTransport:
+    """http://fixtures.local/<임의 경로>/<파일 이름> 요청에 픽스처 바이트로 응답"""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        name = request.url.path.rsplit("/", 1)[-1]
+        data = fixtures.get(name)
+        if data is None:
+            return httpx.Response(404)
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        return httpx.Response(200, content=data, headers={"content-type": content_type})
+
+    return httpx.MockTransport(handler)
+
+
+async def stage_totals(client: httpx.AsyncClient) -> dict:
+    """/metrics에서 단계별 (누적 시간, 횟수)"""
+    totals = {}
+    text = (await client.get("/metrics")).text
+    for line in text.splitlines():
+        match = _STAGE_LINE.match(line)
+        if match:
+            kind, stage, value = match.groups()
+            totals.setdefault(stage, [0.0, 0])[0 if kind == "sum" else 1] = float(value)
+    return totals
+
+
+async def run_endpoint(client: httpx.AsyncClient, name: str, fixture_names: list, args) -> dict:
+    """동시 요청 concurrency개로 requests건을 처리"""
+    path, make_body = ENDPOINTS[name]
+    latencies = []
+    statuses = {}
+    counter = iter(range(args.requests))
+
+    async def worker():
+        for i in counter:
+            # 요청마다 다른 URL을 써서 같은 다운로드가 합쳐지지 않도록 함
+            url = f"{FIXTURE_HOST}/{name}/{i}/{fixture_names[i % len(fixture_names)]}"
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=make_body(i, url))
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    before = await stage_totals(client)
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    elapsed = time.perf_counter() - start
+    after = await stage_totals(client)
+
+    stages = {}
+    for stage, (total, count) in after.items():
+        prev_total, prev_count = before.get(stage, (0.0, 0))
+        if count > prev_count:
+            stages[stage] = round((total - prev_total) / (count - prev_count) * 1000, 2)
+
+    return {
+        "name": name,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "requests_per_sec": round(args.requests / elapsed, 2),
+        "statuses": statuses,
+        "error_rate": round(1 - statuses.get("200", 0) / args.requests, 4),
+        **latency_summary(latencies),
+        "stage_mean_ms": stages,
+    }
+
+
+async def main_async(args) -> list:
+    import openai
+    from app.main import app
+    from app.services.image_fetcher import image_fetcher
+    from app.services.vision_service import vision_service
+
+    fixtures = load_fixture_images(args.fixtures)
+    image_fetcher.transport = fixture_transport(fixtures, args.fetch_latency_ms)
+    load_vision_service(service=vision_service)
+
+    server = await start_fake_openai_server(config_from_args(args))
+    openai.api_base = server.base_url
+    openai.api_key = "fake-key"
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app.local", timeout=None) as client:
+        # 워밍업 (첫 추론의 지연 초기화를 측정에서 제외)
+        for name in args.endpoints:
+            path, make_body = ENDPOINTS[name]
+            await client.post(path, json=make_body(-1, f"{FIXTURE_HOST}/warmup/{next(iter(fixtures))}"))
+
+        for name in args.endpoints:
+            row = await run_endpoint(client, name, list(fixtures), args)
+            results.append(row)
+            stages = " ".join(f"{stage}={ms:.1f}" for stage, ms in row["stage_mean_ms"].items())
+            print(
+                f"{name:7s} {row['requests_per_sec']:8.2f} req/s  p50={row['p50_ms']:8.1f}ms "
+                f"p95={row['p95_ms']:8.1f}ms p99={row['p99_ms']:8.1f}ms  statuses={row['statuses']}  [{stages}]"
+            )
+
+    from app.services.job_service import job_service
+    from app.services.llm_service import llm_service
+    await job_service.aclose()
+    await llm_service.aclose()
+    await image_fetcher.aclose()
+    vision_service.shutdown()
+    await server.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=64, help="엔드포인트별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--fixtures", help="픽스처 이미지 디렉토리 (없으면 합성 이미지 사용)")
+    parser.add_argument("--fetch-latency-ms", type=float, default=0.0, help="이미지 다운로드에 더할 지연")
+    parser.add_argument("--cache", action="store_true", help="결과 캐시를 기본 크기로 사용")
+    parser.add_argument("--admission", action="store_true", help="요청 한도와 동시 처리 상한(ADMISSION_*)을 켬")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    add_config_arguments(parser)
+    # 이미지 생성까지 기다리는 hancut 엔드포인트가 측정을 지배하지 않도록 기본 지연을 줄임
+    parser.set_defaults(latency_ms=300.0, jitter_ms=50.0, image_latency_ms=1000.0)
+    args = parser.parse_args()
+
+    if not args.cache:
+        # 앱 모듈을 가져오기 전에 설정해야 적용됨
+        os.environ["RESULT_CACHE_MAX_ENTRIES"] = "1"
+        os.environ["RESULT_CACHE_BACKEND"] = "memory"
+    if not args.admission:
+        # 한 클라이언트가 모든 요청을 보내므로 요청 한도를 끄고 앱 자체의 처리량을 측정
+        os.environ["ADMISSION_ENABLED"] = "false"
+
+    results = asyncio.run(main_async(args))
+    if args.output:
+        write_json(args.output, {"benchmark": "load", "config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
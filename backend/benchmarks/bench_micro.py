@@ -0,0 +1,148 @@
+"""비전 파이프라인 단계별 마이크로 벤치마크
+
+이미지 크기와 배치 크기를 바꿔 가며 다음 단계를 따로 측정한다.
+
+    decode:            이미지 바이트 -> 작업 해상도의 RGB PIL 이미지 (ImageFetcher와 같은 decode_image 경로)
+    siglip_preprocess: SIGLIP 입력 변환 (리사이즈 + 정규화, siglip_pixel_values)
+    siglip_forward:    SIGLIP 이미지 인코더 + 분류 헤드
+    rcnn_preprocess:   Faster R-CNN 가중치의 입력 변환 (PIL -> 텐서)
+    rcnn_transform:    모델 내부 GeneralizedRCNNTransform (리사이즈 + 정규화 + 배치 패딩)
+    rcnn_forward:      Faster R-CNN 전체 추론
+
+결과는 케이스 이름(예: siglip_forward/b8)별 행으로 저장되므로 benchmarks.compare로 실행 간 비교할 수 있다.
+
+    python -m benchmarks.bench_micro --output micro.json
+    python -m benchmarks.bench_micro --stages decode siglip_preprocess --sizes 640x480 1920x1080
+"""
+import time
+import argparse
+
+import torch
+
+from benchmarks._common import encode_image, latency_summary, load_vision_service, synthetic_image, write_json
+from app.services.image_preprocess import decode_image, siglip_pixel_values
+
+STAGES = ["decode", "siglip_preprocess", "siglip_forward", "rcnn_preprocess", "rcnn_transform", "rcnn_forward"]
+
+
+def parse_size(value: str):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def measure(fn, repeats: int, warmup: int, items: int = 1) -> dict:
+    """fn을 warmup번 실행한 뒤 repeats번 측정 (items는 한 번에 처리하는 이미지 수)"""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    summary = latency_summary(latencies)
+    summary["images_per_sec"] = round(items * 1000 / summary["mean_ms"], 2)
+    return summary
+
+
+def build_cases(service, args):
+    """(케이스 이름, 단계, 함수, 이미지 수) 목록"""
+    images = {size: synthetic_image(*size, seed=index) for index, size in enumerate(args.sizes)}
+    cases = []
+
+    if "decode" in args.stages:
+        for size, image in images.items():
+            for fmt in args.formats:
+                data = encode_image(image, fmt)
+                cases.append((f"decode/{fmt.lower()}/{size[0]}x{size[1]}", "decode", lambda data=data: decode_image(data), 1))
+
+    processor = service._siglip_processor
+    if "siglip_preprocess" in args.stages:
+        for size, image in images.items():
+            for batch in args.batch_sizes:
+                batch_images = [image] * batch
+                cases.append((
+                    f"siglip_preprocess/{size[0]}x{size[1]}/b{batch}", "siglip_preprocess",
+                    lambda batch_images=batch_images: siglip_pixel_values(batch_images, processor), batch,
+                ))
+
+    if "siglip_forward" in args.stages:
+        # 프로세서가 고정 해상도로 리사이즈하므로 입력 크기와 무관하고 배치 크기만 바꿔 측정
+        pixel_values = siglip_pixel_values([next(iter(images.values()))], processor)
+        for batch in args.batch_sizes:
+            batch_pixels = pixel_values.repeat(batch, 1, 1, 1)
+
+            def forward(batch_pixels=batch_pixels):
+                with torch.no_grad():
+                    return service._siglip_forward(batch_pixels)
+
+            cases.append((f"siglip_forward/b{batch}", "siglip_forward", forward, batch))
+
+    rcnn_input = service._rcnn_weights.transforms()
+    if "rcnn_preprocess" in args.stages:
+        for size, image in images.items():
+            cases.append((f"rcnn_preprocess/{size[0]}x{size[1]}", "rcnn_preprocess", lambda image=image: rcnn_input(image), 1))
+
+    tensors = {size: rcnn_input(image) for size, image in images.items()}
+    if "rcnn_transform" in args.stages:
+        transform = service._rcnn_model.transform
+        for size, tensor in tensors.items():
+            for batch in args.rcnn_batch_sizes:
+                batch_tensors = [tensor] * batch
+
+                def run_transform(batch_tensors=batch_tensors):
+                    with torch.no_grad():
+                        return transform(batch_tensors)
+
+                cases.append((f"rcnn_transform/{size[0]}x{size[1]}/b{batch}", "rcnn_transform", run_transform, batch))
+
+    if "rcnn_forward" in args.stages:
+        for size, tensor in tensors.items():
+            for batch in args.rcnn_batch_sizes:
+                batch_tensors = [tensor] * batch
+
+                def run_forward(batch_tensors=batch_tensors):
+                    with torch.no_grad():
+                        return service._rcnn_forward(batch_tensors)
+
+                cases.append((f"rcnn_forward/{size[0]}x{size[1]}/b{batch}", "rcnn_forward", run_forward, batch))
+
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[(640, 480), (1024, 768), (1920, 1080)], help="WIDTHxHEIGHT")
+    parser.add_argument("--formats", nargs="+", default=["JPEG", "PNG"], choices=["JPEG", "PNG", "WEBP"])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8], help="SIGLIP 배치 크기")
+    parser.add_argument("--rcnn-batch-sizes", nargs="+", type=int, default=[1, 2], help="Faster R-CNN 배치 크기")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--backend", help="VISION_INFERENCE_BACKEND (기본값: 환경 변수 설정)")
+    parser.add_argument("--threads", type=int, help="torch.set_num_threads 값")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    service = load_vision_service(args.backend)
+
+    results = []
+    for name, stage, fn, items in build_cases(service, args):
+        # R-CNN 전체 추론은 오래 걸리므로 반복 횟수를 줄임
+        repeats = max(1, args.repeats // 3) if stage == "rcnn_forward" else args.repeats
+        row = {"name": name, "stage": stage, **measure(fn, repeats, args.warmup if stage != "rcnn_forward" else 1, items)}
+        results.append(row)
+        print(
+            f"{name:36s} p50={row['p50_ms']:9.2f}ms p95={row['p95_ms']:9.2f}ms "
+            f"p99={row['p99_ms']:9.2f}ms {row['images_per_sec']:8.2f} img/s"
+        )
+
+    service.shutdown()
+    if args.output:
+        config = {**vars(args), "sizes": [f"{w}x{h}" for w, h in args.sizes]}
+        write_json(args.output, {"benchmark": "micro", "config": config, "results": results})
+
+
+if __name__ == "__main__":
+    main()
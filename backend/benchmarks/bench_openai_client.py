@@ -0,0 +1,111 @@
+"""OpenAI 호출 경로(공유 세션, 타임아웃, 재시도, 서킷 브레이커) 벤치마크
+
+가짜 OpenAI 서버를 같은 프로세스에 띄우고 시나리오별로 LLMService의 프롬프트 생성 호출을 측정한다.
+네트워크와 API 키가 필요 없다.
+
+    healthy: 정상 응답 (지연 시간과 연결 재사용 확인)
+    flaky:   일부 요청이 503 (재시도 후 성공률)
+    hang:    일부 요청이 응답하지 않음 (호출 단위 타임아웃)
+    outage:  모든 요청이 500 (서킷 브레이커가 열린 뒤 즉시 실패하는지)
+
+    python -m benchmarks.bench_openai_client --requests 200 --concurrency 20
+"""
+import time
+import asyncio
+import argparse
+
+import openai
+
+from benchmarks._common import latency_summary, write_json
+from benchmarks.fake_openai_server import FakeOpenAIConfig, start_fake_openai_server
+from app.services.llm_service import LLMService
+from app.services.openai_client import CircuitBreaker, CircuitOpenError, OpenAIClient
+
+SCENARIOS = {
+    "healthy": dict(),
+    "flaky": dict(error_rate=0.2, error_status=503),
+    "hang": dict(hang_rate=0.1),
+    "outage": dict(error_rate=1.0, error_status=500),
+}
+
+
+async def run_scenario(name: str, args) -> dict:
+    config = FakeOpenAIConfig(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 5, seed=1, **SCENARIOS[name])
+    server = await start_fake_openai_server(config)
+    openai.api_base = server.base_url
+    openai.api_key = "fake-key"
+
+    client = OpenAIClient(
+        chat_timeout=args.timeout,
+        retry_base=0.05,
+        retry_max=0.5,
+        breaker=CircuitBreaker(window=20, min_calls=10, failure_ratio=0.5, open_seconds=60),
+    )
+    service = LLMService(openai_client=client)
+    latencies = {"ok": [], "error": [], "rejected": []}
+    counter = iter(range(args.requests))
+
+    async def worker():
+        for i in counter:
+            request = service._hancut_request(f"거실 {i}", ["modern"], ["sofa"])
+            start = time.perf_counter()
+            try:
+                await service._complete_prompt(request, use_cache=False)
+                outcome = "ok"
+            except CircuitOpenError:
+                outcome = "rejected"
+            except Exception:
+                outcome = "error"
+            latencies[outcome].append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    elapsed = time.perf_counter() - start
+    await service.aclose()
+    await server.close()
+
+    return {
+        "scenario": name,
+        "elapsed_s": round(elapsed, 2),
+        "succeeded": len(latencies["ok"]),
+        "failed": len(latencies["error"]),
+        "rejected_by_breaker": len(latencies["rejected"]),
+        "upstream_requests": server.stats.requests,
+        "ok_latency": latency_summary(latencies["ok"]),
+        "rejected_latency": latency_summary(latencies["rejected"]),
+        "client": client.stats(),
+    }
+
+
+async def main_async(args):
+    results = []
+    for name in args.scenarios:
+        result = await run_scenario(name, args)
+        results.append(result)
+        print(
+            f"{name:8s} ok={result['succeeded']:4d} failed={result['failed']:4d} "
+            f"rejected={result['rejected_by_breaker']:4d} upstream={result['upstream_requests']:4d} "
+            f"p50={result['ok_latency']['p50_ms']:8.1f}ms p99={result['ok_latency']['p99_ms']:8.1f}ms "
+            f"rejected_p99={result['rejected_latency']['p99_ms']:6.2f}ms "
+            f"retries={result['client']['retries']} breaker={result['client']['breaker']['state']}"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--timeout", type=float, default=2.0, help="호출 한 번의 전체 제한 시간 (초)")
+    parser.add_argument("--output", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.output:
+        write_json(args.output, {"config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""이미지 전처리 경로 비교: 원본 해상도 디코딩 vs draft 디코딩 + 작업 해상도 공유 (IMAGE_DRAFT_DECODE)
+
+이미지 바이트 한 장에서 두 모델의 입력을 모두 만들 때까지를 측정한다.
+
+    legacy: ImageFile.Parser로 원본 해상도 디코딩 -> SIGLIP 이미지 프로세서 -> R-CNN 입력 변환 + GeneralizedRCNNTransform
+    fast:   decode_image(draft 디코딩, 작업 해상도) -> siglip_pixel_values -> R-CNN 입력 변환 + GeneralizedRCNNTransform
+
+케이스마다 새 프로세스에서 실행해 요청당 벽시계 시간, CPU 시간, 최대 RSS 증가량(VmHWM)을 기록한다 (Linux 전용).
+모델 가중치는 필요 없다 (R-CNN 내부 변환은 같은 설정으로 따로 만든다).
+
+    python -m benchmarks.bench_preprocess --sizes 4000x3000 3024x4032 1920x1080 --formats JPEG PNG
+"""
+import time
+import argparse
+import multiprocessing
+
+from PIL import ImageFile
+
+from benchmarks._common import encode_image, latency_summary, synthetic_image, write_json
+from benchmarks.bench_micro import parse_size
+
+MODES = ["legacy", "fast"]
+
+
+def legacy_decode(data: bytes, chunk_size: int = 64 * 1024):
+    """이전 ImageFetcher.fetch 방식: 청크 단위로 원본 해상도까지 디코딩"""
+    parser = ImageFile.Parser()
+    for offset in range(0, len(data), chunk_size):
+        parser.feed(data[offset:offset + chunk_size])
+    image = parser.close()
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def proc_status_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def worker(mode: str, size: tuple, fmt: str, repeats: int, results):
+    import torch
+    from torchvision.models.detection import FasterRCNN_ResNet50_FPN_V2_Weights
+    from torchvision.models.detection.transform import GeneralizedRCNNTransform
+    from transformers import AutoImageProcessor
+    from app.services.image_preprocess import decode_image, siglip_pixel_values
+    from app.services.vision_service import SIGLIP_MODEL_PATH
+
+    torch.set_num_threads(1)
+    processor = AutoImageProcessor.from_pretrained(SIGLIP_MODEL_PATH)
+    rcnn_input = FasterRCNN_ResNet50_FPN_V2_Weights.DEFAULT.transforms()
+    rcnn_transform = GeneralizedRCNNTransform(800, 1333, [0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+    data = encode_image(synthetic_image(*size), fmt)
+
+    def run(data=data):
+        if mode == "legacy":
+            image = legacy_decode(data)
+            pixel_values = processor(images=[image], return_tensors="pt")["pixel_values"]
+        else:
+            image = decode_image(data)
+            pixel_values = siglip_pixel_values([image], processor)
+        with torch.no_grad():
+            images, _ = rcnn_transform([rcnn_input(image)])
+        return image.size, tuple(pixel_values.shape), tuple(images.tensors.shape)
+
+    # 작은 이미지로 라이브러리 초기화를 끝낸 뒤 최대 RSS 기록을 초기화
+    # (측정할 이미지로 먼저 실행하면 해제된 버퍼를 할당자가 재사용해 최대 메모리가 드러나지 않음)
+    run(encode_image(synthetic_image(64, 48), fmt))
+    baseline = proc_status_mb("VmRSS")
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+    latencies, cpu_times = [], []
+    for _ in range(repeats):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        decoded_size, _, rcnn_shape = run()
+        latencies.append((time.perf_counter() - wall_start) * 1000)
+        cpu_times.append((time.process_time() - cpu_start) * 1000)
+
+    results.put({
+        "decoded_size": f"{decoded_size[0]}x{decoded_size[1]}",
+        "rcnn_input_shape": list(rcnn_shape),
+        "cpu_ms": round(sum(cpu_times) / len(cpu_times), 2),
+        "peak_rss_delta_mb": round(proc_status_mb("VmHWM") - baseline, 1),
+        **latency_summary(latencies),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[(4000, 3000), (3024, 4032), (1920, 1080), (640, 480)], help="WIDTHxHEIGHT")
+    parser.add_argument("--formats", nargs="+", default=["JPEG"], choices=["JPEG", "PNG", "WEBP"])
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for size in args.sizes:
+        for fmt in args.formats:
+            for mode in args.modes:
+                queue = context.Queue()
+                process = context.Process(target=worker, args=(mode, size, fmt, args.repeats, queue))
+                process.start()
+                row = {"name": f"{mode}/{fmt.lower()}/{size[0]}x{size[1]}", "mode": mode, **queue.get()}
+                process.join()
+                results.append(row)
+                print(
+                    f"{row['name']:28s} decoded={row['decoded_size']:>9s} p50={row['p50_ms']:8.1f}ms "
+                    f"cpu={row['cpu_ms']:8.1f}ms peak_rss=+{row['peak_rss_delta_mb']:6.1f}MB"
+                )
+
+    if args.output:
+        config = {**vars(args), "sizes": [f"{w}x{h}" for w, h in args.sizes]}
+        write_json(args.output, {"benchmark": "preprocess", "config": config, "results": results})
+
+
+if __name__ == "__main__":
+    main()
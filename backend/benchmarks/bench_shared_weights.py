@@ -0,0 +1,175 @@
+"""워커 프로세스별 메모리 측정: 가중치 복사 로드 vs 메모리 매핑 공유 (VISION_MMAP_WEIGHTS)
+
+uvicorn --workers N과 같이 독립된 프로세스 N개가 각각 두 모델을 로드하고 한 번 추론한 뒤,
+모두 살아 있는 상태에서 /proc/self/smaps_rollup으로 RSS와 PSS를 읽는다.
+PSS는 공유 페이지를 공유한 프로세스 수로 나눈 값이라 노드 전체 메모리 = 워커 PSS 합계가 된다.
+
+실제 가중치가 없으면 같은 구조의 무작위 가중치 파일을 임시 디렉토리에 만들어 측정한다 (Linux 전용).
+
+    python -m benchmarks.bench_shared_weights --workers 3 --modes copy mmap
+"""
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+from benchmarks._common import BACKEND_DIR, synthetic_image, write_json
+
+
+def smaps_mb() -> dict:
+    """현재 프로세스의 메모리 요약 (MB)"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return {
+        "rss_mb": round(values["Rss"], 1),
+        "pss_mb": round(values["Pss"], 1),
+        "shared_mb": round(values["Shared_Clean"] + values["Shared_Dirty"], 1),
+        "private_mb": round(values["Private_Clean"] + values["Private_Dirty"], 1),
+    }
+
+
+def worker(index: int, backend: str, cache_dir: str, barrier, results):
+    import torch  # noqa: F401  (런타임 자체의 메모리를 기준값에 포함)
+    import torchvision  # noqa: F401
+    import transformers  # noqa: F401
+    from app.services.vision_service import VisionService
+
+    before = smaps_mb()
+    service = VisionService(backend)
+    service._cache_dir = cache_dir
+    service.warm_up()
+    if not service.is_ready():
+        results.put({"worker": index, "error": service.readiness()["errors"]})
+        barrier.wait()
+        barrier.wait()
+        return
+
+    image = synthetic_image(640, 480)
+    service._predict_styles([image])
+    service._predict_objects_batch([image])
+
+    # 모든 워커가 모델을 올린 상태에서 측정해야 공유 페이지가 PSS에 반영됨
+    barrier.wait()
+    after = smaps_mb()
+    results.put({"worker": index, "before": before, "after": after})
+    barrier.wait()
+    service.shutdown()
+
+
+def prepare_weights(workdir: str) -> tuple:
+    """(SIGLIP 디렉토리, torch hub 캐시 디렉토리) 준비 (없으면 무작위 가중치 파일 생성)"""
+    import torch
+    from torchvision.models.detection import fasterrcnn_resnet50_fpn_v2, FasterRCNN_ResNet50_FPN_V2_Weights
+    from app.services.vision_service import SIGLIP_MODEL_PATH
+
+    siglip_dir = SIGLIP_MODEL_PATH
+    if not os.path.exists(os.path.join(siglip_dir, "model.safetensors")):
+        from transformers import AutoConfig, AutoModelForImageClassification
+
+        print("SIGLIP 가중치가 없어 무작위 가중치 파일을 만듭니다")
+        siglip_dir = os.path.join(workdir, "siglip")
+        torch.manual_seed(0)
+        model = AutoModelForImageClassification.from_config(AutoConfig.from_pretrained(SIGLIP_MODEL_PATH))
+        model.save_pretrained(siglip_dir, safe_serialization=True)
+        shutil.copy(os.path.join(SIGLIP_MODEL_PATH, "preprocessor_config.json"), siglip_dir)
+
+    cache_dir = os.path.expanduser("~/.cache/torch/hub")
+    weights = FasterRCNN_ResNet50_FPN_V2_Weights.DEFAULT
+    filename = os.path.basename(weights.url)
+    if not os.path.exists(os.path.join(cache_dir, "checkpoints", filename)):
+        print("Faster R-CNN 체크포인트가 없어 무작위 가중치 파일을 만듭니다")
+        cache_dir = os.path.join(workdir, "hub")
+        path = os.path.join(cache_dir, "checkpoints", filename)
+        os.makedirs(os.path.dirname(path))
+        model = fasterrcnn_resnet50_fpn_v2(weights=None, weights_backbone=None, num_classes=len(weights.meta["categories"]))
+        torch.save(model.state_dict(), path)
+        # 해시 검증 기록을 남겨 다운로드를 건너뜀 (VisionService._verify_checkpoint와 같은 형식)
+        stat = os.stat(path)
+        hash_prefix = torch.hub.HASH_REGEX.search(filename).group(1)
+        with open(path + ".verified", "w") as f:
+            f.write(f"{hash_prefix}:{stat.st_size}:{stat.st_mtime_ns}")
+
+    return siglip_dir, cache_dir
+
+
+def run_mode(mode: str, args, siglip_dir: str, cache_dir: str) -> dict:
+    # 모듈 상수는 임포트 시점에 읽히므로 spawn된 워커에 환경 변수로 전달
+    os.environ["VISION_MMAP_WEIGHTS"] = "true" if mode == "mmap" else "false"
+    os.environ["SIGLIP_MODEL_PATH"] = siglip_dir
+    os.environ["VISION_LOCAL_ONLY"] = "true"
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(index, args.backend, cache_dir, barrier, results))
+        for index in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+
+    barrier.wait()
+    rows = sorted((results.get() for _ in processes), key=lambda row: row["worker"])
+    barrier.wait()
+    for process in processes:
+        process.join()
+
+    errors = [row for row in rows if "error" in row]
+    if errors:
+        raise SystemExit(f"{mode}: 모델 로드 실패 {errors}")
+
+    def mean(key, phase="after"):
+        return round(sum(row[phase][key] for row in rows) / len(rows), 1)
+
+    return {
+        "name": mode,
+        "workers": args.workers,
+        "backend": args.backend,
+        "rss_per_worker_mb": mean("rss_mb"),
+        "pss_per_worker_mb": mean("pss_mb"),
+        "private_per_worker_mb": mean("private_mb"),
+        "shared_per_worker_mb": mean("shared_mb"),
+        "model_pss_per_worker_mb": round(mean("pss_mb") - mean("pss_mb", "before"), 1),
+        "total_pss_mb": round(sum(row["after"]["pss_mb"] for row in rows), 1),
+        "per_worker": rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", default=["copy", "mmap"], choices=["copy", "mmap"])
+    parser.add_argument("--backend", default="eager", help="VISION_INFERENCE_BACKEND (mmap 공유는 eager/compile에서 효과)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="hancut-shared-weights-")
+    try:
+        siglip_dir, cache_dir = prepare_weights(workdir)
+        os.environ["PYTHONPATH"] = BACKEND_DIR
+        results = []
+        for mode in args.modes:
+            row = run_mode(mode, args, siglip_dir, cache_dir)
+            results.append(row)
+            print(
+                f"{mode:5s} workers={row['workers']} rss/worker={row['rss_per_worker_mb']:8.1f}MB "
+                f"pss/worker={row['pss_per_worker_mb']:8.1f}MB private/worker={row['private_per_worker_mb']:8.1f}MB "
+                f"model_pss/worker={row['model_pss_per_worker_mb']:8.1f}MB total_pss={row['total_pss_mb']:8.1f}MB"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        write_json(args.output, {"benchmark": "shared_weights", "config": vars(args), "results": results})
+    else:
+        print(json.dumps([{k: v for k, v in row.items() if k != "per_worker"} for row in results], indent=2))
+
+
+if __name__ == "__main__":
+    main()
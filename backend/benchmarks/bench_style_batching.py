@@ -0,0 +1,75 @@
+"""extract_style 마이크로 배칭 벤치마크
+
+동시성 수준별로 처리량(requests/sec)과 p50/p99 지연 시간을 배칭 없음(batch=1)과 비교한다.
+
+    python -m benchmarks.bench_style_batching --concurrency 1 4 8 16 32 --requests 128
+"""
+import time
+import asyncio
+import argparse
+import logging
+
+from benchmarks._common import latency_summary, load_vision_service, synthetic_image, write_json
+
+
+async def run_level(service, images, concurrency: int, total_requests: int) -> dict:
+    """동시 요청 concurrency개로 total_requests건을 처리"""
+    latencies = []
+    counter = iter(range(total_requests))
+    batcher = service._style_batcher
+    batches_before, items_before = batcher.batches, batcher.items
+
+    async def client():
+        for i in counter:
+            start = time.perf_counter()
+            await service.extract_style_from_image(images[i % len(images)])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    batches = batcher.batches - batches_before
+    return {
+        "concurrency": concurrency,
+        "requests_per_sec": round(total_requests / elapsed, 2),
+        "avg_batch_size": round((batcher.items - items_before) / max(1, batches), 2),
+        **latency_summary(latencies),
+    }
+
+
+async def main(args):
+    service = load_vision_service()
+    images = [synthetic_image(640, 480, seed=i) for i in range(8)]
+
+    # 워밍업
+    await service.extract_style_from_image(images[0])
+
+    results = []
+    for max_batch_size in (1, args.max_batch_size):
+        service._style_batcher.max_batch_size = max_batch_size
+        service._style_batcher.max_wait_ms = args.max_wait_ms if max_batch_size > 1 else 0
+        for concurrency in args.concurrency:
+            row = await run_level(service, images, concurrency, args.requests)
+            row["max_batch_size"] = max_batch_size
+            results.append(row)
+            print(
+                f"batch<={max_batch_size:>3} conc={concurrency:>3} "
+                f"{row['requests_per_sec']:>8.2f} req/s  avg_batch={row['avg_batch_size']:>5.2f}  "
+                f"p50={row['p50_ms']:>8.1f}ms  p99={row['p99_ms']:>8.1f}ms"
+            )
+
+    service.shutdown()
+    if args.output:
+        write_json(args.output, {"benchmark": "style_batching", "results": results})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--requests", type=int, default=128, help="동시성 수준별 요청 수")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+"""타일 탐지 벤치마크: 일반 탐지 대비 재현율 증가와 추가 지연 시간
+
+고정 이미지 세트의 각 이미지를 타일 모드(off / auto / on)별로 디코딩부터 탐지까지 실행해 지연 시간과 탐지 결과를 비교한다.
+--labels로 이미지별 정답 라벨 개수({"pano.jpg": {"vase": 2, "clock": 1}})를 주면 라벨 개수 기준 재현율
+(라벨별 min(탐지 수, 정답 수)의 합 / 정답 수의 합)을 계산하고, 없으면 탐지된 객체 수만 비교한다.
+이미지 디렉토리를 주지 않으면 파노라마와 고해상도 크기의 합성 이미지를 사용한다 (지연 시간 측정용).
+
+    python -m benchmarks.bench_tiled_detection --images ./fixtures/panoramas --labels ./fixtures/panoramas/labels.json
+    python -m benchmarks.bench_tiled_detection --repeats 3 --output tiled_detection.json
+"""
+import json
+import time
+import argparse
+
+from benchmarks._common import latency_summary, load_fixture_images, load_vision_service, write_json
+from app.services.image_preprocess import decode_image
+from app.services.tiled_detection import TILING_MODES, plan_tiles, should_tile, tile_count, tile_decode_size
+
+FIXTURE_SIZES = ((8000, 2000), (6000, 1500), (4000, 3000), (1920, 1080))
+
+
+def detect(service, data: bytes, mode: str) -> list:
+    """서비스의 objects_from_fetched와 같은 순서(작업 해상도 탐지 -> 필요하면 재디코딩 후 타일 탐지)를 캐시 없이 실행"""
+    image = decode_image(data)
+    objects = service._predict_objects(image)
+    original_size = image.info["original_size"]
+    size = tile_decode_size(original_size)
+    if mode == "off" or not should_tile(original_size, mode) or tile_count(size) == 1:
+        return objects
+    return service._predict_objects_tiled(decode_image(data, size=size), objects)
+
+
+def label_recall(found: dict, expected: dict) -> tuple:
+    """(맞힌 수, 정답 수) 라벨 개수 기준"""
+    hits = sum(min(found.get(label, 0), count) for label, count in expected.items())
+    return hits, sum(expected.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="픽스처 이미지 디렉토리 (기본값: 합성 이미지)")
+    parser.add_argument("--labels", help="이미지별 정답 라벨 개수 JSON")
+    parser.add_argument("--modes", nargs="+", default=list(TILING_MODES), choices=TILING_MODES)
+    parser.add_argument("--score-threshold", type=float, help="재현율 계산에 쓸 신뢰도 기준 (기본값: DETECTION_SCORE_THRESHOLD)")
+    parser.add_argument("--repeats", type=int, default=1, help="이미지별 반복 횟수 (지연 시간은 전체 반복의 분포)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    fixtures = load_fixture_images(args.images, sizes=FIXTURE_SIZES)
+    labels = {}
+    if args.labels:
+        with open(args.labels, encoding="utf-8") as f:
+            labels = json.load(f)
+    service = load_vision_service()
+
+    for name, data in fixtures.items():
+        original_size = decode_image(data).info["original_size"]
+        size = tile_decode_size(original_size)
+        print(
+            f"{name}: {original_size[0]}x{original_size[1]} -> 타일 디코딩 {size[0]}x{size[1]}, "
+            f"타일 {len(plan_tiles(size))}장, auto={'타일' if should_tile(original_size, 'auto') else '일반'}"
+        )
+
+    results = []
+    for mode in args.modes:
+        latencies, per_image = [], []
+        hits = total = found_objects = 0
+        for name, data in fixtures.items():
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                objects = detect(service, data, mode)
+                latencies.append((time.perf_counter() - start) * 1000)
+            counts = service.label_counts(service.select_detections(objects, args.score_threshold))
+            found_objects += sum(counts.values())
+            per_image.append({"name": name, "objects": counts})
+            if name in labels:
+                image_hits, image_total = label_recall(counts, labels[name])
+                hits, total = hits + image_hits, total + image_total
+        row = {"name": f"detect/{mode}", "objects": found_objects, **latency_summary(latencies), "images": per_image}
+        if total:
+            row["recall"] = round(hits / total, 4)
+        results.append(row)
+
+    baseline = next((row for row in results if row["name"] == "detect/off"), None)
+    for row in results:
+        if baseline is not None:
+            row["added_latency_ms"] = round(row["mean_ms"] - baseline["mean_ms"], 2)
+            if "recall" in row:
+                row["recall_gain"] = round(row["recall"] - baseline["recall"], 4)
+        recall = f" recall={row['recall']:.4f} (+{row.get('recall_gain', 0):.4f})" if "recall" in row else ""
+        print(
+            f"{row['name']:12s} mean={row['mean_ms']:9.1f}ms p95={row['p95_ms']:9.1f}ms "
+            f"(+{row.get('added_latency_ms', 0):.1f}ms) objects={row['objects']}{recall}"
+        )
+
+    if args.output:
+        write_json(args.output, {"benchmark": "tiled_detection", "config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""추론 백엔드 정확도 회귀 검사
+
+eager 백엔드의 결과를 기준으로 각 백엔드의 상위 3개 스타일과 탐지 결과가 같은지 고정 이미지 세트에서 비교한다.
+이미지 디렉토리를 주지 않으면 재현 가능한 합성 이미지를 사용한다. 일치율이 기준 미만이면 종료 코드 1.
+
+    python -m benchmarks.check_backend_accuracy --backends int8 torchscript --images ./fixtures
+"""
+import os
+import sys
+import argparse
+import logging
+from collections import Counter
+
+from benchmarks._common import load_vision_service, synthetic_image, write_json
+from app.services.image_preprocess import decode_image
+
+
+def load_fixture_images(image_dir: str = None) -> list:
+    """디렉토리의 이미지(이름순) 또는 합성 이미지 세트"""
+    if not image_dir:
+        sizes = [(640, 480), (480, 640), (1024, 768), (800, 800), (1280, 720), (720, 1280)]
+        return [(f"synthetic-{w}x{h}-{i}", synthetic_image(w, h, seed=i)) for i, (w, h) in enumerate(sizes)]
+    images = []
+    for name in sorted(os.listdir(image_dir)):
+        if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
+            # 서비스와 같은 경로로 디코딩 (작업 해상도로 축소)
+            with open(os.path.join(image_dir, name), "rb") as f:
+                images.append((name, decode_image(f.read())))
+    return images
+
+
+def predict_all(service, images: list) -> list:
+    """이미지별 스타일/탐지 결과 (추론 스레드를 거치지 않고 직접 실행)"""
+    results = []
+    for name, image in images:
+        style = service._predict_styles([image])[0]
+        objects = service.select_detections(service._predict_objects_batch([image])[0])
+        results.append({"name": name, "style": style, "objects": objects})
+    return results
+
+
+def compare(reference: list, candidate: list, confidence_tolerance: float) -> dict:
+    """기준 결과 대비 스타일 순서 일치율, 탐지 라벨 일치율, 신뢰도 최대 오차"""
+    style_exact = style_set = label_match = 0
+    max_confidence_delta = 0.0
+    min_embedding_cosine = 1.0
+    for ref, cand in zip(reference, candidate):
+        # 임베딩 색인은 백엔드와 관계없이 공유되므로 임베딩도 비교
+        min_embedding_cosine = min(min_embedding_cosine, float(ref["style"]["embedding"] @ cand["style"]["embedding"]))
+        style_exact += ref["style"]["styles"] == cand["style"]["styles"]
+        style_set += set(ref["style"]["styles"]) == set(cand["style"]["styles"])
+
+        ref_labels = Counter(obj["label"] for obj in ref["objects"])
+        cand_labels = Counter(obj["label"] for obj in cand["objects"])
+        label_match += ref_labels == cand_labels
+
+        ref_conf = sorted(obj["confidence"] for obj in ref["objects"])
+        cand_conf = sorted(obj["confidence"] for obj in cand["objects"])
+        if len(ref_conf) == len(cand_conf):
+            for a, b in zip(ref_conf, cand_conf):
+                max_confidence_delta = max(max_confidence_delta, abs(a - b))
+
+    total = len(reference)
+    return {
+        "top3_exact_match": round(style_exact / total, 4),
+        "top3_set_match": round(style_set / total, 4),
+        "detection_label_match": round(label_match / total, 4),
+        "max_confidence_delta": round(max_confidence_delta, 4),
+        "min_embedding_cosine": round(min_embedding_cosine, 4),
+        "confidence_within_tolerance": max_confidence_delta <= confidence_tolerance,
+    }
+
+
+def main(args) -> int:
+    images = load_fixture_images(args.images)
+    print(f"이미지 {len(images)}장으로 비교합니다")
+
+    reference = predict_all(load_vision_service("eager"), images)
+
+    report = {}
+    failed = False
+    for backend in args.backends:
+        result = compare(reference, predict_all(load_vision_service(backend), images), args.confidence_tolerance)
+        passed = result["top3_set_match"] >= args.min_match and result["detection_label_match"] >= args.min_match
+        result["passed"] = passed
+        failed |= not passed
+        report[backend] = result
+        print(
+            f"{backend:>12}: top3 exact={result['top3_exact_match']:.2%} set={result['top3_set_match']:.2%} "
+            f"detection labels={result['detection_label_match']:.2%} "
+            f"max conf delta={result['max_confidence_delta']:.4f} "
+            f"min embedding cos={result['min_embedding_cosine']:.4f} -> {'PASS' if passed else 'FAIL'}"
+        )
+
+    if args.output:
+        write_json(args.output, {"benchmark": "backend_accuracy", "images": len(images), "results": report})
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["int8", "torchscript"])
+    parser.add_argument("--images", help="비교할 이미지 디렉토리 (없으면 합성 이미지)")
+    parser.add_argument("--min-match", type=float, default=0.95, help="통과 기준 일치율")
+    parser.add_argument("--confidence-tolerance", type=float, default=0.05)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+"""두 벤치마크 결과 JSON 비교
+
+같은 벤치마크를 두 번 실행한 결과(예: torch 업그레이드 전/후)를 행 단위로 맞춰 지표 변화율을 출력한다.
+지연 시간, 메모리처럼 낮을수록 좋은 지표가 threshold 이상 늘거나, 처리량이 threshold 이상 줄면
+회귀로 표시하고 종료 코드 1을 반환한다 (CI에서 사용 가능).
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.1
+    python -m benchmarks.compare baseline.json candidate.json --metrics p50_ms p95_ms images_per_sec
+"""
+import sys
+import json
+import argparse
+
+# 행을 식별하는 필드 (각 벤치마크 결과에 있는 것만 사용)
+ROW_KEYS = ("name", "scenario", "backend", "max_batch_size", "concurrency")
+
+# 높을수록 좋은 지표 (나머지 숫자 지표 중 LOWER_IS_BETTER 접미사가 붙은 것은 낮을수록 좋음)
+HIGHER_IS_BETTER = ("per_sec", "succeeded")
+LOWER_IS_BETTER = ("_ms", "_mb", "_seconds", "_s", "error_rate", "failed")
+
+# 환경 정보 중 다르면 비교 결과를 신뢰하기 어려운 항목
+ENVIRONMENT_KEYS = ("processor", "cpu_count", "torch", "torchvision", "transformers", "torch_threads")
+
+
+def row_id(row: dict, index: int) -> str:
+    parts = [f"{key}={row[key]}" for key in ROW_KEYS if key in row]
+    return ",".join(parts) if parts else f"#{index}"
+
+
+def flatten(value, prefix: str = "") -> dict:
+    """중첩 딕셔너리의 숫자 값을 a.b.c 형태의 키로 펼침"""
+    if isinstance(value, bool):
+        return {}
+    if isinstance(value, (int, float)):
+        return {prefix: float(value)}
+    if isinstance(value, dict):
+        flat = {}
+        for key, child in value.items():
+            flat.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    return {}
+
+
+def load_rows(path: str):
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    results = payload.get("results", [])
+    if isinstance(results, dict):
+        results = [{"name": key, **value} for key, value in results.items()]
+    rows = {row_id(row, index): flatten({k: v for k, v in row.items() if k not in ROW_KEYS}) for index, row in enumerate(results)}
+    return payload, rows
+
+
+def direction(metric: str) -> int:
+    """1: 높을수록 좋음, -1: 낮을수록 좋음, 0: 판단하지 않음"""
+    leaf = metric.rsplit(".", 1)[-1]
+    if any(leaf.endswith(suffix) for suffix in HIGHER_IS_BETTER):
+        return 1
+    if metric.startswith("stage_mean_ms.") or any(leaf.endswith(suffix) for suffix in LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="회귀로 판단할 변화율 (0.1 = 10%%)")
+    parser.add_argument("--metrics", nargs="+", help="비교할 지표 이름 (기본값: 방향을 알 수 있는 모든 지표)")
+    parser.add_argument("--all", action="store_true", help="변화가 threshold 미만인 지표도 출력")
+    args = parser.parse_args()
+
+    baseline_payload, baseline = load_rows(args.baseline)
+    candidate_payload, candidate = load_rows(args.candidate)
+
+    if baseline_payload.get("benchmark") != candidate_payload.get("benchmark"):
+        print(f"경고: 서로 다른 벤치마크입니다 ({baseline_payload.get('benchmark')} vs {candidate_payload.get('benchmark')})")
+    base_env = baseline_payload.get("environment", {})
+    cand_env = candidate_payload.get("environment", {})
+    for key in ENVIRONMENT_KEYS:
+        if base_env.get(key) != cand_env.get(key):
+            print(f"환경 차이: {key} {base_env.get(key)} -> {cand_env.get(key)}")
+
+    regressions = 0
+    improvements = 0
+    for row in baseline:
+        if row not in candidate:
+            print(f"{row}: 후보 결과에 없음")
+            continue
+        for metric, before in baseline[row].items():
+            leaf = metric.rsplit(".", 1)[-1]
+            sign = direction(metric)
+            if sign == 0 or (args.metrics and leaf not in args.metrics):
+                continue
+            after = candidate[row].get(metric)
+            if after is None or before != before or after != after:  # NaN 제외
+                continue
+            change = (after - before) / before if before else 0.0
+            worse = change * sign < -args.threshold
+            better = change * sign > args.threshold
+            regressions += worse
+            improvements += better
+            if worse or better or args.all:
+                mark = "회귀" if worse else "개선" if better else ""
+                print(f"{row:48s} {metric:28s} {before:12.2f} -> {after:12.2f} ({change:+7.1%}) {mark}")
+
+    for row in candidate:
+        if row not in baseline:
+            print(f"{row}: 기준 결과에 없음")
+
+    print(f"회귀 {regressions}건, 개선 {improvements}건 (threshold {args.threshold:.0%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
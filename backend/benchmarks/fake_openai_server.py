@@ -0,0 +1,184 @@
+"""네트워크 없이 OpenAI 호출의 지연 시간과 장애를 재현하는 가짜 OpenAI 서버
+
+/v1/chat/completions (stream 포함)와 /v1/images/generations 만 흉내 내며,
+응답 지연, 오류 비율(429/500/503), 응답하지 않는 요청 비율을 설정할 수 있다.
+
+    python -m benchmarks.fake_openai_server --port 8199 --latency-ms 800 --error-rate 0.1
+    OPENAI_API_BASE=http://127.0.0.1:8199/v1 OPENAI_API_KEY=test uvicorn app.main:app
+
+같은 프로세스에서 쓸 때는 start_fake_openai_server()로 띄우고 반환된 서버의 close()로 종료한다.
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+
+@dataclass
+class FakeOpenAIConfig:
+    latency_ms: float = 500.0
+    jitter_ms: float = 100.0
+    image_latency_ms: float = 3000.0
+    token_interval_ms: float = 20.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    hang_rate: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class FakeOpenAIStats:
+    requests: int = 0
+    errors: int = 0
+    hangs: int = 0
+    by_path: dict = field(default_factory=dict)
+
+
+class FakeOpenAIServer:
+    def __init__(self, config: FakeOpenAIConfig):
+        self.config = config
+        self.stats = FakeOpenAIStats()
+        self._random = random.Random(config.seed)
+        self._runner = None
+        self.base_url = None
+
+    def _delay(self, base_ms: float) -> float:
+        jitter = self._random.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        return max(0.0, base_ms + jitter) / 1000
+
+    async def _maybe_fail(self, request: web.Request):
+        """설정한 비율로 응답하지 않거나 오류 응답 (정상 요청이면 None)"""
+        self.stats.requests += 1
+        self.stats.by_path[request.path] = self.stats.by_path.get(request.path, 0) + 1
+        roll = self._random.random()
+        if roll < self.config.hang_rate:
+            self.stats.hangs += 1
+            await asyncio.sleep(3600)
+        if roll < self.config.hang_rate + self.config.error_rate:
+            self.stats.errors += 1
+            await asyncio.sleep(self._delay(self.config.latency_ms) / 4)
+            return web.json_response(
+                {"error": {"message": "fake upstream error", "type": "server_error", "code": None}},
+                status=self.config.error_status,
+                headers={"retry-after": "1"} if self.config.error_status == 429 else None,
+            )
+        return None
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        failure = await self._maybe_fail(request)
+        if failure is not None:
+            return failure
+        body = await request.json()
+        user_text = next((m["content"] for m in body.get("messages", []) if m["role"] == "user"), "")
+        content = json.dumps({"prompt": f"A realistic interior inspired by: {user_text}"}, ensure_ascii=False)
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(self._delay(self.config.latency_ms))
+            return web.json_response({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+        # 첫 토큰까지는 latency_ms, 이후 토큰 간격은 token_interval_ms
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(self._delay(self.config.latency_ms))
+        for index in range(0, len(content), 8):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model"),
+                "choices": [{"index": 0, "delta": {"content": content[index:index + 8]}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            await asyncio.sleep(self.config.token_interval_ms / 1000)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def image_generations(self, request: web.Request) -> web.Response:
+        failure = await self._maybe_fail(request)
+        if failure is not None:
+            return failure
+        await request.json()
+        await asyncio.sleep(self._delay(self.config.image_latency_ms))
+        return web.json_response({
+            "created": int(time.time()),
+            "data": [{"url": f"https://fake-openai.local/images/{self.stats.requests}.png"}],
+        })
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_post("/v1/images/generations", self.image_generations)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}/v1"
+        return self.base_url
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def start_fake_openai_server(config: FakeOpenAIConfig = None, host: str = "127.0.0.1", port: int = 0) -> FakeOpenAIServer:
+    """현재 이벤트 루프에서 가짜 서버 시작 (port=0이면 빈 포트 사용, 주소는 server.base_url)"""
+    server = FakeOpenAIServer(config or FakeOpenAIConfig())
+    await server.start(host, port)
+    return server
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="채팅 응답(첫 토큰)까지의 지연")
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--image-latency-ms", type=float, default=3000.0, help="이미지 생성 응답 지연")
+    parser.add_argument("--token-interval-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="오류로 응답할 요청 비율")
+    parser.add_argument("--error-status", type=int, default=500, choices=[429, 500, 502, 503])
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="응답하지 않을 요청 비율 (타임아웃 재현)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeOpenAIConfig:
+    return FakeOpenAIConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        image_latency_ms=args.image_latency_ms,
+        token_interval_ms=args.token_interval_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        hang_rate=args.hang_rate,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8199)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    server = FakeOpenAIServer(config_from_args(args))
+    print(f"가짜 OpenAI 서버: http://{args.host}:{args.port}/v1")
+    web.run_app(server.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()